@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the Ryanair clients, run against a local mock of the Ryanair API.
+See `benchmarks.run` and `benchmarks.mock_server`.
+"""
@@ -0,0 +1,91 @@
+"""
+Query counts for `Ryanair.fare_calendar`, against the local mock API answering from a fixed timetable.
+
+For each number of destinations and share of days with flights, a calendar is built over random timetables, checked
+against them, and its oneWayFares queries counted. The run fails if any calendar is wrong, or takes more queries
+than querying each day would, plus the first query over the whole range.
+
+    python -m benchmarks.fare_calendar --days 30 --destinations 1,3,10,40 --density 0.05,0.15,0.5,1
+"""
+import argparse
+import logging
+import statistics
+import sys
+from datetime import date, timedelta
+
+from benchmarks.mock_server import MockRyanairServer, point_client_at, random_timetable
+from ryanair import Ryanair
+from ryanair.proxy import ProxyPool
+
+logger = logging.getLogger(__name__)
+
+ORIGIN = "DUB"
+
+
+def run_calendar(days: int, destinations: int, density: float, seed: int) -> dict:
+    start = date.today() + timedelta(30)
+    timetable = random_timetable(destinations, start, days, density, seed)
+    with MockRyanairServer(timetable=timetable) as server:
+        api = Ryanair(proxy_pool=ProxyPool())
+        point_client_at(api, server.url)
+        calendar = api.fare_calendar(ORIGIN, start, start + timedelta(days - 1))
+        queries = server.counts.get("one_way_fares", 0)
+
+    expected = {}
+    for (destination, day), price in timetable.items():
+        expected.setdefault(destination, {})[day] = price
+    correct = set(calendar) == set(expected) and all(
+        {day: flight.price if flight else None for day, flight in found.items()}
+        == {
+            start + timedelta(i): expected[destination].get(start + timedelta(i))
+            for i in range(days)
+        }
+        for destination, found in calendar.items()
+    )
+    return {"queries": queries, "correct": correct}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--destinations", default="1,3,10,40")
+    parser.add_argument(
+        "--density", default="0.05,0.15,0.5,1", help="Share of days with flights"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Random timetables per combination"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    # Querying each day, plus the first query for the whole range, which may rule out nothing
+    most_queries = args.days + 1
+    header = f"{'destinations':>12}{'density':>9}{'queries':>9}{'max':>6}{'per day':>9}"
+    print(header)
+    print("-" * len(header))
+    failures = []
+    for destinations in map(int, args.destinations.split(",")):
+        for density in map(float, args.density.split(",")):
+            results = [
+                run_calendar(args.days, destinations, density, seed)
+                for seed in range(args.runs)
+            ]
+            queries = [result["queries"] for result in results]
+            print(
+                f"{destinations:>12}{density:>9.2f}{statistics.mean(queries):>9.1f}{max(queries):>6}"
+                f"{max(queries) / args.days:>9.2f}"
+            )
+            label = f"{destinations} destination(s) at {density:.2f}"
+            if not all(result["correct"] for result in results):
+                failures.append(f"{label}: wrong calendar")
+            if max(queries) > most_queries:
+                failures.append(f"{label}: {max(queries)} queries for {args.days} days")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
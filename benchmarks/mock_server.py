@@ -0,0 +1,545 @@
+"""
+A local stand-in for the Ryanair APIs, for benchmarking without the network.
+
+Serves synthetic (or recorded) payloads for the oneWayFares, roundTripFares, availability, timtbl schedules,
+scheduled dates and locate endpoints, on the same paths as the real APIs, with optional latency, HTTP 500 errors
+and "Availability declined" responses injected at random.
+
+Point a client at it with `point_client_at`:
+
+    with MockRyanairServer(latency=0.05) as server:
+        api = Ryanair(proxy_pool=ProxyPool())
+        point_client_at(api, server.url)
+        api.get_cheapest_flights("DUB", date_from, date_to)
+
+Or run it standalone, e.g. for the async client or another process:
+
+    python -m benchmarks.mock_server --port 8000 --latency 0.05 --declined-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from ryanair.metrics import endpoint_name
+
+logger = logging.getLogger(__name__)
+
+REAL_HOSTS = ("https://www.ryanair.com", "https://services-api.ryanair.com")
+URL_ATTRIBUTES = (
+    "BASE_SERVICES_API_URL",
+    "BASE_AVAILABILITY_API_URL",
+    "BASE_SITE_FOR_SESSION_URL",
+    "RYANAIR_SCHEDULES_ENDPOINT",
+    "RYANAIR_SCHEDULED_DATES_FOR_ROUTE_ENDPOINT",
+    "RYANAIR_ACTIVE_AIRPORTS",
+    "RYANAIR_DESTINATION_AIRPORTS",
+)
+
+# Airports used in synthetic payloads. Availability results are looked up in airports.csv, so stick to real ones.
+DESTINATIONS = ("STN", "BGY", "BCN", "LGW", "GOA")
+DECLINED_RESPONSE = {"message": "Availability declined"}
+
+
+def point_client_at(client, base_url: str):
+    """
+    Redirect every endpoint of a `Ryanair` or `AsyncRyanair` instance to `base_url`, keeping the paths.
+    """
+    for attribute in URL_ATTRIBUTES:
+        url = getattr(client, attribute)
+        for host in REAL_HOSTS:
+            url = url.replace(host, base_url.rstrip("/"))
+        setattr(client, attribute, url)
+
+
+def _date_param(params: dict, key: str, default: date) -> date:
+    value = params.get(key)
+    return date.fromisoformat(value) if value else default
+
+
+def _fare(origin, destination, departure: datetime, flight_number: int, rng):
+    return {
+        "departureAirport": {
+            "iataCode": origin,
+            "name": origin,
+            "countryName": "Mockland",
+        },
+        "arrivalAirport": {
+            "iataCode": destination,
+            "name": destination,
+            "countryName": "Mockland",
+        },
+        "departureDate": departure.isoformat(),
+        "arrivalDate": (departure + timedelta(hours=2)).isoformat(),
+        "flightNumber": f"FR{flight_number}",
+        "price": {
+            "value": round(rng.uniform(9.99, 250), 2),
+            "valueMainUnit": "0",
+            "valueFractionalUnit": "0",
+            "currencyCode": "EUR",
+            "currencySymbol": "€",
+        },
+    }
+
+
+def one_way_fares(params: dict, flights: int, rng) -> dict:
+    origin = params.get("departureAirportIataCode", "DUB")
+    day = _date_param(params, "outboundDepartureDateFrom", date.today())
+    fares = []
+    for i in range(flights):
+        departure = datetime.combine(day, datetime.min.time()) + timedelta(
+            hours=6 + i % 16
+        )
+        destination = (
+            params.get("arrivalAirportIataCode") or DESTINATIONS[i % len(DESTINATIONS)]
+        )
+        fares.append({"outbound": _fare(origin, destination, departure, 1000 + i, rng)})
+    return {"arrivalAirportCategories": None, "fares": fares, "size": len(fares)}
+
+
+def random_timetable(
+    destinations: int, start: date, days: int, density: float, seed=None
+) -> dict:
+    """
+    A synthetic route network for `MockRyanairServer(timetable=...)`, as `{(destination, date): price}`, with flights
+    to each of `destinations` made up airports on a random `density` share of the days from `start`.
+    """
+    rng = random.Random(seed)
+    return {
+        (f"X{i:02d}", start + timedelta(days=day)): round(rng.uniform(9.99, 250), 2)
+        for i in range(destinations)
+        for day in range(days)
+        if rng.random() < density
+    }
+
+
+def timetable_one_way_fares(params: dict, timetable: dict) -> dict:
+    """
+    The cheapest fare in the queried date range to each destination in `timetable`, as the real API answers.
+    """
+    origin = params.get("departureAirportIataCode", "DUB")
+    first = _date_param(params, "outboundDepartureDateFrom", date.min)
+    last = _date_param(params, "outboundDepartureDateTo", date.max)
+    only = params.get("arrivalAirportIataCode")
+    cheapest = {}
+    for (destination, day), price in timetable.items():
+        if first <= day <= last and only in (None, destination):
+            if destination not in cheapest or price < cheapest[destination][1]:
+                cheapest[destination] = (day, price)
+
+    fares = []
+    for i, (destination, (day, price)) in enumerate(sorted(cheapest.items())):
+        departure = datetime.combine(day, datetime.min.time()) + timedelta(hours=10)
+        fare = _fare(origin, destination, departure, 1000 + i, random)
+        fare["price"]["value"] = price
+        fares.append({"outbound": fare})
+    return {"arrivalAirportCategories": None, "fares": fares, "size": len(fares)}
+
+
+def round_trip_fares(params: dict, flights: int, rng) -> dict:
+    origin = params.get("departureAirportIataCode", "DUB")
+    day_out = _date_param(params, "outboundDepartureDateFrom", date.today())
+    day_in = _date_param(params, "inboundDepartureDateFrom", day_out + timedelta(7))
+    fares = []
+    for i in range(flights):
+        destination = (
+            params.get("arrivalAirportIataCode") or DESTINATIONS[i % len(DESTINATIONS)]
+        )
+        hour = timedelta(hours=6 + i % 16)
+        outbound = _fare(
+            origin,
+            destination,
+            datetime.combine(day_out, datetime.min.time()) + hour,
+            1000 + i,
+            rng,
+        )
+        inbound = _fare(
+            destination,
+            origin,
+            datetime.combine(day_in, datetime.min.time()) + hour,
+            2000 + i,
+            rng,
+        )
+        fares.append(
+            {
+                "outbound": outbound,
+                "inbound": inbound,
+                "summary": {
+                    "price": {
+                        "value": outbound["price"]["value"] + inbound["price"]["value"]
+                    }
+                },
+            }
+        )
+    return {"arrivalAirportCategories": None, "fares": fares, "size": len(fares)}
+
+
+def availability(params: dict, flights: int, rng) -> dict:
+    """
+    `flights` flights per day, over the days covered by FlexDaysOut.
+    """
+    origin = params.get("Origin", "DUB")
+    destination = params.get("Destination", "STN")
+    day_out = _date_param(params, "DateOut", date.today())
+    days = int(params.get("FlexDaysOut", 6)) + 1
+
+    dates = []
+    for d in range(days):
+        day = day_out + timedelta(d)
+        day_flights = []
+        for i in range(flights):
+            departure = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=5 + i % 17, minutes=5 * (i // 17)
+            )
+            arrival = departure + timedelta(minutes=75)
+            times = [
+                f"{departure:%Y-%m-%dT%H:%M:%S}.000",
+                f"{arrival:%Y-%m-%dT%H:%M:%S}.000",
+            ]
+            times_utc = [f"{value}Z" for value in times]
+            flight_number = f"FR {100 + i}"
+            flight = {
+                "faresLeft": rng.choice((-1, 1, 4)),
+                "flightKey": f"FR~{100 + i}~ ~~{origin}~{times[0]}~{destination}~{times[1]}~~",
+                "infantsLeft": rng.choice((-1, 12)),
+                "operatedBy": "",
+                "segments": [
+                    {
+                        "segmentNr": 0,
+                        "origin": origin,
+                        "destination": destination,
+                        "flightNumber": flight_number,
+                        "time": times,
+                        "timeUTC": times_utc,
+                        "duration": "01:15",
+                    }
+                ],
+                "flightNumber": flight_number,
+                "time": times,
+                "timeUTC": times_utc,
+                "duration": "01:15",
+            }
+            # Some flights are sold out, and have no fare
+            if rng.random() < 0.9:
+                amount = round(rng.uniform(9.99, 250), 2)
+                flight["regularFare"] = {
+                    "fareKey": "MOCK",
+                    "fareClass": "A",
+                    "fares": [
+                        {
+                            "type": "ADT",
+                            "amount": amount,
+                            "count": 1,
+                            "hasDiscount": False,
+                            "publishedFare": amount,
+                            "discountInPercent": 0,
+                            "hasPromoDiscount": False,
+                            "discountAmount": 0.0,
+                            "hasBogof": False,
+                        }
+                    ],
+                }
+            day_flights.append(flight)
+        dates.append(
+            {"dateOut": f"{day:%Y-%m-%d}T00:00:00.000", "flights": day_flights}
+        )
+
+    return {
+        "termsOfUse": "https://www.ryanair.com/ie/en/corporate/terms-of-use",
+        "currency": "EUR",
+        "currPrecision": 2,
+        "routeGroup": "CITY",
+        "tripType": "REGULAR",
+        "upgradeType": "PLUS",
+        "trips": [
+            {
+                "origin": origin,
+                "originName": origin,
+                "destination": destination,
+                "destinationName": destination,
+                "routeGroup": "CITY",
+                "tripType": "REGULAR",
+                "upgradeType": "PLUS",
+                "dates": dates,
+            }
+        ],
+        "serverTimeUTC": f"{datetime.utcnow():%Y-%m-%dT%H:%M:%S}.000Z",
+    }
+
+
+def schedules(origin: str) -> dict:
+    return {
+        destination: {
+            "firstFlightDate": f"{date.today():%Y-%m-%d}",
+            "lastFlightDate": f"{date.today() + timedelta(180):%Y-%m-%d}",
+            "months": 6,
+            "monthsFromToday": 6,
+        }
+        for destination in DESTINATIONS
+        if destination != origin
+    }
+
+
+def scheduled_dates() -> list:
+    return [f"{date.today() + timedelta(d):%Y-%m-%d}" for d in range(0, 180, 2)]
+
+
+def active_airports() -> list:
+    return [
+        {
+            "code": code,
+            "name": code,
+            "seoName": code.lower(),
+            "aliases": [],
+            "base": code == "DUB",
+            "city": {"name": code, "code": code},
+            "region": {"name": "Mockland", "code": "MOCK"},
+            "country": {"code": "ie", "name": "Mockland", "currency": "EUR"},
+            "coordinates": {"latitude": 53.4, "longitude": -6.3},
+            "timeZone": "Europe/Dublin",
+        }
+        for code in ("DUB",) + DESTINATIONS
+    ]
+
+
+def destinations(origin: str) -> list:
+    return [
+        {"arrivalAirport": {"code": code, "name": code}, "connectingAirport": None}
+        for code in DESTINATIONS
+        if code != origin
+    ]
+
+
+class MockRyanairServer:
+    """
+    Threaded HTTP server imitating the Ryanair APIs, see the module docstring.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        declined_rate: float = 0.0,
+        flights: int = 20,
+        recorded_dir: Optional[str] = None,
+        seed: Optional[int] = None,
+        timetable: Optional[dict] = None,
+    ):
+        """
+        :param latency: Seconds added before every response.
+        :param latency_jitter: Up to this many more seconds added at random.
+        :param error_rate: Probability of answering a request with an HTTP 500.
+        :param declined_rate: Probability of answering an availability request with "Availability declined".
+        :param flights: Fares per fares response, and flights per day in availability responses.
+        :param recorded_dir: Directory of recorded responses to replay instead of synthetic ones, named after the
+            endpoint, e.g. "availability.json" or "one_way_fares.json" (see `ryanair.metrics.endpoint_name`).
+        :param seed: Seed for the fares, latency and injected failures, for repeatable runs.
+        :param timetable: `{(destination, date): price}`, e.g. from `random_timetable`, to answer oneWayFares
+            queries from consistently, rather than with made up fares on the first day queried.
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.declined_rate = declined_rate
+        self.flights = flights
+        self.timetable = timetable
+        self.recorded = self._load_recorded(recorded_dir) if recorded_dir else {}
+        self.counts = {}
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        # Encoded synthetic responses by (endpoint, query), so serving them costs the benchmark as little as possible
+        self._responses = {}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _load_recorded(recorded_dir: str) -> dict:
+        recorded = {}
+        for filename in os.listdir(recorded_dir):
+            name, extension = os.path.splitext(filename)
+            if extension == ".json":
+                with open(os.path.join(recorded_dir, filename), "rb") as f:
+                    recorded[name] = f.read()
+        return recorded
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockRyanairServer":
+        """
+        Serve from a background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-ryanair", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Serve from this thread, until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _synthetic_response(self, endpoint: str, path: str, params: dict) -> bytes:
+        key = (endpoint, path, tuple(sorted(params.items())))
+        body = self._responses.get(key)
+        if body is not None:
+            return body
+
+        with self._rng_lock:
+            rng = random.Random(self._rng.random())
+        code = re.search(r"/(?:schedules|airport)/(\w+)", path)
+        origin = code.group(1) if code else "DUB"
+        if endpoint == "one_way_fares" and self.timetable is not None:
+            payload = timetable_one_way_fares(params, self.timetable)
+        elif endpoint == "one_way_fares":
+            payload = one_way_fares(params, self.flights, rng)
+        elif endpoint == "round_trip_fares":
+            payload = round_trip_fares(params, self.flights, rng)
+        elif endpoint == "availability":
+            payload = availability(params, self.flights, rng)
+        elif endpoint == "schedules":
+            payload = schedules(origin)
+        elif endpoint == "scheduled_dates":
+            payload = scheduled_dates()
+        elif endpoint == "destinations":
+            payload = destinations(origin)
+        elif endpoint == "airports":
+            payload = active_airports()
+        else:
+            return None
+
+        body = self._responses[key] = json.dumps(payload).encode("utf-8")
+        return body
+
+    def respond(self, path: str, params: dict) -> tuple:
+        """
+        :return: (status code, body, content type) for a request.
+        """
+        endpoint = endpoint_name(path)
+        with self._rng_lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+        delay = self.latency + self.latency_jitter * self._random()
+        if delay:
+            time.sleep(delay)
+
+        if endpoint == "session":
+            return 200, b"<html></html>", "text/html"
+        if self.error_rate and self._random() < self.error_rate:
+            return 500, b"Internal Server Error", "text/plain"
+        if (
+            endpoint == "availability"
+            and self.declined_rate
+            and self._random() < self.declined_rate
+        ):
+            return (
+                200,
+                json.dumps(DECLINED_RESPONSE).encode("utf-8"),
+                "application/json",
+            )
+
+        body = self.recorded.get(endpoint)
+        if body is None:
+            body = self._synthetic_response(endpoint, path, params)
+        if body is None:
+            return 404, b"Not Found", "text/plain"
+        return 200, body, "application/json"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as the real API supports it and clients pool connections
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle's algorithm would hold the body back ~40ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = re.sub("/+", "/", parsed.path)
+                params = {
+                    key: values[-1] for key, values in parse_qs(parsed.query).items()
+                }
+                status, body, content_type = server.respond(path, params)
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 200 and content_type == "text/html":
+                    self.send_header("Set-Cookie", "rid=mock; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--declined-rate", type=float, default=0.0)
+    parser.add_argument("--flights", type=int, default=20)
+    parser.add_argument("--recorded-dir")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = MockRyanairServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        declined_rate=args.declined_rate,
+        flights=args.flights,
+        recorded_dir=args.recorded_dir,
+        seed=args.seed,
+    )
+    # Parent processes (see benchmarks.run) read the URL from the first line
+    print(server.url, flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Throughput and parse-cost benchmarks for `Ryanair`, against the local mock API in `benchmarks.mock_server`.
+
+For each endpoint and concurrency level, a `Ryanair` client shared by N worker threads makes a fixed number of
+queries, and the run reports requests/s, p50/p99 query latency (including retries and parsing), and the time
+spent decoding and parsing per flight returned. The mock server runs in a separate process, so it doesn't
+compete with the client for the GIL.
+
+    python -m benchmarks.run --concurrency 1,4,16 --requests 200 --latency 0.02
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.25  # Exits 1 on a regression
+"""
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.mock_server import MockRyanairServer, point_client_at
+from ryanair import Ryanair
+from ryanair.metrics import RequestMetrics
+from ryanair.proxy import ProxyPool
+
+logger = logging.getLogger(__name__)
+
+ORIGIN = "DUB"
+DESTINATION = "STN"
+
+
+# Every query in a run is different, so none are coalesced with a concurrent identical one: the fares and
+# availability queries are for the day `i` days after the first, the others from a made up origin numbered `i`.
+def _origin(i):
+    return f"M{i:03d}"
+
+
+def _query_one_way_fares(api, day, i):
+    day += timedelta(i)
+    return api.get_cheapest_flights(ORIGIN, day, day)
+
+
+def _query_round_trip_fares(api, day, i):
+    day += timedelta(i)
+    return api.get_cheapest_return_flights(
+        ORIGIN, day, day, day + timedelta(7), day + timedelta(7)
+    )
+
+
+def _query_availability(api, day, i):
+    return api.get_all_flights(ORIGIN, day + timedelta(i), DESTINATION)
+
+
+def _query_availability_batch(api, day, i):
+    return api.get_all_flights_batch(ORIGIN, day + timedelta(i), DESTINATION)
+
+
+def _query_schedules(api, day, i):
+    return api.get_flight_schedules(_origin(i))
+
+
+def _query_destinations(api, day, i):
+    return api.get_destinations(_origin(i))
+
+
+# Benchmark name -> (query, endpoint name it reports metrics under, whether it returns flights)
+BENCHMARKS = {
+    "one_way_fares": (_query_one_way_fares, "one_way_fares", True),
+    "round_trip_fares": (_query_round_trip_fares, "round_trip_fares", True),
+    "availability": (_query_availability, "availability", True),
+    "availability_batch": (_query_availability_batch, "availability", True),
+    "schedules": (_query_schedules, "schedules", False),
+    "destinations": (_query_destinations, "destinations", False),
+}
+
+
+def _percentile(values: list, q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[round(q * 100) - 1]
+
+
+def run_benchmark(name: str, base_url: str, concurrency: int, requests: int) -> dict:
+    query, endpoint, returns_flights = BENCHMARKS[name]
+    metrics = RequestMetrics()
+    # An empty pool, so failures are retried directly rather than by fetching a real proxy
+    api = Ryanair(metrics=metrics, proxy_pool=ProxyPool())
+    point_client_at(api, base_url)
+    day = date.today() + timedelta(30)
+
+    # Warm up: session cookie, connection, lazily loaded airports
+    query(api, day, requests)
+    metrics.reset()
+
+    def timed_query(i):
+        started = time.perf_counter()
+        results = query(api, day, i)
+        return time.perf_counter() - started, len(results) if returns_flights else 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timings = list(executor.map(timed_query, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in timings)
+    flights = sum(count for _, count in timings)
+    summary = metrics.summary().get(endpoint, {})
+    parse_seconds = summary.get("decode_seconds", 0.0) + summary.get(
+        "parse_seconds", 0.0
+    )
+    return {
+        "benchmark": name,
+        "concurrency": concurrency,
+        "queries": requests,
+        "http_requests": summary.get("requests", 0),
+        "retries": sum(metrics.retries.values()),
+        "declined": sum(metrics.declined.values()),
+        "seconds": elapsed,
+        "queries_per_second": requests / elapsed,
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "flights": flights,
+        "parse_us_per_flight": parse_seconds / flights * 1e6 if flights else None,
+    }
+
+
+def _start_server_process(args) -> tuple:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.mock_server",
+        "--port",
+        "0",
+        "--latency",
+        str(args.latency),
+        "--latency-jitter",
+        str(args.latency_jitter),
+        "--error-rate",
+        str(args.error_rate),
+        "--declined-rate",
+        str(args.declined_rate),
+        "--flights",
+        str(args.flights),
+        "--seed",
+        str(args.seed),
+    ]
+    if args.recorded_dir:
+        command += ["--recorded-dir", args.recorded_dir]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    :return: Descriptions of every result that is more than `tolerance` (a fraction) worse than its baseline.
+    """
+    baseline = {(r["benchmark"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["benchmark"], result["concurrency"]))
+        if before is None:
+            continue
+        label = f"{result['benchmark']} x{result['concurrency']}"
+        if result["queries_per_second"] < before["queries_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{label}: {result['queries_per_second']:.1f} queries/s, was {before['queries_per_second']:.1f}"
+            )
+        if (
+            result["parse_us_per_flight"] is not None
+            and before.get("parse_us_per_flight") is not None
+            and result["parse_us_per_flight"]
+            > before["parse_us_per_flight"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{label}: {result['parse_us_per_flight']:.1f} us/flight parsing, was {before['parse_us_per_flight']:.1f}"
+            )
+    return regressions
+
+
+def _print_table(results: list):
+    header = f"{'benchmark':<20}{'conc':>5}{'queries/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'retries':>9}{'flights':>9}{'us/flight':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        per_flight = (
+            f"{r['parse_us_per_flight']:.1f}"
+            if r["parse_us_per_flight"] is not None
+            else "-"
+        )
+        print(
+            f"{r['benchmark']:<20}{r['concurrency']:>5}{r['queries_per_second']:>11.1f}{r['p50_ms']:>9.1f}"
+            f"{r['p99_ms']:>9.1f}{r['retries']:>9}{r['flights']:>9}{per_flight:>11}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--benchmarks",
+        default=",".join(BENCHMARKS),
+        help="Comma separated, from: " + ", ".join(BENCHMARKS),
+    )
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Queries per benchmark"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock server latency, seconds"
+    )
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--declined-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--flights",
+        type=int,
+        default=20,
+        help="Fares per fares response, flights per day in availability responses",
+    )
+    parser.add_argument(
+        "--recorded-dir", help="Replay recorded responses, see benchmarks.mock_server"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run the mock server in this process rather than a subprocess",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results from --output")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against --baseline, as a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.in_process:
+        server = MockRyanairServer(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            declined_rate=args.declined_rate,
+            flights=args.flights,
+            recorded_dir=args.recorded_dir,
+            seed=args.seed,
+        ).start()
+        base_url, stop = server.url, server.stop
+    else:
+        process, base_url = _start_server_process(args)
+        stop = process.terminate
+
+    try:
+        results = [
+            run_benchmark(name, base_url, int(concurrency), args.requests)
+            for name in args.benchmarks.split(",")
+            for concurrency in args.concurrency.split(",")
+        ]
+    finally:
+        stop()
+
+    _print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,10 @@
 from ryanair.ryanair import Ryanair
+
+
+def __getattr__(name):
+    # Only import aiohttp for users of the async client
+    if name == "AsyncRyanair":
+        from ryanair.async_ryanair import AsyncRyanair
+
+        return AsyncRyanair
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
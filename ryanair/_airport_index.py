@@ -0,0 +1,80 @@
+"""
+Reading airports.csv, and precompiling it into the pickled column index shipped alongside it.
+
+This module imports nothing from the rest of the package, so that setup.py can load it to build the index without the
+package's dependencies installed.
+"""
+import csv
+import hashlib
+import os
+import pickle
+
+AIRPORTS_CSV_PATH = os.path.join(os.path.dirname(__file__), "airports.csv")
+# Column-oriented, pickled copy of airports.csv, built by `build_airport_index` when the package is built.
+AIRPORTS_INDEX_PATH = os.path.join(os.path.dirname(__file__), "airports.pickle")
+_INDEX_FORMAT_VERSION = 2
+
+
+def _csv_digest(path=AIRPORTS_CSV_PATH) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_csv_columns(path=AIRPORTS_CSV_PATH):
+    columns = {
+        key: []
+        for key in (
+            "iata_code",
+            "name",
+            "lat",
+            "lng",
+            "municipality",
+            "iso_region",
+            "iso_country",
+        )
+    }
+    with open(path, newline="", encoding="utf8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            columns["iata_code"].append(row["iata_code"])
+            columns["name"].append(row["name"])
+            columns["lat"].append(float(row["latitude_deg"]))
+            columns["lng"].append(float(row["longitude_deg"]))
+            columns["municipality"].append(row["municipality"])
+            columns["iso_region"].append(row["iso_region"])
+            columns["iso_country"].append(row["iso_country"])
+    return columns
+
+
+def _read_index_columns(path=AIRPORTS_INDEX_PATH, csv_path=AIRPORTS_CSV_PATH):
+    """
+    Load the precompiled columns, if they exist and were built from the CSV as it is now.
+    """
+    try:
+        with open(path, "rb") as f:
+            version, digest, columns = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, ValueError, TypeError, EOFError):
+        return None
+    if version != _INDEX_FORMAT_VERSION:
+        return None
+    # Compare contents rather than modification times, which copies, sdist extracts and checkouts don't keep
+    try:
+        if digest != _csv_digest(csv_path):
+            return None
+    except FileNotFoundError:
+        pass
+    return columns
+
+
+def build_airport_index(csv_path=AIRPORTS_CSV_PATH, index_path=AIRPORTS_INDEX_PATH):
+    """
+    Precompile airports.csv into the compact pickled form loaded by `airport_utils`.
+    Run by setup.py when building the package, or via `python -m ryanair.airport_utils`.
+    """
+    columns = _read_csv_columns(csv_path)
+    with open(index_path, "wb") as f:
+        pickle.dump(
+            (_INDEX_FORMAT_VERSION, _csv_digest(csv_path), columns),
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
@@ -1,41 +1,191 @@
-import os
+import sys
+import threading
+from bisect import bisect_left
 from collections import namedtuple
 from math import radians, sin, cos, asin, sqrt
 
-import csv
-
+from ryanair._airport_index import (
+    AIRPORTS_CSV_PATH,
+    AIRPORTS_INDEX_PATH,
+    _read_csv_columns,
+    _read_index_columns,
+    build_airport_index,
+)
 from ryanair.types import Flight
 
+# numpy and scipy take longer to import than the rest of the package, so are only imported by the first geo query
+np = None
+
 Airport = namedtuple("Airport", ("IATA_code", "name", "lat", "lng", "location", "municipality", "iso_region", "iso_country"))
 
-AIRPORTS = {}
-with open(
-    os.path.join(os.path.dirname(__file__), "airports.csv"), newline="", encoding="utf8"
-) as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        iata_code = row["iata_code"]
-        name = row["name"]
-        location = ",".join((row["iso_region"], row["iso_country"]))
-        municipality = row["municipality"]
-        lat = float(row["latitude_deg"])
-        lng = float(row["longitude_deg"])
-        iso_region = row["iso_region"]
-        iso_country = row["iso_country"]
-
-        AIRPORTS[iata_code] = Airport(
-            IATA_code=iata_code, name=name, lat=lat, lng=lng, location=location, municipality=municipality, iso_region=iso_region, iso_country=iso_country
-        )
+
+class _AirportIndex:
+    """
+    All airports by IATA code, plus secondary indexes by country, by region, and by name prefix.
+    """
+
+    def __init__(self, columns):
+        self.airports = {
+            iata_code: Airport(
+                IATA_code=iata_code, name=name, lat=lat, lng=lng, location=",".join((iso_region, iso_country)),
+                municipality=municipality, iso_region=iso_region, iso_country=iso_country
+            )
+            for iata_code, name, lat, lng, municipality, iso_region, iso_country in zip(
+                columns["iata_code"], columns["name"], columns["lat"], columns["lng"],
+                columns["municipality"], columns["iso_region"], columns["iso_country"],
+            )
+        }
+
+        self.by_country = {}
+        self.by_region = {}
+        for airport in self.airports.values():
+            self.by_country.setdefault(airport.iso_country, []).append(airport.IATA_code)
+            self.by_region.setdefault(airport.iso_region, []).append(airport.IATA_code)
+
+        # Sorted (casefolded name, IATA code) pairs, so name prefix lookups are a binary search
+        self.names = sorted((airport.name.casefold(), airport.IATA_code) for airport in self.airports.values())
+
+        # IATA code -> interned "Name, Municipality" label, filled in on first use
+        self.labels = {}
+
+        self.codes = list(self.airports)
+        self.positions = {iata_code: i for i, iata_code in enumerate(self.codes)}
+        self._radians = None
+        self._unit_vectors = None
+        self._tree = None
+
+    def radians(self):
+        """
+        (lat, lng) of every airport in radians, as two arrays in `codes` order
+        """
+        if self._radians is None:
+            coordinates = np.radians(np.array([(a.lat, a.lng) for a in self.airports.values()], dtype=np.float64))
+            self._radians = coordinates[:, 0], coordinates[:, 1]
+        return self._radians
+
+    def unit_vectors(self):
+        """
+        Airport positions as points on the unit sphere, shape (n, 3), in `codes` order
+        """
+        if self._unit_vectors is None:
+            lat, lng = self.radians()
+            self._unit_vectors = np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+        return self._unit_vectors
+
+    def tree(self):
+        """
+        KD-tree over `unit_vectors`, if scipy is available
+        """
+        if self._tree is None:
+            try:
+                from scipy.spatial import cKDTree
+            except ImportError:  # pragma: no cover - optional dependency
+                return None
+            self._tree = cKDTree(self.unit_vectors())
+        return self._tree
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _get_index():
+    # Built on first use rather than at import time, so `import ryanair` stays cheap
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                columns = _read_index_columns()
+                if columns is None:
+                    columns = _read_csv_columns()
+                _index = _AirportIndex(columns)
+    return _index
+
+
+def __getattr__(name):
+    # Keep `airport_utils.AIRPORTS` available, without loading it until it's accessed
+    if name == "AIRPORTS":
+        return _get_index().airports
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_airport_by_iata(iata_code):
-    return f"{AIRPORTS[iata_code].name}, {AIRPORTS[iata_code].municipality}"
+    """
+    "Name, Municipality" of an airport. The same string object is returned for every call with the same code.
+    """
+    labels = _get_index().labels
+    label = labels.get(iata_code)
+    if label is None:
+        airport = _get_index().airports[iata_code]
+        label = labels[iata_code] = sys.intern(f"{airport.name}, {airport.municipality}")
+    return label
 
 
 def validate_airport(iata_code)->bool:
     """
     Check if the airport is valid, ie. a valid IATA code
     """
-    return iata_code in AIRPORTS
+    return iata_code in _get_index().airports
+
+
+def get_airports_by_country(iso_country) -> list:
+    """
+    IATA codes of all airports in a country, e.g. "IE"
+    """
+    return list(_get_index().by_country.get(iso_country, ()))
+
+
+def get_airports_by_region(iso_region) -> list:
+    """
+    IATA codes of all airports in an ISO region, e.g. "GB-ENG"
+    """
+    return list(_get_index().by_region.get(iso_region, ()))
+
+
+def find_airports_by_name(prefix) -> list:
+    """
+    IATA codes of all airports whose name starts with `prefix` (case-insensitive), in name order
+    """
+    names = _get_index().names
+    prefix = prefix.casefold()
+    matches = []
+    for i in range(bisect_left(names, (prefix,)), len(names)):
+        name, iata_code = names[i]
+        if not name.startswith(prefix):
+            break
+        matches.append(iata_code)
+    return matches
+
+
+# IANA time zones of the countries Ryanair flies to, and of the regions of them on a different clock
+_TIMEZONES_BY_COUNTRY = {
+    "AL": "Europe/Tirane", "AT": "Europe/Vienna", "BA": "Europe/Sarajevo", "BE": "Europe/Brussels",
+    "BG": "Europe/Sofia", "CH": "Europe/Zurich", "CY": "Asia/Nicosia", "CZ": "Europe/Prague",
+    "DE": "Europe/Berlin", "DK": "Europe/Copenhagen", "EE": "Europe/Tallinn", "EG": "Africa/Cairo",
+    "ES": "Europe/Madrid", "FI": "Europe/Helsinki", "FR": "Europe/Paris", "GB": "Europe/London",
+    "GI": "Europe/Gibraltar", "GR": "Europe/Athens", "HR": "Europe/Zagreb", "HU": "Europe/Budapest",
+    "IE": "Europe/Dublin", "IL": "Asia/Jerusalem", "IT": "Europe/Rome", "JO": "Asia/Amman",
+    "LT": "Europe/Vilnius", "LU": "Europe/Luxembourg", "LV": "Europe/Riga", "MA": "Africa/Casablanca",
+    "ME": "Europe/Podgorica", "MK": "Europe/Skopje", "MT": "Europe/Malta", "NL": "Europe/Amsterdam",
+    "NO": "Europe/Oslo", "PL": "Europe/Warsaw", "PT": "Europe/Lisbon", "RO": "Europe/Bucharest",
+    "RS": "Europe/Belgrade", "SE": "Europe/Stockholm", "SI": "Europe/Ljubljana", "SK": "Europe/Bratislava",
+    "TR": "Europe/Istanbul",
+}
+_TIMEZONES_BY_REGION = {
+    "ES-CN": "Atlantic/Canary",
+    "PT-20": "Atlantic/Azores",
+    "PT-30": "Atlantic/Madeira",
+}
+
+
+def get_airport_timezone(iata_code):
+    """
+    IANA time zone name of an airport, e.g. "Europe/Dublin", or None if it isn't known
+    """
+    airport = _get_index().airports.get(iata_code)
+    if airport is None:
+        return None
+    return _TIMEZONES_BY_REGION.get(airport.iso_region) or _TIMEZONES_BY_COUNTRY.get(airport.iso_country)
 
 
 
@@ -61,5 +211,85 @@ def get_flight_distance(flight: Flight):
 
 
 def get_distance_between_airports(iata_a, iata_b):
-    a, b = AIRPORTS[iata_a], AIRPORTS[iata_b]
+    airports = _get_index().airports
+    a, b = airports[iata_a], airports[iata_b]
     return _haversine(a.lat, a.lng, b.lat, b.lng)
+
+
+EARTH_RADIUS_KM = 6371
+
+
+def _require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            raise ImportError("This function requires numpy, install it with `pip install ryanair-py[geo]`") from None
+        np = numpy
+
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    """
+    Vectorised `_haversine`, on arrays of coordinates already in radians. Inputs are broadcast against each other.
+    """
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def get_distance_matrix(iata_codes_a=None, iata_codes_b=None):
+    """
+    Great-circle distances in kilometers between two sets of airports, computed in one vectorised pass.
+
+    :param iata_codes_a: Row airports. Defaults to every airport, in `AIRPORTS` order.
+    :param iata_codes_b: Column airports. Defaults to `iata_codes_a`.
+    :return: A numpy array of shape (len(iata_codes_a), len(iata_codes_b)).
+
+    NB: A full matrix over every airport is large (8 bytes per pair), prefer passing the airports of interest.
+    """
+    _require_numpy()
+    index = _get_index()
+    lat, lng = index.radians()
+
+    rows = slice(None) if iata_codes_a is None else [index.positions[code] for code in iata_codes_a]
+    if iata_codes_b is None:
+        columns = rows
+    else:
+        columns = [index.positions[code] for code in iata_codes_b]
+
+    return _haversine_np(lat[rows][:, None], lng[rows][:, None], lat[columns][None, :], lng[columns][None, :])
+
+
+def airports_within(iata_code, km) -> list:
+    """
+    All other airports within `km` kilometers of an airport, nearest first.
+
+    Uses a KD-tree over unit-sphere coordinates when scipy is installed, otherwise a vectorised scan of every airport.
+
+    :return: A list of (IATA code, distance in km) tuples.
+    """
+    _require_numpy()
+    index = _get_index()
+    lat, lng = index.radians()
+    origin = index.positions[iata_code]
+
+    tree = index.tree()
+    if tree is not None:
+        # A great-circle distance d corresponds to a straight-line (chord) distance of 2 sin(d / 2R) on the unit sphere
+        chord = 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+        candidates = np.array(tree.query_ball_point(index.unit_vectors()[origin], r=chord + 1e-12), dtype=np.intp)
+    else:
+        candidates = np.arange(len(index.codes))
+
+    distances = _haversine_np(lat[origin], lng[origin], lat[candidates], lng[candidates])
+    keep = (distances <= km) & (candidates != origin)
+    candidates, distances = candidates[keep], distances[keep]
+
+    return [(index.codes[i], float(d)) for i, d in sorted(zip(candidates, distances), key=lambda pair: pair[1])]
+
+
+if __name__ == "__main__":
+    build_airport_index()
+    print(f"Wrote {AIRPORTS_INDEX_PATH}")
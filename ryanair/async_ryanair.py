@@ -0,0 +1,572 @@
+"""
+An asyncio flavour of the `Ryanair` client.
+
+`AsyncRyanair` exposes the same query methods as `ryanair.ryanair.Ryanair`, as coroutines, on top of a single
+pooled aiohttp session. A semaphore bounds the number of requests in flight at once, so many queries can be
+gathered concurrently without opening a connection per query. Responses are parsed by the same functions as the
+synchronous client, so both return identical `Flight`, `FlightV2` and `Trip` objects.
+
+Requires the optional `aiohttp` dependency (`pip install ryanair-py[async]`).
+"""
+import asyncio
+import logging
+from datetime import datetime, date, time
+from functools import partial
+from time import perf_counter
+from typing import Union, Optional, Iterable, AsyncIterator
+
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from ryanair import decoding
+from ryanair.cache import BaseCache
+from ryanair.flight_batch import FlightBatch
+from ryanair.metrics import MetricsHook
+from ryanair.proxy import ProxyPool
+from ryanair.rate_limit import RateLimiter
+from ryanair.exceptions import RyanairException, AvailabilityException, TransientError
+from ryanair.retry import RetryPolicy
+from ryanair.ryanair import _RyanairBase
+from ryanair.single_flight import AsyncSingleFlight
+from ryanair.types import SearchQuery, SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyBroadException
+class AsyncRyanair(_RyanairBase):
+    def __init__(
+        self,
+        currency: Optional[str] = None,
+        max_concurrency: int = 10,
+        pool_size: int = 100,
+        session: Optional["aiohttp.ClientSession"] = None,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[dict] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[MetricsHook] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        raise_errors: bool = False,
+    ):
+        """
+        :param currency: Preferred currency for fares, as for `Ryanair`.
+        :param max_concurrency: Maximum number of requests in flight at any one time.
+        :param pool_size: Maximum number of pooled connections held open by the session.
+        :param session: An existing `aiohttp.ClientSession` to share. It is not closed by `close()`.
+        :param cache: Optional response cache, see `ryanair.cache`.
+        :param cache_ttls: Overrides for `ryanair.cache.DEFAULT_TTLS`, in seconds per endpoint family.
+        :param rate_limiter: Optional `ryanair.rate_limit.RateLimiter`, which may be shared with other clients.
+        :param metrics: Optional `ryanair.metrics.MetricsHook` to report requests, retries, parse times etc. to.
+        :param proxy_pool: Optional `ryanair.proxy.ProxyPool` to spread requests across. Unlike `Ryanair`, requests
+            are made directly by default. aiohttp only supports plain HTTP proxies.
+        :param retry_policy: Optional `ryanair.retry.RetryPolicy`, as for `Ryanair`.
+        :param raise_errors: Raise failed queries' errors rather than returning no results, as for `Ryanair`.
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncRyanair requires aiohttp, install it with `pip install ryanair-py[async]`"
+            )
+
+        super().__init__(
+            currency,
+            cache,
+            cache_ttls,
+            rate_limiter,
+            metrics,
+            proxy_pool,
+            retry_policy,
+            raise_errors,
+        )
+
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.session = session
+        self._owns_session = session is None
+        self._semaphore = None
+        self._has_session_cookie = False
+        self._session_cookie_lock = None
+        # Queries in flight, shared with tasks making the same query meanwhile
+        self._in_flight = AsyncSingleFlight()
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def get_active_airports(self) -> list:
+        """
+        Async version of `Ryanair.get_active_airports`.
+
+        :return: A list of active airports.
+        """
+        return await self._query_list("airports", self.RYANAIR_ACTIVE_AIRPORTS)
+
+    async def get_destinations(self, from_code: str) -> list:
+        """
+        Async version of `Ryanair.get_destinations`.
+
+        :param from_code: The airport code to get the destinations for.
+        :return: A list of destinations for the given airport code.
+        """
+        return await self._query_list(
+            "destinations",
+            self.RYANAIR_DESTINATION_AIRPORTS.format(fromCode=from_code),
+        )
+
+    async def get_flight_schedules(self, from_code: str):
+        """
+        Async version of `Ryanair.get_flight_schedules`.
+
+        :param from_code: The airport code to get the flight schedules for.
+        :return: A list of flight schedules for the given airport code.
+        """
+        return await self._query_list(
+            "schedules",
+            self.RYANAIR_SCHEDULES_ENDPOINT.format(fromCode=from_code),
+        )
+
+    async def get_scheduled_dates_for_route(self, from_code: str, to_code: str):
+        """
+        Async version of `Ryanair.get_scheduled_dates_for_route`.
+
+        :param from_code: The airport code to get the available flights from.
+        :param to_code: The airport code to get the available flights to.
+        :return: A list of available flights for the given airport codes.
+        """
+        return await self._query_list(
+            "scheduled_dates",
+            self.RYANAIR_SCHEDULED_DATES_FOR_ROUTE_ENDPOINT.format(
+                fromCode=from_code, toCode=to_code
+            ),
+        )
+
+    async def get_cheapest_flights(
+        self,
+        airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        departure_time_from: Union[str, time] = "00:00",
+        departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ):
+        query_url = "".join((self.BASE_SERVICES_API_URL, "oneWayFares"))
+
+        params = self._cheapest_flights_params(
+            airport,
+            date_from,
+            date_to,
+            destination_country,
+            custom_params,
+            departure_time_from,
+            departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            return await self._fetch_cheapest_flights(params)
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+    async def _fetch_cheapest_flights(self, params: dict) -> list:
+        query_url = "".join((self.BASE_SERVICES_API_URL, "oneWayFares"))
+        response = (
+            await self._cached_query(
+                "fares",
+                query_url,
+                params,
+                self._typed_decoder("fares", decoding.decode_one_way_fares),
+            )
+        )["fares"]
+
+        if response:
+            with self._measure_parse(query_url):
+                return [
+                    self._parse_cheapest_flight(flight["outbound"])
+                    for flight in response
+                ]
+
+        return []
+
+    async def get_cheapest_return_flights(
+        self,
+        source_airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        return_date_from: Union[datetime, date, str],
+        return_date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        outbound_departure_time_from: Union[str, time] = "00:00",
+        outbound_departure_time_to: Union[str, time] = "23:59",
+        inbound_departure_time_from: Union[str, time] = "00:00",
+        inbound_departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ):
+        query_url = "".join((self.BASE_SERVICES_API_URL, "roundTripFares"))
+
+        params = self._cheapest_return_flights_params(
+            source_airport,
+            date_from,
+            date_to,
+            return_date_from,
+            return_date_to,
+            destination_country,
+            custom_params,
+            outbound_departure_time_from,
+            outbound_departure_time_to,
+            inbound_departure_time_from,
+            inbound_departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            response = (
+                await self._cached_query(
+                    "fares",
+                    query_url,
+                    params,
+                    self._typed_decoder("fares", decoding.decode_round_trip_fares),
+                )
+            )["fares"]
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        if response:
+            with self._measure_parse(query_url):
+                return [
+                    self._parse_cheapest_return_flights_as_trip(
+                        trip["outbound"], trip["inbound"]
+                    )
+                    for trip in response
+                ]
+        else:
+            return []
+
+    async def get_all_flights(
+        self,
+        origin_airport: str,
+        date_out: Union[datetime, date, str],
+        destination: str,
+        custom_params: Optional[dict] = None,
+    ):
+        """
+        Async version of `Ryanair.get_all_flights`, returning all flights for a single week.
+        """
+        return await self._get_all_flights(
+            origin_airport,
+            date_out,
+            destination,
+            custom_params,
+            self._parse_all_flights_availability_result_as_flight_v2,
+            list,
+        )
+
+    async def get_all_flights_range(
+        self,
+        origin_airport: str,
+        destination: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        custom_params: Optional[dict] = None,
+    ) -> list:
+        """
+        Async version of `Ryanair.get_all_flights_range`. Windows are fetched concurrently, up to `max_concurrency`.
+        """
+        flight_lists = await asyncio.gather(
+            *(
+                self.get_all_flights(
+                    origin_airport,
+                    date_out,
+                    destination,
+                    {**(custom_params or {}), "FlexDaysOut": flex_days_out},
+                )
+                for date_out, flex_days_out in self._availability_windows(start, end)
+            )
+        )
+        return self._merge_flight_windows(flight_lists, start, end)
+
+    async def fare_calendar(
+        self,
+        origin: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+    ) -> dict:
+        """
+        Async version of `Ryanair.fare_calendar`. Ranges are fetched concurrently, up to `max_concurrency`.
+        """
+        start, end = self._parse_date(start), self._parse_date(end)
+        calendar = {}
+        windows = [(start, end, None, False)] if start <= end else []
+        days = (end - start).days + 1
+        queries = 0
+
+        while windows:
+            queries += len(windows)
+            results = await asyncio.gather(
+                *(
+                    self._query_calendar_window(
+                        origin, destination_country, custom_params, window
+                    )
+                    for window in windows
+                )
+            )
+            windows = self._next_calendar_windows(
+                windows, results, calendar, days - queries
+            )
+
+        logger.info(
+            f"Fare calendar for {origin} from {start} to {end} took {queries} queries"
+        )
+        return self._finish_calendar(calendar)
+
+    async def _query_calendar_window(
+        self, origin: str, destination_country, custom_params, window: tuple
+    ):
+        try:
+            return await self._fetch_cheapest_flights(
+                self._calendar_window_params(
+                    origin, window, destination_country, custom_params
+                )
+            )
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to fetch fares from {origin} between {window[0]} and {window[1]}"
+            )
+            return None
+
+    async def get_all_flights_batch(
+        self,
+        origin_airport: str,
+        date_out: Union[datetime, date, str],
+        destination: str,
+        custom_params: Optional[dict] = None,
+    ) -> FlightBatch:
+        """
+        Async version of `Ryanair.get_all_flights_batch`.
+        """
+        return await self._get_all_flights(
+            origin_airport,
+            date_out,
+            destination,
+            custom_params,
+            FlightBatch.from_availability_response,
+            FlightBatch,
+        )
+
+    async def _get_all_flights(
+        self, origin_airport, date_out, destination, custom_params, parse, empty
+    ):
+        query_url = "".join((self.BASE_AVAILABILITY_API_URL, "availability"))
+
+        params = self._all_flights_params(
+            origin_airport, date_out, destination, custom_params
+        )
+
+        try:
+            await self._ensure_session_cookie()
+
+            response = await self._shared_query(query_url, params)
+
+            if self.check_if_availability_response_is_declined(response):
+                logger.warning(
+                    "Availability API declined to respond, attempting again with a new session cookie"
+                )
+                await self._update_session_cookie()
+                response = await self._shared_query(query_url, params)
+                if self.check_if_availability_response_is_declined(response):
+                    raise AvailabilityException
+
+            with self._measure_parse(query_url):
+                return parse(response)
+
+        except RyanairException:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to parse response when querying {query_url} with parameters {params}"
+            )
+            return empty()
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to parse response when querying {query_url} with parameters {params}"
+            )
+            return empty()
+
+    async def search_many(
+        self,
+        origins: Iterable[str],
+        date_ranges: Iterable[tuple],
+        **kwargs,
+    ) -> AsyncIterator[SearchResult]:
+        """
+        Async version of `Ryanair.search_many`. Concurrency is bounded by this client's `max_concurrency`.
+
+        :return: An async iterator of `SearchResult(query, results)` tuples, in completion order.
+        """
+        queries = self._expand_search_queries(origins, date_ranges)
+
+        tasks = [
+            asyncio.ensure_future(self._run_search_query(query, kwargs))
+            for query in queries
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_search_query(self, query: SearchQuery, kwargs: dict) -> SearchResult:
+        if query.return_date_from is None:
+            results = await self.get_cheapest_flights(
+                query.origin, query.date_from, query.date_to, **kwargs
+            )
+        else:
+            results = await self.get_cheapest_return_flights(
+                query.origin,
+                query.date_from,
+                query.date_to,
+                query.return_date_from,
+                query.return_date_to,
+                **kwargs,
+            )
+        return SearchResult(query, results)
+
+    async def _query_list(self, endpoint, query_url) -> list:
+        try:
+            response = await self._cached_query(endpoint, query_url, {})
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        if response:
+            return response
+
+        return []
+
+    async def _cached_query(self, endpoint: str, url: str, params: dict, decoder=None):
+        response = self._get_cached_response(endpoint, url, params)
+        if response is None:
+            response = await self._shared_query(url, params, decoder, cache_as=endpoint)
+        return response
+
+    async def _shared_query(
+        self, url, params, decoder=None, cache_as: Optional[str] = None
+    ):
+        """
+        Async version of `Ryanair._shared_query`: identical concurrent queries share one request.
+        """
+
+        async def query():
+            response = await self._retryable_query(url, params, decoder)
+            if cache_as is not None:
+                self._set_cached_response(cache_as, url, params, response)
+            return response
+
+        response, shared = await self._in_flight.do(
+            self._in_flight_key(url, params, decoder), query
+        )
+        self._report_coalesced(url, shared)
+        return response
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        # Created lazily, as the session, semaphore and lock must be bound to the running event loop
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size)
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._session_cookie_lock is None:
+            self._session_cookie_lock = asyncio.Lock()
+        return self.session
+
+    async def _retryable_query(self, url, params, decoder=None):
+        return await self.retry_policy.call_async(
+            partial(self._query, url, params, decoder),
+            partial(self._on_query_retry, url),
+            partial(self._on_query_giveup, url),
+        )
+
+    async def _query(self, url, params, decoder=None):
+        session = await self._get_session()
+        self._num_queries += 1
+
+        # aiohttp only accepts str/int/float query values, requests would send booleans as "True"/"False"
+        params = {
+            key: str(value) if isinstance(value, bool) else value
+            for key, value in params.items()
+        }
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(url)
+
+        proxy = self._choose_proxy()
+        proxy_url = proxy and (proxy.get("http") or proxy.get("https"))
+
+        async with self._semaphore:
+            started = perf_counter()
+            try:
+                async with session.get(url, params=params, proxy=proxy_url) as response:
+                    body = await response.read()
+            except Exception as e:
+                self._report_request(url, started, None, 0)
+                self._report_proxy_outcome(proxy, started, success=False)
+                if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    raise TransientError(
+                        f"{type(e).__name__} when querying {url}: {e}"
+                    ) from e
+                raise
+            self._report_request(url, started, response.status, len(body))
+            self._report_proxy_outcome(proxy, started, success=response.status != 429)
+
+        self._raise_for_status(url, response.status, response.headers)
+        return self._decode_response(url, response.status, body, decoder)
+
+    async def _ensure_session_cookie(self):
+        # Concurrent availability queries wait for the first to fetch the cookie, rather than each fetching their own
+        if self._has_session_cookie:
+            return
+
+        await self._get_session()
+        async with self._session_cookie_lock:
+            if not self._has_session_cookie:
+                await self._update_session_cookie()
+
+    async def _update_session_cookie(self):
+        # Visit main website to get session cookies
+        session = await self._get_session()
+        async with self._semaphore:
+            async with session.get(self.BASE_SITE_FOR_SESSION_URL) as response:
+                await response.read()
+        self._has_session_cookie = True
@@ -0,0 +1,179 @@
+"""
+Response caches for the Ryanair clients.
+
+Cached entries are keyed on the request URL and its normalized query parameters, and expire after a per-endpoint
+time-to-live (see `DEFAULT_TTLS`). Both backends evict the least recently used entries once they hold `max_size`
+entries. `MemoryCache` lives for the lifetime of the process, `SQLiteCache` persists across restarts.
+
+Usage:
+    api = Ryanair(cache=SQLiteCache("~/.cache/ryanair.sqlite"))
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds to keep responses for, per endpoint family. 0 disables caching for that family.
+DEFAULT_TTLS = {
+    # locate: active airports and their destinations, rarely change
+    "airports": 24 * 60 * 60,
+    "destinations": 24 * 60 * 60,
+    # timtbl schedules and farfnd scheduled dates, published well in advance
+    "schedules": 24 * 60 * 60,
+    "scheduled_dates": 24 * 60 * 60,
+    # farfnd oneWayFares/roundTripFares, prices move constantly so this is opt-in
+    "fares": 0,
+}
+
+
+def make_cache_key(url: str, params: Optional[dict]) -> str:
+    """
+    Build a cache key from a URL and its query parameters, independent of parameter order and value types
+    (e.g. `1` and `"1"` produce the same key, as they would be sent identically).
+    """
+    normalized = sorted((str(key), str(value)) for key, value in (params or {}).items())
+    return json.dumps([url, normalized], separators=(",", ":"))
+
+
+class BaseCache(ABC):
+    """
+    Interface for response caches. Values are decoded JSON documents.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """
+        :return: The cached value, or None if it is missing or expired.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float):
+        """
+        Store a value for `ttl` seconds.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process LRU cache. Values are returned as stored, not copied, so callers should not mutate them.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """
+    On-disk LRU cache backed by a single SQLite file, which survives process restarts.
+    """
+
+    def __init__(self, path: str, max_size: int = 10000):
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (now,)
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
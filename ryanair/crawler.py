@@ -0,0 +1,475 @@
+"""
+Resumable sweeps of cheapest fares, sharded across processes and machines.
+
+A sweep is split into units, each one `get_cheapest_flights` query for an origin (and optionally one destination) over
+a date range, and units are grouped into shards. Workers lease a shard at a time from a work queue, append each unit's
+results to a JSON Lines file of their own, and then checkpoint the unit as done. If a worker dies, its lease expires
+and another worker picks up the shard's remaining units; if the whole sweep is stopped, running it again carries on
+where it stopped:
+
+    queue = SQLiteWorkQueue("~/sweeps/april.sqlite")
+    crawler = Crawler(queue, "~/sweeps/april")
+    crawler.seed(sweep_units(crawler.active_airports(), "2023-04-01", "2023-04-30"))
+    crawler.run(processes=8)
+
+    for unit, flights in read_results("~/sweeps/april"):
+        ...
+
+`SQLiteWorkQueue` coordinates the processes of one machine. To spread a sweep over several machines, implement
+`BaseWorkQueue` on a store they share, and call `Crawler.run` on each of them.
+
+A unit whose results were written just before a crash, but not checkpointed, is crawled again, so `read_results`
+skips units it has already seen.
+"""
+import glob
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from ryanair.ryanair import Ryanair, _RyanairBase
+from ryanair.types import CrawlUnit, Flight
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def unit_id(unit: CrawlUnit) -> str:
+    return ":".join(
+        (
+            unit.origin,
+            unit.date_from.isoformat(),
+            unit.date_to.isoformat(),
+            unit.destination or "",
+        )
+    )
+
+
+def sweep_units(
+    origins: Iterable[str],
+    date_from: Union[datetime, date, str],
+    date_to: Union[datetime, date, str],
+    window_days: int = 1,
+    destinations: Optional[Iterable[str]] = None,
+) -> list:
+    """
+    The units of a sweep of every origin from `date_from` to `date_to` (inclusive).
+
+    :param window_days: Days per query. Each query returns the cheapest fare per destination in its window,
+        so 1 gives the cheapest fare of every day.
+    :param destinations: Query each of these destinations separately, rather than all destinations at once.
+    """
+    date_from = _RyanairBase._parse_date(date_from)
+    date_to = _RyanairBase._parse_date(date_to)
+    windows = []
+    day = date_from
+    while day <= date_to:
+        last = min(date_to, day + timedelta(days=window_days - 1))
+        windows.append((day, last))
+        day = last + timedelta(days=1)
+
+    destinations = [None] if destinations is None else list(destinations)
+    return [
+        CrawlUnit(origin, first, last, destination)
+        for origin in origins
+        for destination in destinations
+        for first, last in windows
+    ]
+
+
+class BaseWorkQueue(ABC):
+    """
+    Interface for the work queues crawlers share. Units are grouped into shards, which workers lease one at a time.
+    Implementations must be picklable, to be passed to worker processes.
+    """
+
+    @abstractmethod
+    def put(self, units: Iterable[CrawlUnit], shard_size: int):
+        """
+        Add units not already queued, in shards of up to `shard_size` units with the same origin.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> Optional[tuple]:
+        """
+        Lease a shard that has pending units and isn't leased, or whose lease has expired.
+
+        :return: `(shard id, [pending CrawlUnit, ...])`, or None if there is no such shard.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, unit: CrawlUnit, worker: str, lease_seconds: float):
+        """
+        Checkpoint a unit as done, and extend the worker's lease on its shard.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, unit: CrawlUnit, worker: str, error: str, max_attempts: int):
+        """
+        Record a failed attempt at a unit. It's left pending, to be tried again, until it has failed `max_attempts`
+        times.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, shard: str, worker: str):
+        """
+        Give up the worker's lease on a shard.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def progress(self) -> dict:
+        """
+        The number of units per state: "pending", "done" and "failed".
+        """
+        raise NotImplementedError
+
+
+class SQLiteWorkQueue(BaseWorkQueue):
+    """
+    Work queue in a SQLite file, shared by the processes of one machine. Picklable: each process opens its own
+    connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connect()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_units ("
+                "id TEXT PRIMARY KEY, shard TEXT NOT NULL, origin TEXT NOT NULL, date_from TEXT NOT NULL, "
+                "date_to TEXT NOT NULL, destination TEXT, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "error TEXT, completed_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS crawl_units_shard_status ON crawl_units (shard, status)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_shards ("
+                "shard TEXT PRIMARY KEY, leased_by TEXT, lease_expires REAL)"
+            )
+
+    def _connect(self):
+        # Writers from other processes wait for each other's transactions rather than failing
+        self._connection = sqlite3.connect(
+            self.path, timeout=60, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._lock = threading.Lock()
+        self._connect()
+
+    def put(self, units: Iterable[CrawlUnit], shard_size: int = 30):
+        rows = []
+        counts = {}
+        for unit in units:
+            # Shards fill in the order units are put, per origin
+            index = counts[unit.origin] = counts.get(unit.origin, -1) + 1
+            rows.append(
+                (
+                    unit_id(unit),
+                    f"{unit.origin}/{index // shard_size}",
+                    unit.origin,
+                    unit.date_from.isoformat(),
+                    unit.date_to.isoformat(),
+                    unit.destination,
+                )
+            )
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO crawl_units (id, shard, origin, date_from, date_to, destination, status, "
+                f"attempts) VALUES (?, ?, ?, ?, ?, ?, '{PENDING}', 0)",
+                rows,
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO crawl_shards (shard) VALUES (?)",
+                {(row[1],) for row in rows},
+            )
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[tuple]:
+        now = time.time()
+        with self._lock:
+            # Take the write lock straight away, so that no two workers lease the same shard
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT shard FROM crawl_shards WHERE (lease_expires IS NULL OR lease_expires < ?) "
+                    "AND EXISTS (SELECT 1 FROM crawl_units WHERE crawl_units.shard = crawl_shards.shard "
+                    f"AND status = '{PENDING}') LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._connection.execute("COMMIT")
+                    return None
+
+                shard = row[0]
+                self._connection.execute(
+                    "UPDATE crawl_shards SET leased_by = ?, lease_expires = ? WHERE shard = ?",
+                    (worker, now + lease_seconds, shard),
+                )
+                units = [
+                    CrawlUnit(
+                        origin,
+                        date.fromisoformat(date_from),
+                        date.fromisoformat(date_to),
+                        destination,
+                    )
+                    for origin, date_from, date_to, destination in self._connection.execute(
+                        "SELECT origin, date_from, date_to, destination FROM crawl_units "
+                        f"WHERE shard = ? AND status = '{PENDING}' ORDER BY date_from, id",
+                        (shard,),
+                    )
+                ]
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return shard, units
+
+    def complete(self, unit: CrawlUnit, worker: str, lease_seconds: float):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"UPDATE crawl_units SET status = '{DONE}', completed_at = ?, error = NULL WHERE id = ?",
+                (now, unit_id(unit)),
+            )
+            self._connection.execute(
+                "UPDATE crawl_shards SET lease_expires = ? WHERE leased_by = ? "
+                "AND shard = (SELECT shard FROM crawl_units WHERE id = ?)",
+                (now + lease_seconds, worker, unit_id(unit)),
+            )
+
+    def fail(self, unit: CrawlUnit, worker: str, error: str, max_attempts: int = 3):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE crawl_units SET attempts = attempts + 1, error = ?, "
+                f"status = CASE WHEN attempts + 1 >= ? THEN '{FAILED}' ELSE status END WHERE id = ?",
+                (error, max_attempts, unit_id(unit)),
+            )
+
+    def release(self, shard: str, worker: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE crawl_shards SET leased_by = NULL, lease_expires = NULL WHERE shard = ? AND leased_by = ?",
+                (shard, worker),
+            )
+
+    def progress(self) -> dict:
+        with self._lock:
+            counts = dict(
+                self._connection.execute(
+                    "SELECT status, COUNT(*) FROM crawl_units GROUP BY status"
+                ).fetchall()
+            )
+        return {status: counts.get(status, 0) for status in (PENDING, DONE, FAILED)}
+
+    def close(self):
+        self._connection.close()
+
+
+def _flight_record(flight: Flight) -> dict:
+    return {**flight._asdict(), "departureTime": flight.departureTime.isoformat()}
+
+
+def read_results(output_dir: str) -> Iterator[tuple]:
+    """
+    Read back the results a crawl wrote to `output_dir`, skipping units seen already, and any line cut short by a
+    crash.
+
+    :return: An iterator of `(CrawlUnit, [Flight, ...])` tuples.
+    """
+    seen = set()
+    for path in sorted(
+        glob.glob(os.path.join(os.path.expanduser(output_dir), "results-*.jsonl"))
+    ):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping an incomplete line in {path}")
+                    continue
+                if record["id"] in seen:
+                    continue
+                seen.add(record["id"])
+
+                origin, date_from, date_to, destination = record["unit"]
+                unit = CrawlUnit(
+                    origin,
+                    date.fromisoformat(date_from),
+                    date.fromisoformat(date_to),
+                    destination,
+                )
+                flights = [
+                    Flight(
+                        **{
+                            **flight,
+                            "departureTime": datetime.fromisoformat(
+                                flight["departureTime"]
+                            ),
+                        }
+                    )
+                    for flight in record["flights"]
+                ]
+                yield unit, flights
+
+
+class Crawler:
+    """
+    Runs the units of a work queue on this machine, in one or several processes.
+    """
+
+    def __init__(
+        self,
+        queue: BaseWorkQueue,
+        output_dir: str,
+        client_factory: Callable[[], Ryanair] = Ryanair,
+        custom_params: Optional[dict] = None,
+        lease_seconds: float = 300,
+        max_attempts: int = 3,
+        poll_interval: float = 5,
+    ):
+        """
+        :param queue: The work queue, shared with every other crawler on the same sweep.
+        :param output_dir: Directory to write results to, one JSON Lines file per worker process.
+        :param client_factory: Creates the client each worker process queries with, e.g.
+            `functools.partial(Ryanair, currency="EUR")`. Must be picklable. Workers set `raise_errors` on their
+            clients, so that failed queries are retried as units.
+        :param custom_params: Passed to every `get_cheapest_flights` query.
+        :param lease_seconds: How long a worker may go without checkpointing a unit before its shard is given to
+            another worker.
+        :param max_attempts: Attempts at a unit before it's recorded as failed.
+        :param poll_interval: How often a worker with nothing to claim checks for shards left by workers that died,
+            in seconds.
+        """
+        self.queue = queue
+        self.output_dir = os.path.expanduser(output_dir)
+        self.client_factory = client_factory
+        self.custom_params = custom_params
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+    def active_airports(self) -> list:
+        """
+        IATA codes of every active airport, to sweep.
+        """
+        return [
+            airport["code"] for airport in self.client_factory().get_active_airports()
+        ]
+
+    def seed(self, units: Iterable[CrawlUnit], shard_size: int = 30):
+        """
+        Queue units to crawl. Units already queued, e.g. when resuming, are left as they are.
+        """
+        self.queue.put(units, shard_size)
+
+    def run(self, processes: Optional[int] = None) -> dict:
+        """
+        Crawl until no units are left pending, with a pool of worker processes.
+
+        :param processes: Number of worker processes, defaults to the number of CPUs.
+        :return: The queue's `progress()` at the end.
+        """
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for crawled in executor.map(_run_worker, [self] * processes):
+                logger.info(f"Worker finished after crawling {crawled} units")
+        return self.queue.progress()
+
+    def run_worker(self) -> int:
+        """
+        Crawl in this process until no units are left pending.
+
+        :return: The number of units this worker crawled.
+        """
+        worker = f"{socket.gethostname()}-{os.getpid()}"
+        os.makedirs(self.output_dir, exist_ok=True)
+        api = self.client_factory()
+        # A failed query has to fail its unit, rather than be checkpointed with no results
+        api.raise_errors = True
+        crawled = 0
+
+        with open(
+            os.path.join(self.output_dir, f"results-{worker}.jsonl"),
+            "a",
+            encoding="utf-8",
+        ) as output:
+            while True:
+                claimed = self.queue.claim(worker, self.lease_seconds)
+                if claimed is None:
+                    # Other workers' shards may still come back if they die, so wait until nothing is pending
+                    if not self.queue.progress()[PENDING]:
+                        return crawled
+                    time.sleep(self.poll_interval)
+                    continue
+
+                shard, units = claimed
+                try:
+                    for unit in units:
+                        if self._crawl_unit(api, unit, worker, output):
+                            crawled += 1
+                finally:
+                    self.queue.release(shard, worker)
+
+    def _crawl_unit(self, api: Ryanair, unit: CrawlUnit, worker: str, output) -> bool:
+        try:
+            flights = api.get_cheapest_flights(
+                unit.origin,
+                unit.date_from,
+                unit.date_to,
+                custom_params=self.custom_params,
+                destination_airport=unit.destination,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to crawl {unit_id(unit)}: {e}")
+            self.queue.fail(unit, worker, repr(e), self.max_attempts)
+            return False
+
+        record = {
+            "id": unit_id(unit),
+            "unit": [
+                unit.origin,
+                unit.date_from.isoformat(),
+                unit.date_to.isoformat(),
+                unit.destination,
+            ],
+            "observedAt": time.time(),
+            "flights": [_flight_record(flight) for flight in flights],
+        }
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        # The results must be on disk before the unit is checkpointed, or a crash could lose them
+        os.fsync(output.fileno())
+        self.queue.complete(unit, worker, self.lease_seconds)
+        return True
+
+
+def _run_worker(crawler: Crawler) -> int:
+    return crawler.run_worker()
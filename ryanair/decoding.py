@@ -0,0 +1,90 @@
+"""
+JSON decoding of API responses.
+
+`loads` uses orjson or msgspec when installed (`pip install ryanair-py[fast]`), falling back to the standard library.
+With msgspec, fares responses are additionally decoded straight into typed structs, validated and with departure
+dates already parsed, rather than into dicts that the parsers then walk key by key.
+"""
+import json
+from datetime import datetime
+from typing import List
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+if orjson is not None:
+    loads = orjson.loads
+elif msgspec is not None:
+    loads = msgspec.json.decode
+else:
+    loads = json.loads
+
+
+def typed_decoding_available() -> bool:
+    return msgspec is not None
+
+
+if msgspec is not None:
+
+    class FareAirport(msgspec.Struct, gc=False):
+        iataCode: str
+        name: str
+        countryName: str
+
+    class FarePrice(msgspec.Struct, gc=False):
+        value: float
+        currencyCode: str
+
+    class FareLeg(msgspec.Struct, gc=False):
+        """
+        The "outbound"/"inbound" of a fare, as read by `_RyanairBase._parse_cheapest_flight`.
+        """
+
+        departureAirport: FareAirport
+        arrivalAirport: FareAirport
+        departureDate: datetime
+        flightNumber: str
+        price: FarePrice
+
+    class _Fare(msgspec.Struct, gc=False):
+        # Subscriptable like the dicts it replaces, so fares are handled the same whichever way they were decoded
+        def __getitem__(self, key):
+            return getattr(self, key)
+
+    class OneWayFare(_Fare):
+        outbound: FareLeg
+
+    class RoundTripFare(_Fare):
+        outbound: FareLeg
+        inbound: FareLeg
+
+    class OneWayFaresResponse(msgspec.Struct, gc=False):
+        fares: List[OneWayFare] = []
+
+    class RoundTripFaresResponse(msgspec.Struct, gc=False):
+        fares: List[RoundTripFare] = []
+
+    _one_way_fares_decoder = msgspec.json.Decoder(OneWayFaresResponse)
+    _round_trip_fares_decoder = msgspec.json.Decoder(RoundTripFaresResponse)
+
+
+def decode_one_way_fares(data: bytes) -> dict:
+    """
+    Decode a oneWayFares response into `{"fares": [OneWayFare, ...]}`. Requires msgspec.
+    """
+    return {"fares": _one_way_fares_decoder.decode(data).fares}
+
+
+def decode_round_trip_fares(data: bytes) -> dict:
+    """
+    Decode a roundTripFares response into `{"fares": [RoundTripFare, ...]}`. Requires msgspec.
+    """
+    return {"fares": _round_trip_fares_decoder.decode(data).fares}
@@ -0,0 +1,62 @@
+"""
+Errors raised by the Ryanair clients.
+
+Each error says whether the query that raised it is worth retrying (`retryable`), which is how
+`ryanair.retry.RetryPolicy` tells network hiccups and overload from requests that will never succeed.
+"""
+from typing import Optional
+
+
+class RyanairException(Exception):
+    retryable = False
+
+    def __init__(self, message):
+        super().__init__(f"Ryanair API: {message}")
+
+
+class AvailabilityException(RyanairException):
+    retryable = True
+
+    def __init__(self):
+        super().__init__("Availability API declined to provide a result")
+
+
+class TransientError(RyanairException):
+    """
+    The request failed in a way that may well not happen again: a network error, timeout, or HTTP 5xx.
+    """
+
+    retryable = True
+
+    def __init__(
+        self,
+        message,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        # Seconds the server asked us to wait before trying again, from a Retry-After header
+        self.retry_after = retry_after
+
+
+class TooManyRequestsError(TransientError):
+    """
+    HTTP 429, the API (or a proxy in front of it) is rate limiting us.
+    """
+
+    def __init__(self, url: str, retry_after: Optional[float] = None):
+        super().__init__(
+            f"Too many requests (HTTP 429) when querying {url}", 429, retry_after
+        )
+
+
+class PermanentError(RyanairException):
+    """
+    The request was rejected (HTTP 4xx) or answered with something that can't be decoded, so sending it again
+    would give the same result.
+    """
+
+    def __init__(self, message, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
@@ -0,0 +1,234 @@
+"""
+Bulk export of query results to Apache Arrow, Parquet, pandas and polars.
+
+Results are converted a column at a time into Arrow arrays with proper types: departure times as timestamps (UTC
+times timezone-aware, local times naive), fares as float64, counts as nullable integers, and IATA codes, airport
+names, flight numbers and currencies dictionary-encoded. `FlightBatch` results, from `get_all_flights_batch`,
+are already stored as typed columns, and are converted without going through a Python object per flight.
+
+    flights = api.get_all_flights_range("DUB", "STN", "2023-04-01", "2023-04-30")
+    write_parquet(flights, "dub-stn.parquet")
+    df = to_pandas(api.get_cheapest_flights("DUB", "2023-04-01", "2023-04-30"))
+
+Requires pyarrow (`pip install ryanair-py[arrow]`), and pandas or polars for `to_pandas` and `to_polars`.
+"""
+from typing import Iterable, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pq = None
+
+try:
+    import polars
+except ImportError:  # pragma: no cover - optional dependency
+    polars = None
+
+from ryanair.flight_batch import FIELD_KINDS, FlightBatch, _INT_NONE
+from ryanair.types import Flight, FlightV2, Trip
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "Exporting results requires pyarrow, install it with `pip install ryanair-py[arrow]`"
+        )
+
+
+def _strings():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def _arrow_type(kind: str):
+    return {
+        "local_time": pa.timestamp("s"),
+        "utc_time": pa.timestamp("s", tz="UTC"),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "str": _strings(),
+    }[kind]
+
+
+def _flight_schema():
+    return pa.schema(
+        [
+            ("departureTime", pa.timestamp("s")),
+            ("flightNumber", _strings()),
+            ("price", pa.float64()),
+            ("currency", _strings()),
+            ("origin", _strings()),
+            ("originFull", _strings()),
+            ("destination", _strings()),
+            ("destinationFull", _strings()),
+        ]
+    )
+
+
+def _flight_v2_schema():
+    return pa.schema(
+        [(field, _arrow_type(kind)) for field, kind in FIELD_KINDS.items()]
+    )
+
+
+def _trip_schema():
+    flight = _flight_schema()
+    return pa.schema(
+        [("totalPrice", pa.float64())]
+        + [(f"outbound_{field.name}", field.type) for field in flight]
+        + [(f"inbound_{field.name}", field.type) for field in flight]
+    )
+
+
+def schema_for(result_type: type) -> "pa.Schema":
+    """
+    The Arrow schema results of `result_type` (`Flight`, `FlightV2` or `Trip`) are exported with.
+    """
+    _require_pyarrow()
+    if result_type is Flight:
+        return _flight_schema()
+    if result_type in (FlightV2, FlightBatch):
+        return _flight_v2_schema()
+    if result_type is Trip:
+        return _trip_schema()
+    raise TypeError(f"Can't export results of type {result_type.__name__}")
+
+
+def _batch_column(batch: FlightBatch, dictionary: "pa.Array", field: str, kind: str):
+    values = batch.column(field)
+    size = len(values)
+    buffer = pa.py_buffer(values)
+
+    if kind == "str":
+        codes = pa.Array.from_buffers(pa.uint32(), size, [None, buffer])
+        # Only the strings this column uses, with code 0 (None) left out, so it becomes null
+        used = pc.unique(codes)
+        used = pc.filter(used, pc.not_equal(used, 0))
+        return pa.DictionaryArray.from_arrays(
+            pc.index_in(codes, value_set=used), dictionary.take(used)
+        )
+
+    if kind == "float":
+        column = pa.Array.from_buffers(pa.float64(), size, [None, buffer])
+        return pc.if_else(pc.is_nan(column), None, column)
+
+    if kind == "bool":
+        column = pa.Array.from_buffers(pa.int8(), size, [None, buffer])
+        return pc.if_else(pc.equal(column, -1), None, pc.not_equal(column, 0))
+
+    column = pa.Array.from_buffers(pa.int64(), size, [None, buffer])
+    column = pc.if_else(pc.equal(column, _INT_NONE), None, column)
+    return column.cast(_arrow_type(kind))
+
+
+def _batch_to_arrow(batch: FlightBatch) -> "pa.Table":
+    dictionary = pa.array(batch.strings, pa.string())
+    return pa.Table.from_arrays(
+        [
+            _batch_column(batch, dictionary, field, kind)
+            for field, kind in FIELD_KINDS.items()
+        ],
+        schema=_flight_v2_schema(),
+    )
+
+
+def _flight_columns(flights: list) -> list:
+    if not flights:
+        return [[] for _ in Flight._fields]
+    departure_times, *columns = zip(*flights)
+    # Fare departure times are in the departure airport's local time, like FlightV2.departureTime_local
+    return [list(departure_times)] + [list(column) for column in columns]
+
+
+def _to_table(columns: list, schema: "pa.Schema") -> "pa.Table":
+    arrays = []
+    for values, field in zip(columns, schema):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(
+                pa.array(values, pa.string()).dictionary_encode().cast(field.type)
+            )
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def to_arrow(
+    results: Union[Iterable, FlightBatch], result_type: Optional[type] = None
+) -> "pa.Table":
+    """
+    Convert query results to an Arrow table, with one row per flight or trip.
+
+    :param results: A list (or any iterable) of `Flight`, `FlightV2` or `Trip`, a `FlightBatch`, or a list of
+        `FlightBatch`es, e.g. from a sweep over several routes.
+    :param result_type: `Flight`, `FlightV2` or `Trip`, for the schema of the table when `results` is empty.
+        Otherwise it's inferred from the results.
+    """
+    _require_pyarrow()
+
+    if isinstance(results, FlightBatch):
+        return _batch_to_arrow(results)
+
+    results = list(results)
+    if not results:
+        if result_type is None:
+            raise ValueError(
+                "No results to infer the table schema from, pass result_type"
+            )
+        return schema_for(result_type).empty_table()
+
+    first = results[0]
+    if isinstance(first, FlightBatch):
+        return pa.concat_tables(_batch_to_arrow(batch) for batch in results)
+    if isinstance(first, FlightV2):
+        return _batch_to_arrow(FlightBatch.from_flights(results))
+    if isinstance(first, Flight):
+        return _to_table(_flight_columns(results), _flight_schema())
+    if isinstance(first, Trip):
+        total_prices, outbounds, inbounds = zip(*results)
+        return _to_table(
+            [list(total_prices)]
+            + _flight_columns(outbounds)
+            + _flight_columns(inbounds),
+            _trip_schema(),
+        )
+    raise TypeError(f"Can't export results of type {type(first).__name__}")
+
+
+def write_parquet(
+    results: Union[Iterable, FlightBatch, "pa.Table"],
+    path: str,
+    result_type: Optional[type] = None,
+    **kwargs,
+):
+    """
+    Write query results (or a table from `to_arrow`) to a Parquet file.
+
+    :param kwargs: Passed on to `pyarrow.parquet.write_table`, e.g. `compression="zstd"`.
+    """
+    _require_pyarrow()
+    table = results if isinstance(results, pa.Table) else to_arrow(results, result_type)
+    pq.write_table(table, path, **kwargs)
+
+
+def to_pandas(
+    results: Union[Iterable, FlightBatch], result_type: Optional[type] = None
+):
+    """
+    Query results as a pandas DataFrame. Dictionary-encoded columns become categoricals.
+    """
+    return to_arrow(results, result_type).to_pandas()
+
+
+def to_polars(
+    results: Union[Iterable, FlightBatch], result_type: Optional[type] = None
+):
+    """
+    Query results as a polars DataFrame. Dictionary-encoded columns become categoricals.
+    """
+    if polars is None:
+        raise ImportError(
+            "to_polars requires polars, install it with `pip install polars`"
+        )
+    return polars.from_arrow(to_arrow(results, result_type))
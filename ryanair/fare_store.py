@@ -0,0 +1,474 @@
+"""
+In-memory store of fetched fares, for filtering them locally instead of querying again.
+
+Calling `get_cheapest_flights` again with a different time of day, price limit, country or airport only narrows down
+fares already fetched. `FareStore` keeps them, indexed, and answers the same filters from memory:
+
+    store = FareStore()
+    store.add(api.get_cheapest_flights("DUB", "2023-04-01", "2023-04-30"))
+    store.get_cheapest_flights("DUB", "2023-04-10", "2023-04-20", destination_country="IT", max_price=40)
+
+Fares are kept per route, each route's sorted by departure time and by price, and routes are found through hash
+indexes by origin, destination and destination country. A query looks up the routes it covers, takes the shorter
+of each route's matching departure time and price ranges by bisection, and checks its other filters on those fares
+only. Each fare remembers when it was added, so that queries can leave out fares older than `max_age`.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+from itertools import count
+from operator import itemgetter
+from time import time as now
+from typing import Iterable, Optional, Union
+
+from ryanair import airport_utils
+from ryanair.ryanair import _RyanairBase
+from ryanair.types import Flight, Trip
+
+
+class _Entry:
+    __slots__ = (
+        "id",
+        "flight",
+        "origin",
+        "destination",
+        "country",
+        "departure",
+        "price",
+        "observed_at",
+    )
+
+    def __init__(
+        self, entry_id: int, flight, country: Optional[str], observed_at: float
+    ):
+        self.id = entry_id
+        self.flight = flight
+        self.origin = flight.origin
+        self.destination = flight.destination
+        self.country = country
+        if isinstance(flight, Flight):
+            # Local time at the departure airport, as a string, like FlightV2.departureTime_local
+            self.departure = flight.departureTime.isoformat()
+            self.price = flight.price
+        else:
+            self.departure = flight.departureTime_local
+            self.price = flight.actualFare
+        self.observed_at = observed_at
+
+
+def _flight_key(flight) -> tuple:
+    departure = (
+        flight.departureTime
+        if isinstance(flight, Flight)
+        else flight.departureTime_local
+    )
+    return flight.origin, flight.destination, flight.flightNumber, departure
+
+
+def _day_after(d: Union[datetime, date, str]) -> str:
+    return (_RyanairBase._parse_date(d) + timedelta(days=1)).isoformat()
+
+
+def _departure_items(entries: list) -> list:
+    return [(entry.departure, entry.id) for entry in entries]
+
+
+def _price_items(entries: list) -> list:
+    return [(entry.price, entry.id) for entry in entries if entry.price is not None]
+
+
+# Up to this many items are inserted into or removed from an index one at a time, each shifting the rest of the
+# list along. More are merged in, or left out, in one pass rebuilding the list from the first one's position,
+# which costs about as much as shifting it along a few hundred times.
+_FEW_ITEMS = 256
+
+
+def _insert_sorted(index: list, items: list):
+    """
+    Insert `items`, in id order, into the sorted list `index`, in place. Ids only grow, so each item goes after
+    any item already in `index` with the same value.
+    """
+    if len(items) <= _FEW_ITEMS:
+        for item in items:
+            insort(index, item)
+        return
+
+    # Sorting by value alone is quicker than comparing tuples, and being stable, keeps equal values in id order
+    items.sort(key=itemgetter(0))
+    if len(index) <= len(items):
+        index.extend(items)
+        index.sort(key=itemgetter(0))
+        return
+
+    first = start = bisect_right(index, items[0])
+    merged = []
+    for item in items:
+        position = bisect_right(index, item, start)
+        merged.extend(index[start:position])
+        merged.append(item)
+        start = position
+    merged.extend(index[start:])
+    index[first:] = merged
+
+
+def _remove_sorted(index: list, items: list):
+    """
+    Remove `items`, all of which are in it, from the sorted list `index`, in place.
+    """
+    if len(items) <= _FEW_ITEMS:
+        for item in items:
+            del index[bisect_left(index, item)]
+        return
+    if len(items) * 8 >= len(index):
+        removed = set(items)
+        index[:] = [item for item in index if item not in removed]
+        return
+
+    items.sort()
+    first = start = bisect_left(index, items[0])
+    kept = []
+    for item in items:
+        position = bisect_left(index, item, start)
+        kept.extend(index[start:position])
+        start = position + 1
+    kept.extend(index[start:])
+    index[first:] = kept
+
+
+class FareStore:
+    """
+    Thread-safe in-memory store of `Flight` and `FlightV2` results, with the filters of `get_cheapest_flights`.
+    A flight added again replaces its earlier fare.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = count()
+        # (origin, destination, flight number, departure time) -> entry
+        self._entries = {}
+        self._by_id = {}
+        # Hash indexes: origin -> destinations, destination -> origins, country -> destinations
+        self._by_origin = {}
+        self._by_destination = {}
+        self._by_country = {}
+        # Sorted indexes of (departure time, id) and (price, id), of all entries and per (origin, destination) route
+        self._by_departure = []
+        self._by_price = []
+        self._route_by_departure = {}
+        self._route_by_price = {}
+        # IATA code -> ISO country code, or None for airports not in airport_utils
+        self._countries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _country(self, iata_code: str) -> Optional[str]:
+        if iata_code not in self._countries:
+            airport = airport_utils.AIRPORTS.get(iata_code)
+            self._countries[iata_code] = airport.iso_country if airport else None
+        return self._countries[iata_code]
+
+    def _index(self, entries: list):
+        by_route = {}
+        for entry in entries:
+            self._by_id[entry.id] = entry
+            by_route.setdefault((entry.origin, entry.destination), []).append(entry)
+        for route, route_entries in by_route.items():
+            if route not in self._route_by_departure:
+                origin, destination = route
+                self._by_origin.setdefault(origin, set()).add(destination)
+                self._by_destination.setdefault(destination, set()).add(origin)
+                self._by_country.setdefault(route_entries[0].country, set()).add(
+                    destination
+                )
+                self._route_by_departure[route] = []
+                self._route_by_price[route] = []
+            _insert_sorted(
+                self._route_by_departure[route], _departure_items(route_entries)
+            )
+            _insert_sorted(self._route_by_price[route], _price_items(route_entries))
+        _insert_sorted(self._by_departure, _departure_items(entries))
+        _insert_sorted(self._by_price, _price_items(entries))
+
+    def _unindex(self, entries: list):
+        by_route = {}
+        for entry in entries:
+            del self._by_id[entry.id]
+            by_route.setdefault((entry.origin, entry.destination), []).append(entry)
+        _remove_sorted(self._by_departure, _departure_items(entries))
+        _remove_sorted(self._by_price, _price_items(entries))
+        for route, route_entries in by_route.items():
+            _remove_sorted(
+                self._route_by_departure[route], _departure_items(route_entries)
+            )
+            _remove_sorted(self._route_by_price[route], _price_items(route_entries))
+            if self._route_by_departure[route]:
+                continue
+
+            origin, destination = route
+            del self._route_by_departure[route], self._route_by_price[route]
+            for index, value, member in (
+                (self._by_origin, origin, destination),
+                (self._by_destination, destination, origin),
+            ):
+                index[value].discard(member)
+                if not index[value]:
+                    del index[value]
+            if destination not in self._by_destination:
+                country = route_entries[0].country
+                self._by_country[country].discard(destination)
+                if not self._by_country[country]:
+                    del self._by_country[country]
+
+    def add(self, results: Iterable, observed_at: Optional[float] = None):
+        """
+        Add query results: `Flight`s, `FlightV2`s, or `Trip`s, whose outbound and inbound flights are added.
+
+        :param observed_at: When the results were fetched, as a Unix timestamp. Defaults to now.
+        """
+        observed_at = now() if observed_at is None else observed_at
+        with self._lock:
+            added = {}
+            for result in results:
+                for flight in (
+                    (result.outbound, result.inbound)
+                    if isinstance(result, Trip)
+                    else (result,)
+                ):
+                    key = _flight_key(flight)
+                    # A flight given twice keeps its last fare, moved to the end to keep entries in id order
+                    added.pop(key, None)
+                    added[key] = _Entry(
+                        next(self._ids),
+                        flight,
+                        self._country(flight.destination),
+                        observed_at,
+                    )
+            if not added:
+                return
+
+            # The indexes are updated once per call, rather than once per flight
+            replaced = [self._entries[key] for key in added if key in self._entries]
+            if replaced:
+                self._unindex(replaced)
+            self._entries.update(added)
+            self._index(list(added.values()))
+
+    def prune(self, max_age: float) -> int:
+        """
+        Drop fares added more than `max_age` seconds ago.
+
+        :return: The number of fares dropped.
+        """
+        oldest = now() - max_age
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.observed_at < oldest
+            ]
+            if stale:
+                self._unindex([self._entries.pop(key) for key in stale])
+        return len(stale)
+
+    def age(self, flight) -> Optional[float]:
+        """
+        Seconds since `flight`'s fare was added, or None if it isn't in the store.
+        """
+        with self._lock:
+            entry = self._entries.get(_flight_key(flight))
+        return None if entry is None else now() - entry.observed_at
+
+    def query(
+        self,
+        origin: Optional[str] = None,
+        date_from: Union[datetime, date, str, None] = None,
+        date_to: Union[datetime, date, str, None] = None,
+        destination_country: Optional[str] = None,
+        departure_time_from: Union[str, time, None] = None,
+        departure_time_to: Union[str, time, None] = None,
+        max_price: Optional[float] = None,
+        destination_airport: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> list:
+        """
+        All stored flights matching every filter given, sorted by departure time.
+
+        :param date_from: First departure date, inclusive.
+        :param date_to: Last departure date, inclusive.
+        :param departure_time_from: Earliest local time of day of departure, e.g. "06:00", inclusive.
+        :param departure_time_to: Latest local time of day of departure, inclusive.
+        :param max_age: Leave out fares added more than this many seconds ago.
+        """
+        departure_from = (
+            None
+            if date_from is None
+            else _RyanairBase._parse_date(date_from).isoformat()
+        )
+        departure_before = None if date_to is None else _day_after(date_to)
+        time_from = (
+            None
+            if departure_time_from is None
+            else _RyanairBase._format_time_for_api(departure_time_from)
+        )
+        time_to = (
+            None
+            if departure_time_to is None
+            else _RyanairBase._format_time_for_api(departure_time_to)
+        )
+        # The whole day, as get_cheapest_flights asks for by default, needs no checking
+        if time_from == "00:00":
+            time_from = None
+        if time_to == "23:59":
+            time_to = None
+        oldest = None if max_age is None else now() - max_age
+
+        matches = []
+        with self._lock:
+            routes = self._routes(origin, destination_country, destination_airport)
+            candidates, routes_to_check = self._candidates(
+                routes, departure_from, departure_before, max_price
+            )
+            for entry_id in candidates:
+                entry = self._by_id[entry_id]
+                if (
+                    (
+                        routes_to_check is None
+                        or (entry.origin, entry.destination) in routes_to_check
+                    )
+                    and (departure_from is None or entry.departure >= departure_from)
+                    and (departure_before is None or entry.departure < departure_before)
+                    and (
+                        max_price is None
+                        or (entry.price is not None and entry.price <= max_price)
+                    )
+                    and (time_from is None or entry.departure[11:16] >= time_from)
+                    and (time_to is None or entry.departure[11:16] <= time_to)
+                    and (oldest is None or entry.observed_at >= oldest)
+                ):
+                    matches.append(entry)
+
+        matches.sort(key=lambda entry: (entry.departure, entry.id))
+        return [entry.flight for entry in matches]
+
+    def _routes(
+        self, origin, destination_country, destination_airport
+    ) -> Optional[list]:
+        """
+        The (origin, destination) routes the filters given cover, or None for all of them.
+        """
+        if (
+            origin is None
+            and destination_country is None
+            and destination_airport is None
+        ):
+            return None
+
+        destinations = None
+        if destination_airport is not None:
+            destinations = {destination_airport}
+        if destination_country is not None:
+            in_country = self._by_country.get(destination_country, set())
+            destinations = (
+                in_country if destinations is None else destinations & in_country
+            )
+
+        origins = [origin] if origin is not None else list(self._by_origin)
+        routes = []
+        for route_origin in origins:
+            from_origin = self._by_origin.get(route_origin, set())
+            for destination in (
+                from_origin if destinations is None else from_origin & destinations
+            ):
+                routes.append((route_origin, destination))
+        return routes
+
+    @staticmethod
+    def _ranges(
+        departures: list, prices: list, departure_from, departure_before, max_price
+    ) -> tuple:
+        """
+        The shorter of the ranges of `departures` and `prices` matching the filters, as (list, start, stop).
+        """
+        first = (
+            0 if departure_from is None else bisect_left(departures, (departure_from,))
+        )
+        last = (
+            len(departures)
+            if departure_before is None
+            else bisect_left(departures, (departure_before,))
+        )
+        if max_price is not None:
+            cheaper = bisect_right(prices, (max_price, float("inf")))
+            if cheaper < last - first:
+                return prices, 0, cheaper
+        return departures, first, last
+
+    def _candidates(
+        self, routes: Optional[list], departure_from, departure_before, max_price
+    ) -> tuple:
+        """
+        Ids of the entries to check against the filters, from the most selective indexes, and the routes they
+        still need checking against, if any. The caller checks every other filter.
+        """
+        entries, start, stop = self._ranges(
+            self._by_departure,
+            self._by_price,
+            departure_from,
+            departure_before,
+            max_price,
+        )
+        # Each route's ranges take a few bisections to find, so only go by route if there are few routes
+        if routes is not None and 16 * len(routes) < stop - start:
+            candidates = []
+            for route in routes:
+                entries, start, stop = self._ranges(
+                    self._route_by_departure[route],
+                    self._route_by_price[route],
+                    departure_from,
+                    departure_before,
+                    max_price,
+                )
+                candidates.extend(entry_id for _, entry_id in entries[start:stop])
+            return candidates, None
+
+        candidates = [entry_id for _, entry_id in entries[start:stop]]
+        return candidates, None if routes is None else set(routes)
+
+    def get_cheapest_flights(
+        self,
+        airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        departure_time_from: Union[str, time] = "00:00",
+        departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[float] = None,
+        destination_airport: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> list:
+        """
+        Same as `Ryanair.get_cheapest_flights`, from the store: the cheapest stored flight to each destination,
+        cheapest first.
+        """
+        cheapest = {}
+        for flight in self.query(
+            airport,
+            date_from,
+            date_to,
+            destination_country,
+            departure_time_from,
+            departure_time_to,
+            max_price,
+            destination_airport,
+            max_age,
+        ):
+            price = flight.price if isinstance(flight, Flight) else flight.actualFare
+            if price is not None and (
+                flight.destination not in cheapest
+                or price < cheapest[flight.destination][0]
+            ):
+                cheapest[flight.destination] = (price, flight)
+        return [
+            flight for _, flight in sorted(cheapest.values(), key=lambda fare: fare[0])
+        ]
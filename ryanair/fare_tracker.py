@@ -0,0 +1,271 @@
+"""
+Incremental tracking of fare changes between polls.
+
+`FareTracker` keeps the last seen fare of every flight, grouped by (origin, destination, departure date), and on each
+poll records only what changed: new flights, price or seats-left changes, and flights that disappeared from a group
+that was polled again. Changes are appended to a SQLite file, so storage grows with the rate fares change rather
+than with how often they're polled:
+
+    tracker = FareTracker("~/.cache/ryanair-py/fares.sqlite")
+    while True:
+        for change in tracker.poll(api, "DUB", date_from, date_to):
+            print(change)
+        time.sleep(300)
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional, Union
+
+from ryanair.ryanair import _RyanairBase
+from ryanair.types import FareChange, Flight
+
+logger = logging.getLogger(__name__)
+
+NEW = "new"
+CHANGED = "changed"
+REMOVED = "removed"
+
+
+def _fare_record(flight) -> tuple:
+    """
+    ((origin, destination, date), (flight number, departure time), (price, fares left, currency)) for a `Flight`
+    from the fares API, or a `FlightV2` from the availability API.
+    """
+    if isinstance(flight, Flight):
+        departure = flight.departureTime.isoformat()
+        price, fares_left = flight.price, None
+    else:
+        departure = flight.departureTime_local
+        price, fares_left = flight.actualFare, flight.faresLeft
+    return (
+        (flight.origin, flight.destination, departure[:10]),
+        (flight.flightNumber, departure),
+        (price, fares_left, flight.currency),
+    )
+
+
+class FareTracker:
+    """
+    Thread-safe tracker of fare changes, persisted to SQLite: the latest snapshot, and an append-only change log.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: SQLite file to keep snapshots and changes in, or ":memory:".
+        """
+        self.path = path if path == ":memory:" else os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fare_snapshots ("
+                "origin TEXT NOT NULL, destination TEXT NOT NULL, departure_date TEXT NOT NULL, "
+                "flight_number TEXT NOT NULL, departure_time TEXT NOT NULL, "
+                "price REAL, fares_left INTEGER, currency TEXT, "
+                "PRIMARY KEY (origin, destination, departure_date, flight_number, departure_time))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fare_changes ("
+                "observed_at REAL NOT NULL, change TEXT NOT NULL, "
+                "origin TEXT NOT NULL, destination TEXT NOT NULL, "
+                "flight_number TEXT NOT NULL, departure_time TEXT NOT NULL, "
+                "price REAL, previous_price REAL, fares_left INTEGER, previous_fares_left INTEGER, currency TEXT)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS fare_changes_route "
+                "ON fare_changes (origin, destination, observed_at)"
+            )
+
+        # (origin, destination, date) -> {(flight number, departure time): (price, fares left, currency)}
+        self._snapshots = {}
+        for row in self._connection.execute("SELECT * FROM fare_snapshots"):
+            origin, destination, day, flight_number, departure, *fare = row
+            self._snapshots.setdefault((origin, destination, day), {})[
+                (flight_number, departure)
+            ] = tuple(fare)
+
+    def update(self, flights: Iterable, observed_at: Optional[float] = None) -> list:
+        """
+        Compare a poll's results with the last snapshot of the same (origin, destination, date) groups,
+        store the differences, and make the results the new snapshot for those groups.
+
+        Groups absent from `flights` are left as they were, as a poll over fewer dates or destinations
+        says nothing about them.
+
+        :param flights: `Flight`s from `get_cheapest_flights`, or `FlightV2`s from `get_all_flights`.
+        :param observed_at: UNIX timestamp of the poll, defaults to now.
+        :return: The `FareChange`s, in no particular order.
+        """
+        observed_at = observed_at if observed_at is not None else time.time()
+
+        polled = {}
+        for flight in flights:
+            group, key, fare = _fare_record(flight)
+            polled.setdefault(group, {})[key] = fare
+
+        changes = []
+        with self._lock:
+            for group, fares in polled.items():
+                previous = self._snapshots.get(group, {})
+                for key, fare in fares.items():
+                    before = previous.get(key)
+                    if before is None:
+                        changes.append(
+                            self._change(observed_at, NEW, group, key, fare, None)
+                        )
+                    elif fare[:2] != before[:2]:
+                        changes.append(
+                            self._change(observed_at, CHANGED, group, key, fare, before)
+                        )
+                for key, before in previous.items():
+                    if key not in fares:
+                        changes.append(
+                            self._change(
+                                observed_at,
+                                REMOVED,
+                                group,
+                                key,
+                                (None, None, before[2]),
+                                before,
+                            )
+                        )
+                self._snapshots[group] = fares
+
+            self._write(polled, changes)
+
+        return changes
+
+    @staticmethod
+    def _change(observed_at, change, group, key, fare, before) -> FareChange:
+        origin, destination, _ = group
+        flight_number, departure = key
+        price, fares_left, currency = fare
+        previous_price, previous_fares_left = before[:2] if before else (None, None)
+        return FareChange(
+            observedAt=datetime.fromtimestamp(observed_at),
+            change=change,
+            origin=origin,
+            destination=destination,
+            flightNumber=flight_number,
+            departureTime=departure,
+            price=price,
+            previousPrice=previous_price,
+            faresLeft=fares_left,
+            previousFaresLeft=previous_fares_left,
+            currency=currency,
+        )
+
+    def _write(self, polled: dict, changes: list):
+        with self._connection:
+            # Only groups where something changed need their snapshot rewritten
+            for origin, destination, day in {
+                (c.origin, c.destination, c.departureTime[:10]) for c in changes
+            }:
+                fares = polled[(origin, destination, day)]
+                self._connection.execute(
+                    "DELETE FROM fare_snapshots WHERE origin = ? AND destination = ? AND departure_date = ?",
+                    (origin, destination, day),
+                )
+                self._connection.executemany(
+                    "INSERT INTO fare_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (origin, destination, day, *key, *fare)
+                        for key, fare in fares.items()
+                    ),
+                )
+            self._connection.executemany(
+                "INSERT INTO fare_changes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        c.observedAt.timestamp(),
+                        c.change,
+                        c.origin,
+                        c.destination,
+                        c.flightNumber,
+                        c.departureTime,
+                        c.price,
+                        c.previousPrice,
+                        c.faresLeft,
+                        c.previousFaresLeft,
+                        c.currency,
+                    )
+                    for c in changes
+                ),
+            )
+
+    def poll(
+        self,
+        api,
+        airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        max_workers: int = 4,
+        **kwargs,
+    ) -> list:
+        """
+        Run `api.get_cheapest_flights(airport, day, day, **kwargs)` for each day from `date_from` to `date_to`,
+        and `update` with the results.
+
+        The fares API only returns each destination's cheapest flight over the dates queried, so each day is queried
+        on its own. Over a longer range, the cheapest flight moving to another day would show up as a new flight,
+        and the old one would never be polled again to be reported removed.
+
+        A failed query returns no flights, which leaves that day's snapshot untouched rather than reporting every
+        flight as removed.
+
+        :param max_workers: Number of days queried concurrently.
+        """
+        start = _RyanairBase._parse_date(date_from)
+        end = _RyanairBase._parse_date(date_to)
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        if not days:
+            return []
+
+        def query(day):
+            return api.get_cheapest_flights(airport, day, day, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(days))) as executor:
+            return self.update(
+                flight for flights in executor.map(query, days) for flight in flights
+            )
+
+    def changes(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        since: Optional[datetime] = None,
+    ) -> Iterator[FareChange]:
+        """
+        Recorded changes, oldest first, optionally filtered by route and time.
+        """
+        conditions, parameters = [], []
+        for column, value in (("origin", origin), ("destination", destination)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if since is not None:
+            conditions.append("observed_at >= ?")
+            parameters.append(since.timestamp())
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM fare_changes{where} ORDER BY observed_at, rowid",
+                parameters,
+            ).fetchall()
+
+        for observed_at, *fields in rows:
+            yield FareChange(datetime.fromtimestamp(observed_at), *fields)
+
+    def close(self):
+        self._connection.close()
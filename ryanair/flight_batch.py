@@ -0,0 +1,322 @@
+"""
+A compact, column-oriented container for availability results.
+
+`FlightBatch` stores the same data as a list of `FlightV2` tuples, but as one typed array per field:
+timestamps as epoch seconds, fares as doubles, flags as bytes, and strings (currency, airport names, flight numbers)
+as indexes into a single table of interned strings. Large sweeps of `get_all_flights` therefore hold a few dozen
+bytes per flight, rather than a tuple of Python objects. Individual flights are converted to `FlightV2` on demand.
+"""
+import logging
+import math
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from ryanair.airport_utils import get_airport_by_iata
+from ryanair.types import FlightV2
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+# Stand-in for None in integer columns
+_INT_NONE = -(2**63)
+
+# How each FlightV2 field is stored
+FIELD_KINDS = {
+    "departureTime_local": "local_time",
+    "departureTime_utc": "utc_time",
+    "arrivalTime_local": "local_time",
+    "arrivalTime_utc": "utc_time",
+    "flightNumber": "str",
+    "operatedBy": "str",
+    "duration": "str",
+    "actualFare": "float",
+    "publishedFare": "float",
+    "hasDiscount": "bool",
+    "discountInPercent": "int",
+    "hasPromoDiscount": "bool",
+    "hasBogof": "bool",
+    "infantsLeft": "int",
+    "faresLeft": "int",
+    "currency": "str",
+    "origin": "str",
+    "originFull": "str",
+    "destination": "str",
+    "destinationFull": "str",
+}
+
+_TYPECODES = {
+    "local_time": "q",
+    "utc_time": "q",
+    "int": "q",
+    "float": "d",
+    "bool": "b",
+    "str": "I",
+}
+
+
+# Epoch seconds at midnight by "YYYY-MM-DD", and seconds since midnight by "HH:MM:SS".
+# Flights share few enough dates and departure times that these stay small.
+_day_epochs = {}
+_clock_seconds = {}
+
+
+def _time_to_epoch(value: Optional[str]) -> int:
+    # Availability timestamps look like "2023-03-12T06:25:00.000", with a trailing "Z" for UTC
+    if value is None:
+        return _INT_NONE
+
+    day = value[:10]
+    day_seconds = _day_epochs.get(day)
+    if day_seconds is None:
+        day_seconds = _day_epochs[day] = int(
+            (datetime.fromisoformat(day) - _EPOCH).total_seconds()
+        )
+
+    clock = value[11:19]
+    clock_seconds = _clock_seconds.get(clock)
+    if clock_seconds is None:
+        hours, minutes, seconds = clock.split(":")
+        clock_seconds = _clock_seconds[clock] = (
+            int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        )
+
+    return day_seconds + clock_seconds
+
+
+def _epoch_to_time(value: int, utc: bool) -> Optional[str]:
+    if value == _INT_NONE:
+        return None
+    return (
+        f"{_EPOCH + timedelta(seconds=value):%Y-%m-%dT%H:%M:%S}.000{'Z' if utc else ''}"
+    )
+
+
+class FlightBatch:
+    """
+    Struct-of-arrays equivalent of a list of `FlightV2`.
+
+    Columns are exposed through `column(name)`: timestamps as epoch seconds (local times are wall-clock times,
+    encoded as if they were UTC), missing numbers as `_INT_NONE` or NaN, and strings as codes into `strings`.
+    """
+
+    __slots__ = ("strings", "_string_codes", "_columns")
+
+    def __init__(self):
+        # Code 0 is reserved for None
+        self.strings = [None]
+        self._string_codes = {None: 0}
+        self._columns = {
+            field: array(_TYPECODES[kind]) for field, kind in FIELD_KINDS.items()
+        }
+
+    def __len__(self):
+        return len(self._columns["origin"])
+
+    def __iter__(self) -> Iterator[FlightV2]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> FlightV2:
+        values = []
+        for field, kind in FIELD_KINDS.items():
+            value = self._columns[field][i]
+            if kind == "str":
+                values.append(self.strings[value])
+            elif kind == "float":
+                values.append(None if math.isnan(value) else value)
+            elif kind == "bool":
+                values.append(None if value == -1 else bool(value))
+            elif kind == "int":
+                values.append(None if value == _INT_NONE else value)
+            else:
+                values.append(_epoch_to_time(value, utc=kind == "utc_time"))
+        return FlightV2(*values)
+
+    def column(self, field: str) -> array:
+        """
+        The raw array backing a `FlightV2` field.
+        """
+        return self._columns[field]
+
+    def to_flights(self) -> list:
+        """
+        :return: The batch as a list of `FlightV2`.
+        """
+        return list(self)
+
+    def _encode_string(self, value: Optional[str]) -> int:
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def append(self, flight: FlightV2):
+        """
+        Add a flight, given in `FlightV2` field order.
+        """
+        for (field, kind), value in zip(FIELD_KINDS.items(), flight):
+            if kind == "str":
+                value = self._encode_string(value)
+            elif kind == "float":
+                value = math.nan if value is None else value
+            elif kind == "bool":
+                value = -1 if value is None else int(value)
+            elif kind == "int":
+                value = _INT_NONE if value is None else value
+            else:
+                value = _time_to_epoch(value)
+            self._columns[field].append(value)
+
+    def extend(self, flights: Iterable[FlightV2]):
+        if isinstance(flights, FlightBatch):
+            self._extend_batch(flights)
+            return
+        for flight in flights:
+            self.append(flight)
+
+    def _extend_batch(self, other: "FlightBatch"):
+        # Copy numeric columns wholesale, only string codes need translating into this batch's table
+        recoded = array("I", (self._encode_string(s) for s in other.strings))
+        for field, kind in FIELD_KINDS.items():
+            if kind == "str":
+                self._columns[field].extend(
+                    array("I", (recoded[code] for code in other._columns[field]))
+                )
+            else:
+                self._columns[field].extend(other._columns[field])
+
+    @classmethod
+    def from_flights(cls, flights: Iterable[FlightV2]) -> "FlightBatch":
+        batch = cls()
+        batch.extend(flights)
+        return batch
+
+    @classmethod
+    def from_availability_response(cls, response) -> "FlightBatch":
+        """
+        Parse an availability API response straight into a batch, with the same rules as
+        `Ryanair._parse_all_flights_availability_result_as_flight_v2` but without building a dict per flight.
+        """
+        batch = cls()
+        currency = response["currency"]
+
+        if len(response["trips"]) != 1:
+            logger.warning(
+                f"There are multiple ({len(response['trips'])}) trips in the response, this is not expected - Cancelling full API call"
+            )
+            return batch
+
+        rows = []
+        encode = batch._encode_string
+        currency_code = encode(currency)
+        airport_codes = {}
+
+        def encode_airport(iata_code):
+            # (IATA code, full name) codes, resolved once per airport per batch
+            if iata_code not in airport_codes:
+                airport_codes[iata_code] = (
+                    encode(iata_code),
+                    encode(get_airport_by_iata(iata_code)),
+                )
+            return airport_codes[iata_code]
+
+        for this_date in response["trips"][0]["dates"]:
+            for this_flight in this_date["flights"]:
+                segments = this_flight.get("segments")
+                if segments is None:
+                    continue
+                if len(segments) != 1:
+                    logger.warning(
+                        f"Unexpected segments structure - ignoring entire API call"
+                    )
+                    continue
+                this_segment = segments[0]
+
+                if "origin" not in this_segment:
+                    logger.warning(
+                        f"Unexpected origin structure - ignoring this flight"
+                    )
+                    continue
+                if "destination" not in this_segment:
+                    logger.warning(
+                        f"Unexpected destination structure - ignoring this flight"
+                    )
+                    continue
+
+                times = this_segment.get("time")
+                times_utc = this_segment.get("timeUTC")
+                if (times is not None and len(times) != 2) or (
+                    times_utc is not None and len(times_utc) != 2
+                ):
+                    logger.warning(
+                        f"Unexpected segments structure - ignoring entire API call"
+                    )
+                    continue
+
+                regular_fare = this_flight.get("regularFare")
+                if regular_fare is None:
+                    fare = None
+                elif (
+                    len(regular_fare["fares"]) == 1
+                    and regular_fare["fares"][0]["type"] == "ADT"
+                ):
+                    fare = regular_fare["fares"][0]
+                else:
+                    logger.warning(
+                        f"Unexpected fare structure - ignoring entire API call"
+                    )
+                    continue
+
+                fares_left = this_flight.get("faresLeft", -1)
+                infants_left = this_flight.get("infantsLeft", -1)
+                origin_codes = encode_airport(this_segment["origin"])
+                destination_codes = encode_airport(this_segment["destination"])
+
+                if fare is None:
+                    fare_values = (math.nan, math.nan, -1, _INT_NONE, -1, -1)
+                else:
+                    fare_values = (
+                        fare["amount"],
+                        fare["publishedFare"],
+                        int(fare["hasDiscount"]),
+                        fare["discountInPercent"],
+                        int(fare["hasPromoDiscount"]),
+                        int(fare["hasBogof"]),
+                    )
+
+                # One row per flight, in FIELD_KINDS order, transposed into columns at the end
+                rows.append(
+                    (
+                        _time_to_epoch(times[0] if times else None),
+                        _time_to_epoch(times_utc[0] if times_utc else None),
+                        _time_to_epoch(times[1] if times else None),
+                        _time_to_epoch(times_utc[1] if times_utc else None),
+                        encode(this_segment.get("flightNumber")),
+                        encode(this_flight.get("operatedBy")),
+                        # Mirrors the FlightV2 parser, which only takes the duration when the flight (not segment) has one
+                        encode(
+                            this_segment.get("duration")
+                            if "duration" in this_flight
+                            else None
+                        ),
+                        *fare_values,
+                        # -1 appears to mean the API doesn't know, as in the FlightV2 parser
+                        _INT_NONE if infants_left == -1 else infants_left,
+                        _INT_NONE if fares_left == -1 else fares_left,
+                        currency_code,
+                        *origin_codes,
+                        *destination_codes,
+                    )
+                )
+
+        if rows:
+            for field, values in zip(FIELD_KINDS, zip(*rows)):
+                batch._columns[field].extend(values)
+
+        logger.debug(f"Found {len(batch)} flights in the response")
+        return batch
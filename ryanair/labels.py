@@ -0,0 +1,39 @@
+"""
+Interned labels for parsed results.
+
+Every fare names its airports and flight number, and the same few hundred airports and few thousand flight numbers
+come back in every response. Rather than formatting a new "Name, Country" or "FR 1234" string per fare, parsers look
+them up here, so that all results share one string object per label. The tables only ever hold one entry per
+airport or flight number seen.
+"""
+import sys
+
+# IATA code -> (interned IATA code, interned "Name, Country")
+_fare_airports = {}
+# Flight number as in the fares API, e.g. "FR1234" -> interned "FR 1234"
+_flight_numbers = {}
+
+
+def fare_airport(iata_code: str, name: str, country_name: str) -> tuple:
+    """
+    The interned IATA code and full name label of an airport from a fares response.
+    """
+    airport = _fare_airports.get(iata_code)
+    if airport is None:
+        airport = _fare_airports[iata_code] = (
+            sys.intern(iata_code),
+            sys.intern(f"{name}, {country_name}"),
+        )
+    return airport
+
+
+def flight_number_label(flight_number: str) -> str:
+    """
+    A flight number from the fares API, e.g. "FR1234", as the availability API formats them: "FR 1234".
+    """
+    label = _flight_numbers.get(flight_number)
+    if label is None:
+        label = _flight_numbers[flight_number] = sys.intern(
+            f"{flight_number[:2]} {flight_number[2:]}"
+        )
+    return label
@@ -0,0 +1,361 @@
+"""
+Instrumentation hooks for the Ryanair clients.
+
+Clients report what they do to a `MetricsHook`: each HTTP request (latency, status, bytes received), retries and
+give-ups from the retry policy, proxy switches, "Availability declined" responses, cache lookups, queries coalesced
+into an identical one in flight, and the time spent decoding and parsing responses. Subclass `MetricsHook` to forward
+these events anywhere, or use the bundled `RequestMetrics` collector, which keeps per-endpoint counters and histograms
+and can render them in the Prometheus/OpenMetrics text format:
+
+    metrics = RequestMetrics()
+    api = Ryanair(metrics=metrics)
+    ...
+    print(metrics.to_openmetrics())
+    start_metrics_server(metrics, port=9100)  # Or expose them for scraping
+"""
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Matched against URL paths in order, first match wins
+_ENDPOINT_PATTERNS = (
+    ("/availabilities", "scheduled_dates"),
+    ("/oneWayFares", "one_way_fares"),
+    ("/roundTripFares", "round_trip_fares"),
+    ("/availability", "availability"),
+    ("/timtbl/", "schedules"),
+    ("/searchWidget/routes/", "destinations"),
+    ("/airports/", "airports"),
+)
+
+# Seconds
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_PARSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+def endpoint_name(url: str) -> str:
+    """
+    A short, low-cardinality name for the API endpoint a URL belongs to, e.g. "one_way_fares".
+    """
+    path = urlparse(url).path
+    for marker, name in _ENDPOINT_PATTERNS:
+        if marker in path:
+            return name
+    return "session" if path in ("", "/") else "other"
+
+
+class MetricsHook:
+    """
+    Receives instrumentation events from a client. All methods are no-ops, override the ones of interest.
+    Methods may be called concurrently from several threads.
+    """
+
+    def on_request(
+        self,
+        endpoint: str,
+        latency: float,
+        status_code: Optional[int],
+        response_bytes: int,
+    ):
+        """
+        An HTTP request completed, or failed without a response (`status_code` None).
+        """
+
+    def on_retry(self, endpoint: str, tries: int, wait: float):
+        """
+        A query failed and will be retried after `wait` seconds.
+        """
+
+    def on_giveup(self, endpoint: str, tries: int):
+        """
+        A query failed `tries` times and was abandoned.
+        """
+
+    def on_proxy_switch(self, proxy):
+        """
+        The client switched to a new proxy (None for a direct connection).
+        """
+
+    def on_declined(self, endpoint: str):
+        """
+        The availability API responded with "Availability declined".
+        """
+
+    def on_cache_lookup(self, endpoint: str, hit: bool):
+        """
+        A cacheable query was looked up in the response cache.
+        """
+
+    def on_coalesced(self, endpoint: str):
+        """
+        A query was answered by an identical one already in flight, instead of sending a request of its own.
+        """
+
+    def on_parse(self, endpoint: str, stage: str, seconds: float):
+        """
+        Time spent turning a response into results, outside of the network.
+        `stage` is "decode" for JSON decoding, or "parse" for building Flight/FlightV2/Trip objects.
+        """
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, as in Prometheus.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list:
+        """
+        (upper bound, count of observations <= upper bound) pairs, ending with +Inf.
+        """
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative_counts():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class RequestMetrics(MetricsHook):
+    """
+    Thread-safe, in-memory collector of per-endpoint counters and histograms.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        parse_buckets: Sequence[float] = DEFAULT_PARSE_BUCKETS,
+    ):
+        self.latency_buckets = latency_buckets
+        self.parse_buckets = parse_buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}  # (endpoint, status) -> count
+            self.response_bytes = {}  # endpoint -> bytes
+            self.latency = {}  # endpoint -> Histogram
+            self.parse_time = {}  # (endpoint, stage) -> Histogram
+            self.retries = {}  # endpoint -> count
+            self.giveups = {}  # endpoint -> count
+            self.declined = {}  # endpoint -> count
+            self.cache_lookups = {}  # (endpoint, hit) -> count
+            self.coalesced = {}  # endpoint -> count
+            self.proxy_switches = 0
+
+    @staticmethod
+    def _increment(counter: dict, key, amount=1):
+        counter[key] = counter.get(key, 0) + amount
+
+    def on_request(self, endpoint, latency, status_code, response_bytes):
+        with self._lock:
+            self._increment(self.requests, (endpoint, status_code))
+            self._increment(self.response_bytes, endpoint, response_bytes)
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram(self.latency_buckets)
+            self.latency[endpoint].observe(latency)
+
+    def on_retry(self, endpoint, tries, wait):
+        with self._lock:
+            self._increment(self.retries, endpoint)
+
+    def on_giveup(self, endpoint, tries):
+        with self._lock:
+            self._increment(self.giveups, endpoint)
+
+    def on_proxy_switch(self, proxy):
+        with self._lock:
+            self.proxy_switches += 1
+
+    def on_declined(self, endpoint):
+        with self._lock:
+            self._increment(self.declined, endpoint)
+
+    def on_cache_lookup(self, endpoint, hit):
+        with self._lock:
+            self._increment(self.cache_lookups, (endpoint, hit))
+
+    def on_coalesced(self, endpoint):
+        with self._lock:
+            self._increment(self.coalesced, endpoint)
+
+    def on_parse(self, endpoint, stage, seconds):
+        with self._lock:
+            if (endpoint, stage) not in self.parse_time:
+                self.parse_time[(endpoint, stage)] = Histogram(self.parse_buckets)
+            self.parse_time[(endpoint, stage)].observe(seconds)
+
+    def summary(self) -> dict:
+        """
+        Per-endpoint totals: request count, p50/p99 latency (bucket upper bounds), network and parse seconds, bytes.
+        Handy for seeing where the time in a sweep actually goes.
+        """
+        with self._lock:
+            summary = {}
+            for endpoint, histogram in self.latency.items():
+                summary[endpoint] = {
+                    "requests": histogram.count,
+                    "latency_p50": histogram.quantile(0.5),
+                    "latency_p99": histogram.quantile(0.99),
+                    "network_seconds": histogram.sum,
+                    "decode_seconds": 0.0,
+                    "parse_seconds": 0.0,
+                    "bytes": self.response_bytes.get(endpoint, 0),
+                    "retries": self.retries.get(endpoint, 0),
+                    "declined": self.declined.get(endpoint, 0),
+                    "coalesced": self.coalesced.get(endpoint, 0),
+                }
+            for (endpoint, stage), histogram in self.parse_time.items():
+                entry = summary.setdefault(endpoint, {"requests": 0})
+                entry[f"{stage}_seconds"] = histogram.sum
+            return summary
+
+    def to_openmetrics(self, prefix: str = "ryanair") -> str:
+        """
+        Render the collected metrics in the Prometheus/OpenMetrics text exposition format.
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def labels(**values):
+            return (
+                "{"
+                + ",".join(f'{key}="{value}"' for key, value in values.items())
+                + "}"
+            )
+
+        def histogram_lines(name, histogram, **label_values):
+            for bound, total in histogram.cumulative_counts():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{prefix}_{name}_bucket{labels(**label_values, le=le)} {total}"
+                )
+            lines.append(f"{prefix}_{name}_sum{labels(**label_values)} {histogram.sum}")
+            lines.append(
+                f"{prefix}_{name}_count{labels(**label_values)} {histogram.count}"
+            )
+
+        with self._lock:
+            family("requests", "counter", "HTTP requests sent to the API.")
+            for (endpoint, status), count in sorted(self.requests.items(), key=str):
+                lines.append(
+                    f"{prefix}_requests_total{labels(endpoint=endpoint, status=status or 'error')} {count}"
+                )
+
+            family("response_bytes", "counter", "Bytes received from the API.")
+            for endpoint, count in sorted(self.response_bytes.items()):
+                lines.append(
+                    f"{prefix}_response_bytes_total{labels(endpoint=endpoint)} {count}"
+                )
+
+            family(
+                "request_latency_seconds",
+                "histogram",
+                "Time from sending a request to receiving the response.",
+            )
+            for endpoint, histogram in sorted(self.latency.items()):
+                histogram_lines("request_latency_seconds", histogram, endpoint=endpoint)
+
+            family(
+                "parse_seconds",
+                "histogram",
+                "Time spent decoding and parsing responses.",
+            )
+            for (endpoint, stage), histogram in sorted(self.parse_time.items()):
+                histogram_lines(
+                    "parse_seconds", histogram, endpoint=endpoint, stage=stage
+                )
+
+            for name, counter, help_text in (
+                ("retries", self.retries, "Queries retried by the retry policy."),
+                (
+                    "giveups",
+                    self.giveups,
+                    "Queries abandoned after exhausting their retries.",
+                ),
+                ("declined", self.declined, "Availability declined responses."),
+                (
+                    "coalesced",
+                    self.coalesced,
+                    "Queries answered by an identical one already in flight.",
+                ),
+            ):
+                family(name, "counter", help_text)
+                for endpoint, count in sorted(counter.items()):
+                    lines.append(
+                        f"{prefix}_{name}_total{labels(endpoint=endpoint)} {count}"
+                    )
+
+            family("cache_lookups", "counter", "Response cache lookups.")
+            for (endpoint, hit), count in sorted(self.cache_lookups.items()):
+                result = "hit" if hit else "miss"
+                lines.append(
+                    f"{prefix}_cache_lookups_total{labels(endpoint=endpoint, result=result)} {count}"
+                )
+
+            family("proxy_switches", "counter", "Times the client switched proxy.")
+            lines.append(f"{prefix}_proxy_switches_total {self.proxy_switches}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(
+    metrics: RequestMetrics, port: int, host: str = ""
+) -> ThreadingHTTPServer:
+    """
+    Serve `metrics.to_openmetrics()` over HTTP from a background thread, for Prometheus to scrape.
+
+    :return: The server, call `shutdown()` on it to stop serving.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.to_openmetrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header(
+                "Content-Type",
+                "application/openmetrics-text; version=1.0.0; charset=utf-8",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="ryanair-metrics", daemon=True
+    ).start()
+    return server
@@ -0,0 +1,216 @@
+"""
+Availability queries planned around published schedules.
+
+The availability API answers for a week at a time, and a lot of those weeks turn out empty: seasonal routes, routes
+that only fly a few days a week, or routes that don't exist at all. `SchedulePlanner` first looks at which dates
+each route actually operates on, which costs one cheap (and cacheable) query per origin and per route, and then only
+queries availability for windows that start on a scheduled date, sized to end on the last scheduled date within
+the week:
+
+    planner = SchedulePlanner(api)
+    planner.plan("DUB", "STN", "2023-04-01", "2023-06-30")  # [(date(2023, 4, 1), 6), ...]
+    flights = planner.get_all_flights_range("DUB", "STN", "2023-04-01", "2023-06-30")
+
+When a schedule can't be fetched, the planner doesn't prune anything it can't be sure of, and queries every week.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Iterable, Optional, Union
+
+from ryanair.ryanair import MAX_FLEX_DAYS_OUT, _RyanairBase
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulePlanner:
+    """
+    Plans and runs availability queries for a `Ryanair` client, skipping dates with no scheduled flights.
+    Schedules are kept in memory for `max_age` seconds. Thread-safe.
+    """
+
+    def __init__(self, api, max_age: float = 24 * 60 * 60):
+        """
+        :param api: A `Ryanair` client.
+        :param max_age: How long fetched schedules are reused, in seconds.
+        """
+        self.api = api
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # origin -> (fetched at, {destination: (first flight date, last flight date)} or None)
+        self._periods = {}
+        # (origin, destination) -> (fetched at, sorted scheduled dates or None)
+        self._dates = {}
+
+    def _memoized(self, memo: dict, key, fetch):
+        with self._lock:
+            entry = memo.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.max_age:
+            return entry[1]
+
+        value = fetch()
+        with self._lock:
+            memo[key] = (time.monotonic(), value)
+        return value
+
+    def operating_periods(self, origin: str) -> Optional[dict]:
+        """
+        `{destination: (first flight date, last flight date)}` for every route from `origin`,
+        or None if the timetable couldn't be fetched.
+        """
+
+        def fetch():
+            schedules = self.api.get_flight_schedules(origin)
+            if not schedules or not isinstance(schedules, dict):
+                return None
+            periods = {}
+            for destination, period in schedules.items():
+                try:
+                    periods[destination] = (
+                        date.fromisoformat(period["firstFlightDate"]),
+                        date.fromisoformat(period["lastFlightDate"]),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    logger.debug(
+                        f"Unexpected schedule period for {origin}-{destination}: {period}"
+                    )
+            return periods
+
+        return self._memoized(self._periods, origin, fetch)
+
+    def scheduled_dates(self, origin: str, destination: str) -> Optional[list]:
+        """
+        Sorted dates with flights scheduled from `origin` to `destination`, or None if they couldn't be fetched.
+        """
+
+        def fetch():
+            dates = self.api.get_scheduled_dates_for_route(origin, destination)
+            if not dates:
+                return None
+            try:
+                return sorted({date.fromisoformat(d) for d in dates})
+            except (TypeError, ValueError):
+                logger.warning(f"Unexpected scheduled dates for {origin}-{destination}")
+                return None
+
+        return self._memoized(self._dates, (origin, destination), fetch)
+
+    def plan(
+        self,
+        origin: str,
+        destination: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+    ) -> list:
+        """
+        The availability queries needed to see every scheduled flight from `start` to `end` (inclusive).
+
+        :return: `(date_out, flex_days_out)` windows, as few as possible, each starting on a scheduled date.
+        """
+        start, end = _RyanairBase._parse_date(start), _RyanairBase._parse_date(end)
+        if start > end:
+            return []
+
+        periods = self.operating_periods(origin)
+        if periods is not None:
+            period = periods.get(destination)
+            if period is None or period[1] < start or period[0] > end:
+                logger.debug(
+                    f"No {origin}-{destination} flights scheduled from {start} to {end}"
+                )
+                return []
+
+        dates = self.scheduled_dates(origin, destination)
+        if dates is None:
+            # Not enough known to prune safely, query every week
+            return _RyanairBase._availability_windows(start, end)
+
+        dates = [d for d in dates if start <= d <= end]
+        windows = []
+        i = 0
+        # Greedily cover the dates with week-long windows, each from the first date not yet covered
+        while i < len(dates):
+            first = dates[i]
+            last = first
+            while i < len(dates) and (dates[i] - first).days <= MAX_FLEX_DAYS_OUT:
+                last = dates[i]
+                i += 1
+            windows.append((first, (last - first).days))
+        return windows
+
+    def plan_many(
+        self,
+        routes: Iterable[tuple],
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+    ) -> list:
+        """
+        `plan` for several `(origin, destination)` routes.
+
+        :return: `(origin, destination, date_out, flex_days_out)` queries.
+        """
+        return [
+            (origin, destination, date_out, flex_days_out)
+            for origin, destination in routes
+            for date_out, flex_days_out in self.plan(origin, destination, start, end)
+        ]
+
+    def get_all_flights_range(
+        self,
+        origin: str,
+        destination: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        custom_params: Optional[dict] = None,
+        max_workers: int = 4,
+    ) -> list:
+        """
+        Same as `Ryanair.get_all_flights_range`, but only querying windows with scheduled flights.
+        """
+        return self.get_all_flights_for_routes(
+            [(origin, destination)], start, end, custom_params, max_workers
+        ).get((origin, destination), [])
+
+    def get_all_flights_for_routes(
+        self,
+        routes: Iterable[tuple],
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        custom_params: Optional[dict] = None,
+        max_workers: int = 4,
+    ) -> dict:
+        """
+        All flights on several `(origin, destination)` routes from `start` to `end`, with every route's
+        availability queries run on one pool of threads.
+
+        :return: `{(origin, destination): [FlightV2, ...]}`, each list deduplicated and sorted by departure time.
+        """
+        routes = list(dict.fromkeys(routes))
+        queries = self.plan_many(routes, start, end)
+        logger.info(
+            f"Planned {len(queries)} availability queries for {len(routes)} route(s) from {start} to {end}"
+        )
+
+        def query(planned):
+            origin, destination, date_out, flex_days_out = planned
+            return self.api.get_all_flights(
+                origin,
+                date_out,
+                destination,
+                {**(custom_params or {}), "FlexDaysOut": flex_days_out},
+            )
+
+        flight_lists = {route: [] for route in routes}
+        if queries:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(queries))
+            ) as executor:
+                for planned, flights in zip(queries, executor.map(query, queries)):
+                    flight_lists[planned[:2]].append(flights)
+
+        return {
+            route: _RyanairBase._merge_flight_windows(flights, start, end)
+            for route, flights in flight_lists.items()
+        }
@@ -0,0 +1,289 @@
+"""
+A per-client pool of HTTP proxies, health-checked in the background.
+
+Each proxy is scored on its recent latency and success rate, from both background health checks and the outcome of
+real requests. Requests are spread across the healthy proxies in proportion to their score, so a multi-threaded sweep
+fans out over several egress IPs rather than queueing behind one, and a proxy that starts failing simply stops being
+picked. When too few proxies are healthy, more are fetched from an optional `source` in the background, e.g.
+`free_proxy.get_first_operational_proxy`, without blocking the request that noticed.
+
+    pool = ProxyPool(["http://10.0.0.1:3128", "http://10.0.0.2:3128"])
+    pool.start()  # Periodic health checks, optional
+    api = Ryanair(proxy_pool=pool)
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, Union
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# A small, cheap response from the same site the clients query
+DEFAULT_CHECK_URL = "https://www.ryanair.com/api/views/locate/5/countries/en"
+
+# Weight given to the newest observation in the moving averages
+_SMOOTHING = 0.3
+# Latency assumed for proxies when none have been measured yet, in seconds
+_DEFAULT_LATENCY = 1.0
+
+
+def normalize_proxy(proxy: Union[str, dict]) -> dict:
+    """
+    A proxy as a `requests` style `{"http": url, "https": url}` dict.
+    """
+    if isinstance(proxy, str):
+        return {"http": proxy, "https": proxy}
+    return dict(proxy)
+
+
+def _proxy_key(proxy: dict) -> str:
+    return proxy.get("https") or proxy.get("http")
+
+
+class ProxyStats:
+    """
+    Health of a single proxy.
+    """
+
+    __slots__ = (
+        "proxy",
+        "latency",
+        "success_rate",
+        "consecutive_failures",
+        "last_used",
+    )
+
+    def __init__(self, proxy: dict):
+        self.proxy = proxy
+        # Smoothed seconds per successful request, None until measured
+        self.latency = None
+        self.success_rate = 1.0
+        self.consecutive_failures = 0
+        self.last_used = 0.0
+
+    def score(self, default_latency: float = _DEFAULT_LATENCY) -> float:
+        """
+        Higher is better: successful requests per second of latency.
+
+        :param default_latency: Latency to assume if this proxy hasn't been measured yet.
+        """
+        latency = self.latency if self.latency is not None else default_latency
+        return self.success_rate / max(latency, 0.01)
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        self.success_rate += _SMOOTHING * (float(success) - self.success_rate)
+        if success:
+            self.consecutive_failures = 0
+            if latency is not None:
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency += _SMOOTHING * (latency - self.latency)
+        else:
+            self.consecutive_failures += 1
+
+
+class ProxyPool:
+    """
+    Thread-safe set of proxies, picked at random weighted by health score.
+    """
+
+    def __init__(
+        self,
+        proxies: Iterable[Union[str, dict]] = (),
+        source: Optional[Callable[[], Union[str, dict, None]]] = None,
+        min_healthy: int = 1,
+        max_failures: int = 3,
+        min_success_rate: float = 0.5,
+        check_url: str = DEFAULT_CHECK_URL,
+        check_timeout: float = 10.0,
+        check_interval: float = 300.0,
+        max_workers: int = 8,
+    ):
+        """
+        :param proxies: Initial proxies, as URLs or `requests` style dicts.
+        :param source: Optional callable returning a new proxy (or None), used to top the pool up.
+        :param min_healthy: Fetch more proxies from `source` when fewer than this many are healthy.
+        :param max_failures: Consecutive failures after which a proxy is considered unhealthy.
+        :param min_success_rate: Smoothed success rate below which a proxy is considered unhealthy.
+        :param check_url: URL fetched through each proxy by health checks.
+        :param check_timeout: Seconds before a health check counts as failed.
+        :param check_interval: Seconds between background health checks, see `start`.
+        :param max_workers: Number of proxies health-checked concurrently.
+        """
+        self.source = source
+        self.min_healthy = min_healthy
+        self.max_failures = max_failures
+        self.min_success_rate = min_success_rate
+        self.check_url = check_url
+        self.check_timeout = check_timeout
+        self.check_interval = check_interval
+        self.max_workers = max_workers
+
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._stopped = threading.Event()
+        self._checker = None
+
+        for proxy in proxies:
+            self.add(proxy)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def add(self, proxy: Union[str, dict]):
+        proxy = normalize_proxy(proxy)
+        with self._lock:
+            self._stats.setdefault(_proxy_key(proxy), ProxyStats(proxy))
+
+    def remove(self, proxy: Union[str, dict]):
+        with self._lock:
+            self._stats.pop(_proxy_key(normalize_proxy(proxy)), None)
+
+    def stats(self) -> list:
+        """
+        :return: Every proxy's `ProxyStats`, best first.
+        """
+        with self._lock:
+            default_latency = self._default_latency()
+            return sorted(
+                self._stats.values(),
+                key=lambda s: s.score(default_latency),
+                reverse=True,
+            )
+
+    def _default_latency(self) -> float:
+        # Unmeasured proxies are assumed to be as fast as the average, so they get tried rather than starved
+        measured = [s.latency for s in self._stats.values() if s.latency is not None]
+        return sum(measured) / len(measured) if measured else _DEFAULT_LATENCY
+
+    def _is_healthy(self, stats: ProxyStats) -> bool:
+        return (
+            stats.consecutive_failures < self.max_failures
+            and stats.success_rate >= self.min_success_rate
+        )
+
+    def healthy(self) -> list:
+        """
+        :return: The proxies currently considered healthy, best first.
+        """
+        return [s.proxy for s in self.stats() if self._is_healthy(s)]
+
+    def get(self) -> Optional[dict]:
+        """
+        Pick a healthy proxy for the next request, or None to connect directly if there are none.
+        """
+        with self._lock:
+            candidates = [s for s in self._stats.values() if self._is_healthy(s)]
+            if candidates:
+                default_latency = self._default_latency()
+                chosen = random.choices(
+                    candidates, weights=[s.score(default_latency) for s in candidates]
+                )[0]
+                chosen.last_used = time.monotonic()
+
+        if len(candidates) < self.min_healthy:
+            self.refill()
+        return chosen.proxy if candidates else None
+
+    def report(
+        self, proxy: Optional[dict], success: bool, latency: Optional[float] = None
+    ):
+        """
+        Record the outcome of a request made through `proxy`. Direct requests (None) are ignored.
+        """
+        if proxy is None:
+            return
+        with self._lock:
+            stats = self._stats.get(_proxy_key(proxy))
+            if stats is None:
+                return
+            stats.record(success, latency)
+            if not success and not self._is_healthy(stats):
+                logger.info(f"Proxy {_proxy_key(proxy)} is unhealthy")
+
+    def check(self, proxy: dict) -> bool:
+        """
+        Health-check a single proxy, recording the result.
+        """
+        started = time.monotonic()
+        try:
+            response = requests.get(
+                self.check_url, proxies=proxy, timeout=self.check_timeout
+            )
+            success = response.ok
+        except requests.RequestException:
+            success = False
+        self.report(proxy, success, time.monotonic() - started)
+        return success
+
+    def check_all(self) -> int:
+        """
+        Health-check every proxy concurrently.
+
+        :return: The number of proxies that passed.
+        """
+        with self._lock:
+            proxies = [s.proxy for s in self._stats.values()]
+        if not proxies:
+            return 0
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(proxies)),
+            thread_name_prefix="ryanair-proxy-check",
+        ) as executor:
+            return sum(executor.map(self.check, proxies))
+
+    def refill(self):
+        """
+        Fetch a new proxy from `source` in a background thread, unless a fetch is already under way.
+        """
+        if self.source is None:
+            return
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+        threading.Thread(
+            target=self._refill, name="ryanair-proxy-refill", daemon=True
+        ).start()
+
+    def _refill(self):
+        try:
+            logger.info(f"Requesting a proxy from {self.source!r}")
+            proxy = self.source()
+            if proxy:
+                self.add(proxy)
+                logger.info(f"Added proxy {_proxy_key(normalize_proxy(proxy))}")
+        except Exception as e:
+            logger.warning(f"Failed to get proxy: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def start(self):
+        """
+        Health-check every proxy now and then every `check_interval` seconds, from a background thread.
+        """
+        if self._checker is not None and self._checker.is_alive():
+            return
+        self._stopped.clear()
+        self._checker = threading.Thread(
+            target=self._check_forever, name="ryanair-proxy-checker", daemon=True
+        )
+        self._checker.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _check_forever(self):
+        while not self._stopped.is_set():
+            healthy = self.check_all()
+            logger.debug(f"{healthy}/{len(self)} proxies passed their health check")
+            if healthy < self.min_healthy:
+                self.refill()
+            self._stopped.wait(self.check_interval)
@@ -0,0 +1,160 @@
+"""
+Client-side rate limiting for the Ryanair APIs.
+
+Each endpoint family gets its own token bucket, since they are rate-limited very differently: the services-api
+fare finder endpoints are fairly generous, while the www booking availability API declines requests quickly.
+Buckets adapt their rate (additive increase, multiplicative decrease) when a request is throttled, i.e. answered
+with HTTP 429 or "Availability declined", so a client settles at the highest rate the API will sustain.
+
+A single `RateLimiter` is thread-safe and can also be awaited from asyncio tasks, so share one instance between
+every client talking to the API from the same IP address:
+
+    limiter = RateLimiter()
+    api = Ryanair(rate_limiter=limiter)
+    async_api = AsyncRyanair(rate_limiter=limiter)
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Requests per second, and burst size, for each endpoint family. These are conservative starting points,
+# every family is allowed to creep up to twice its starting rate if the API keeps up.
+DEFAULT_RATE_LIMITS = {
+    # services-api.ryanair.com/farfnd: oneWayFares, roundTripFares
+    "services": {"rate": 5.0, "burst": 10, "max_rate": 10.0},
+    # www.ryanair.com/api/booking: availability, tightly limited
+    "availability": {"rate": 0.5, "burst": 2, "min_rate": 0.05, "max_rate": 1.0},
+    # other www.ryanair.com/api endpoints: timtbl, locate, farfnd
+    "www": {"rate": 2.0, "burst": 5, "max_rate": 4.0},
+}
+
+
+def endpoint_family(url: str) -> str:
+    """
+    The endpoint family (a key of `DEFAULT_RATE_LIMITS`) a URL belongs to.
+    """
+    parsed = urlparse(url)
+    if "/booking/" in parsed.path:
+        return "availability"
+    if (parsed.hostname or "").startswith("services-api."):
+        return "services"
+    return "www"
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket with an adaptive refill rate.
+
+    Tokens are reserved up front, so concurrent callers queue up in order rather than all waking at once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        increase: Optional[float] = None,
+        decrease: float = 0.5,
+    ):
+        """
+        :param rate: Initial requests per second.
+        :param burst: Maximum number of requests that can be made back to back.
+        :param min_rate: Floor for the rate when throttled. Defaults to a tenth of `rate`.
+        :param max_rate: Ceiling for the rate. Defaults to `rate`.
+        :param increase: Requests per second added after each successful request. Defaults to 2% of `max_rate`.
+        :param decrease: Factor the rate is multiplied by when a request is throttled.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase if increase is not None else self.max_rate / 50
+        self.decrease = decrease
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        """
+        Take a token, possibly going into debt.
+
+        :return: Seconds to wait before the reserved token is actually available.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # Don't let a saved-up burst carry on hammering an API which has just pushed back
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    One `TokenBucket` per endpoint family.
+    """
+
+    def __init__(self, limits: Optional[dict] = None):
+        """
+        :param limits: Overrides for `DEFAULT_RATE_LIMITS`, as `{family: TokenBucket keyword arguments}`.
+        """
+        limits = {**DEFAULT_RATE_LIMITS, **(limits or {})}
+        self.buckets = {
+            family: TokenBucket(**kwargs) for family, kwargs in limits.items()
+        }
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        return self.buckets[endpoint_family(url)]
+
+    def acquire(self, url: str):
+        """
+        Block until a request to `url` is allowed.
+        """
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url: str):
+        """
+        Wait, without blocking the event loop, until a request to `url` is allowed.
+        """
+        await self.bucket_for(url).acquire_async()
+
+    def on_success(self, url: str):
+        self.bucket_for(url).on_success()
+
+    def on_throttled(self, url: str):
+        bucket = self.bucket_for(url)
+        bucket.on_throttled()
+        logger.info(
+            f"Throttled by {endpoint_family(url)} API, slowing down to {bucket.rate:.2f} requests/s"
+        )
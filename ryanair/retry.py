@@ -0,0 +1,224 @@
+"""
+Retry policy for API queries.
+
+`RetryPolicy` decides whether and when a failed query is tried again:
+
+- Only errors that may go away are retried: network errors, timeouts, HTTP 5xx and 429 (see `ryanair.exceptions`).
+  HTTP 4xx responses and responses that fail to decode are raised straight away.
+- Waits between attempts use decorrelated jitter, so clients that failed together don't retry together, and are
+  never shorter than a `Retry-After` the server sent.
+- A `RetryBudget` caps retries at a fraction of queries across every thread using the policy, so that when the API
+  is struggling, clients back off instead of multiplying their traffic.
+
+Each client has a policy of its own by default. Pass the same policy to several clients to share its budget:
+
+    policy = RetryPolicy(max_tries=4, budget=RetryBudget(ratio=0.1))
+    api = Ryanair(retry_policy=policy)
+    async_api = AsyncRyanair(retry_policy=policy)
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from ryanair.exceptions import RyanairException
+
+logger = logging.getLogger(__name__)
+
+# Called with (error, attempt that failed, seconds until the next one)
+RetryCallback = Callable[[Exception, int, float], None]
+# Called with (error, number of attempts made)
+GiveUpCallback = Callable[[Exception, int], None]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header, given either as a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """
+    Thread-safe token bucket limiting retries to a fraction of queries.
+
+    Every query deposits `ratio` tokens and every retry withdraws one. The balance also refills by
+    `min_per_second`, so that a client making few queries can still retry them.
+    """
+
+    def __init__(
+        self, ratio: float = 0.2, min_per_second: float = 1.0, max_balance: float = 10.0
+    ):
+        """
+        :param ratio: Retries allowed per query, in the long run.
+        :param min_per_second: Retries allowed per second regardless of the number of queries.
+        :param max_balance: Most retries that can be saved up for a burst of failures.
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._balance = max_balance
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float):
+        now = time.monotonic()
+        self._balance = min(
+            self.max_balance,
+            self._balance + tokens + (now - self._updated) * self.min_per_second,
+        )
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        :return: Whether a retry may go ahead. If so, it has been paid for.
+        """
+        with self._lock:
+            self._refill(0.0)
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+    @property
+    def balance(self) -> float:
+        with self._lock:
+            self._refill(0.0)
+            return self._balance
+
+
+class RetryPolicy:
+    """
+    Which errors to retry, how long to wait between attempts, and how many retries to allow overall.
+    Safe to share between threads, clients and event loops.
+    """
+
+    def __init__(
+        self,
+        max_tries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_retry_after: float = 60.0,
+        budget: Optional[RetryBudget] = None,
+    ):
+        """
+        :param max_tries: Attempts per query, including the first.
+        :param base_delay: Shortest wait between attempts, in seconds.
+        :param max_delay: Longest wait chosen by the policy itself, in seconds.
+        :param max_retry_after: Give up rather than wait when the server asks for longer than this, in seconds.
+        :param budget: Shared limit on retries, defaults to a `RetryBudget()` of this policy's own.
+            Pass `RetryBudget(min_per_second=float("inf"))` for no limit.
+        """
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        if isinstance(error, RyanairException):
+            return error.retryable
+        # Transports are expected to raise TransientError, these are a safety net for anything they missed
+        return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+    def next_wait(
+        self, error: Exception, attempt: int, previous_wait: float
+    ) -> Optional[float]:
+        """
+        :param attempt: Number of the attempt that just failed, from 1.
+        :param previous_wait: Wait before that attempt, 0 for the first.
+        :return: Seconds to wait before the next attempt, or None to give up.
+        """
+        if attempt >= self.max_tries or not self.is_retryable(error):
+            return None
+
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(
+                f"Not retrying, as the server asked to wait {retry_after:.0f}s: {error}"
+            )
+            return None
+
+        if not self.budget.withdraw():
+            logger.warning(f"Not retrying, as the retry budget is spent: {error}")
+            return None
+
+        # Decorrelated jitter: random between the base delay and three times the previous wait
+        wait = min(
+            self.max_delay,
+            random.uniform(self.base_delay, max(self.base_delay, previous_wait * 3)),
+        )
+        return max(wait, retry_after or 0.0)
+
+    def call(
+        self,
+        fn: Callable,
+        on_retry: Optional[RetryCallback] = None,
+        on_giveup: Optional[GiveUpCallback] = None,
+    ):
+        """
+        Call `fn()` until it succeeds or the policy gives up, in which case its last error is raised.
+        """
+        self.budget.deposit()
+        wait = 0.0
+        attempt = 1
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                wait = self.next_wait(e, attempt, wait)
+                if wait is None:
+                    if on_giveup is not None:
+                        on_giveup(e, attempt)
+                    raise
+                if on_retry is not None:
+                    on_retry(e, attempt, wait)
+            time.sleep(wait)
+            attempt += 1
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable],
+        on_retry: Optional[RetryCallback] = None,
+        on_giveup: Optional[GiveUpCallback] = None,
+    ):
+        """
+        Async version of `call`, for a coroutine function `fn`.
+        """
+        self.budget.deposit()
+        wait = 0.0
+        attempt = 1
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                wait = self.next_wait(e, attempt, wait)
+                if wait is None:
+                    if on_giveup is not None:
+                        on_giveup(e, attempt)
+                    raise
+                if on_retry is not None:
+                    on_retry(e, attempt, wait)
+            await asyncio.sleep(wait)
+            attempt += 1
@@ -0,0 +1,396 @@
+"""
+An index of the Ryanair route network, for finding connections the API won't.
+
+`RouteGraph` maps each airport's IATA code to the airports it has direct flights to, weighted by great-circle distance.
+It is built once from `get_active_airports` and `get_destinations` (one query per airport), and is best saved to disk
+and reused, as the network changes slowly:
+
+    api = Ryanair(currency="EUR")
+    graph = RouteGraph.load_or_build("~/.cache/ryanair-routes.json", api)
+    graph.find_routes("DUB", "BGY", max_stops=1)
+    graph.cheapest_itineraries(api, "DUB", "BGY", "2023-04-01", "2023-04-07", max_stops=1)
+
+Itineraries are self-transfers: separate tickets, with no protection if a connection is missed.
+"""
+import heapq
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import count
+from typing import Optional, Union
+
+from ryanair.airport_utils import get_airport_timezone, get_distance_between_airports
+from ryanair.ryanair import _RyanairBase
+from ryanair.types import Itinerary
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 1
+
+# The most the clocks at two airports on the network can differ by, e.g. the Canaries and Cyprus. Connections between
+# airports whose time zones aren't known are checked allowing for it either way.
+TIMEZONE_MARGIN = timedelta(hours=3)
+
+
+def estimated_flight_time(distance_km: float) -> timedelta:
+    """
+    Rough block time for a flight, as the fares API only gives departure times: taxiing plus ~800km/h cruise.
+    """
+    return timedelta(minutes=30 + distance_km / 800 * 60)
+
+
+@lru_cache(maxsize=None)
+def _airport_zone(iata_code: str):
+    name = get_airport_timezone(iata_code)
+    if name is None or ZoneInfo is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def local_arrival_time(
+    departure_time: datetime, origin: str, destination: str, flight_time: timedelta
+) -> tuple:
+    """
+    When a flight leaving `origin` at `departure_time`, local time, lands at `destination`, on the clock there.
+
+    :return: `(arrival time, margin)`, where the arrival time may be off by up to `margin` either way, if either
+        airport's time zone isn't known.
+    """
+    origin_zone, destination_zone = _airport_zone(origin), _airport_zone(destination)
+    if origin_zone is None or destination_zone is None:
+        return departure_time + flight_time, TIMEZONE_MARGIN
+    arrival_utc = (
+        departure_time.replace(tzinfo=origin_zone).astimezone(timezone.utc)
+        + flight_time
+    )
+    return arrival_utc.astimezone(destination_zone).replace(tzinfo=None), timedelta(0)
+
+
+class RouteGraph:
+    """
+    Adjacency index of direct routes between airports, by IATA code.
+    """
+
+    def __init__(self, routes: dict, built_at: Optional[float] = None):
+        """
+        :param routes: `{origin: [destination, ...]}` for every airport with departures.
+        :param built_at: When the routes were fetched, as a UNIX timestamp. Defaults to now.
+        """
+        self.routes = {
+            origin: sorted(set(destinations)) for origin, destinations in routes.items()
+        }
+        self.built_at = built_at if built_at is not None else time.time()
+        self._distances = {}
+
+    def __contains__(self, iata_code: str) -> bool:
+        return iata_code in self.routes
+
+    def __len__(self):
+        return len(self.routes)
+
+    @classmethod
+    def build(cls, api, max_workers: int = 8) -> "RouteGraph":
+        """
+        Fetch the whole network: the active airports, then every airport's destinations, concurrently.
+
+        :param api: A `Ryanair` client.
+        :param max_workers: Maximum number of destination queries in flight at once.
+        """
+        airports = [airport["code"] for airport in api.get_active_airports()]
+
+        def destinations(iata_code):
+            return [
+                route["arrivalAirport"]["code"]
+                for route in api.get_destinations(iata_code)
+                if route.get("arrivalAirport")
+            ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            routes = dict(zip(airports, executor.map(destinations, airports)))
+
+        graph = cls(routes)
+        logger.info(
+            f"Built route graph of {len(graph)} airports and {graph.num_routes()} routes"
+        )
+        return graph
+
+    @classmethod
+    def load(cls, path: str) -> "RouteGraph":
+        with open(os.path.expanduser(path), encoding="utf8") as f:
+            data = json.load(f)
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported route graph format in {path}")
+        return cls(data["routes"], data["built_at"])
+
+    def save(self, path: str):
+        path = os.path.expanduser(path)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf8") as f:
+            json.dump(
+                {
+                    "version": _FORMAT_VERSION,
+                    "built_at": self.built_at,
+                    "routes": self.routes,
+                },
+                f,
+            )
+
+    @classmethod
+    def load_or_build(cls, path: str, api, max_age: float = 7 * 86400) -> "RouteGraph":
+        """
+        Load the graph saved at `path`, unless it is missing or older than `max_age` seconds,
+        in which case it is rebuilt with `api` and saved there.
+        """
+        try:
+            graph = cls.load(path)
+            if time.time() - graph.built_at <= max_age:
+                return graph
+        except (OSError, ValueError, KeyError):
+            pass
+
+        graph = cls.build(api)
+        graph.save(path)
+        return graph
+
+    def num_routes(self) -> int:
+        return sum(len(destinations) for destinations in self.routes.values())
+
+    def destinations(self, iata_code: str) -> list:
+        return self.routes.get(iata_code, [])
+
+    def distance(self, iata_a: str, iata_b: str) -> float:
+        """
+        Great-circle distance in km, or infinity for airports missing from airports.csv.
+        """
+        key = (iata_a, iata_b) if iata_a < iata_b else (iata_b, iata_a)
+        distance = self._distances.get(key)
+        if distance is None:
+            try:
+                distance = get_distance_between_airports(iata_a, iata_b)
+            except KeyError:
+                logger.debug(f"No coordinates for {iata_a} or {iata_b}")
+                distance = math.inf
+            self._distances[key] = distance
+        return distance
+
+    def find_routes(
+        self,
+        origin: str,
+        destination: str,
+        max_stops: int = 1,
+        k: int = 10,
+        max_detour: float = 2.0,
+    ) -> list:
+        """
+        The `k` shortest routes from `origin` to `destination` with at most `max_stops` connections.
+
+        A best-first search ordered by distance flown plus the great-circle distance still to go, so routes come out
+        shortest first and partial routes that could only end up long are never extended.
+
+        :param max_detour: Ignore routes longer than this multiple of the direct great-circle distance.
+        :return: A list of `(distance in km, [origin, ..., destination])` tuples, shortest first.
+        """
+        limit = max_detour * self.distance(origin, destination)
+        tie_breaker = count()
+        heap = [(self.distance(origin, destination), next(tie_breaker), 0.0, [origin])]
+        routes = []
+
+        while heap and len(routes) < k:
+            _, _, flown, path = heapq.heappop(heap)
+            here = path[-1]
+            if here == destination:
+                routes.append((flown, path))
+                continue
+            if len(path) > max_stops + 1:
+                continue
+
+            for following in self.destinations(here):
+                if following in path:
+                    continue
+                # Only the destination may be reached on the last leg
+                if len(path) == max_stops + 1 and following != destination:
+                    continue
+                leg_flown = flown + self.distance(here, following)
+                estimate = leg_flown + self.distance(following, destination)
+                if estimate > limit:
+                    continue
+                heapq.heappush(
+                    heap,
+                    (estimate, next(tie_breaker), leg_flown, path + [following]),
+                )
+
+        return routes
+
+    def cheapest_itineraries(
+        self,
+        api,
+        origin: str,
+        destination: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        max_stops: int = 1,
+        k: int = 5,
+        min_connection: timedelta = timedelta(hours=2),
+        max_connection: timedelta = timedelta(hours=24),
+        max_routes: int = 20,
+        max_detour: float = 2.0,
+    ) -> list:
+        """
+        The `k` cheapest self-transfer itineraries from `origin` to `destination`, departing from `date_from` to
+        `date_to`, over the cheapest one-way fares.
+
+        Candidate routes come from `find_routes`. Each airport's cheapest fares over the whole period (one query per
+        airport) give a lower bound on each route's price, and routes are priced day by day cheapest bound first,
+        stopping once no remaining route could beat the `k` cheapest itineraries found so far.
+
+        Fares only come with local departure times, so arrival times are estimated from distance, and converted to
+        the connecting airport's local time using its time zone. When the cheapest flight on a day doesn't connect,
+        the cheapest flight that day within the connection window is looked up.
+
+        NB: Create `api` with a currency, so that fares from different countries can be added up.
+
+        :param api: A `Ryanair` client.
+        :param min_connection: Minimum time on the ground between flights. Arrival times are estimated from distance.
+        :param max_connection: Maximum time from landing to the next departure.
+        :param max_routes: Number of candidate routes (shortest first) to consider.
+        :return: A list of `Itinerary(totalPrice, flights)`, cheapest first.
+        """
+        date_from = _RyanairBase._parse_date(date_from)
+        date_to = _RyanairBase._parse_date(date_to)
+        last_day = date_to + (max_connection + timedelta(days=1)) * max_stops
+
+        cheapest_from = {}
+
+        def cheapest_fares_from(iata_code):
+            # Cheapest fare to each destination over the whole period, the lower bound for any single day
+            if iata_code not in cheapest_from:
+                cheapest_from[iata_code] = {
+                    flight.destination: flight
+                    for flight in api.get_cheapest_flights(
+                        iata_code, date_from, last_day
+                    )
+                }
+            return cheapest_from[iata_code]
+
+        daily_fares = {}
+
+        def fare_on(
+            leg_origin, leg_destination, day, time_from="00:00", time_to="23:59"
+        ):
+            key = (leg_origin, leg_destination, day, time_from, time_to)
+            if key not in daily_fares:
+                flights = api.get_cheapest_flights(
+                    leg_origin,
+                    day,
+                    day,
+                    departure_time_from=time_from,
+                    departure_time_to=time_to,
+                    destination_airport=leg_destination,
+                )
+                daily_fares[key] = (
+                    min(flights, key=lambda flight: flight.price) if flights else None
+                )
+            return daily_fares[key]
+
+        def connecting_fare_on(leg_origin, leg_destination, day, earliest, latest):
+            fare = fare_on(leg_origin, leg_destination, day)
+            if fare is None or earliest <= fare.departureTime <= latest:
+                return fare
+            # The day's cheapest flight doesn't connect, but a dearer one that day might
+            time_from = (
+                earliest.strftime("%H:%M") if day == earliest.date() else "00:00"
+            )
+            time_to = latest.strftime("%H:%M") if day == latest.date() else "23:59"
+            fare = fare_on(leg_origin, leg_destination, day, time_from, time_to)
+            if fare is None or not earliest <= fare.departureTime <= latest:
+                return None
+            return fare
+
+        candidates = []
+        for _, path in self.find_routes(
+            origin, destination, max_stops, max_routes, max_detour
+        ):
+            bounds = []
+            for leg_origin, leg_destination in zip(path, path[1:]):
+                fare = cheapest_fares_from(leg_origin).get(leg_destination)
+                if fare is None:
+                    break
+                bounds.append(fare.price)
+            else:
+                candidates.append((sum(bounds), path, bounds))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        # Max-heap, by negated price, of the k cheapest itineraries so far
+        best = []
+        tie_breaker = count()
+
+        def price_to_beat():
+            return -best[0][0] if len(best) == k else math.inf
+
+        def extend(path, bounds, flights, spent):
+            leg = len(flights)
+            if leg == len(path) - 1:
+                heapq.heappush(best, (-spent, next(tie_breaker), flights))
+                if len(best) > k:
+                    heapq.heappop(best)
+                return
+            # What's left costs at least its lower bounds
+            if spent + sum(bounds[leg:]) >= price_to_beat():
+                return
+
+            if flights:
+                arrival, margin = local_arrival_time(
+                    flights[-1].departureTime,
+                    path[leg - 1],
+                    path[leg],
+                    estimated_flight_time(self.distance(path[leg - 1], path[leg])),
+                )
+                # Departure times are to the minute, as are the API's departure time filters
+                earliest = (arrival + min_connection + margin).replace(
+                    second=0, microsecond=0
+                )
+                latest = arrival + max_connection - margin
+                if latest < earliest:
+                    return
+                days = (latest.date() - earliest.date()).days + 1
+                first_day = earliest.date()
+            else:
+                earliest = latest = None
+                days = (date_to - date_from).days + 1
+                first_day = date_from
+
+            for offset in range(days):
+                day = first_day + timedelta(offset)
+                if earliest is None:
+                    fare = fare_on(path[leg], path[leg + 1], day)
+                else:
+                    fare = connecting_fare_on(
+                        path[leg], path[leg + 1], day, earliest, latest
+                    )
+                if fare is None:
+                    continue
+                extend(path, bounds, flights + [fare], spent + fare.price)
+
+        for bound, path, bounds in candidates:
+            if bound >= price_to_beat():
+                break
+            extend(path, bounds, [], 0.0)
+
+        return [
+            Itinerary(round(-negated_price, 2), flights)
+            for negated_price, _, flights in sorted(best, reverse=True)
+        ]
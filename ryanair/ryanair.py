@@ -6,16 +6,39 @@ or
 This is done directly through Ryanair's API, and does not require an API key.
 """
 import logging
-from datetime import datetime, date, time
-from typing import Union, Optional
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, date, time, timedelta
+from functools import partial
+from itertools import product
+from time import perf_counter
+from typing import Union, Optional, Iterable, Iterator
 
-import backoff
 import requests
 from deprecated import deprecated
 
 from free_proxy import get_first_operational_proxy
 
-from ryanair.types import Flight, FlightV2, Trip
+from ryanair import decoding, streaming
+from ryanair.cache import BaseCache, DEFAULT_TTLS, make_cache_key
+from ryanair.exceptions import (
+    RyanairException,
+    AvailabilityException,
+    TransientError,
+    TooManyRequestsError,
+    PermanentError,
+)
+from ryanair.flight_batch import FlightBatch
+from ryanair.labels import fare_airport, flight_number_label
+from ryanair.metrics import MetricsHook, endpoint_name
+from ryanair.proxy import ProxyPool
+from ryanair.rate_limit import RateLimiter
+from ryanair.retry import RetryPolicy, parse_retry_after
+from ryanair.single_flight import SingleFlight
+from ryanair.streaming import iter_items
+from ryanair.types import Flight, FlightV2, Trip, SearchQuery, SearchResult
 from ryanair.airport_utils import get_airport_by_iata
 
 logger = logging.getLogger(__name__)
@@ -31,21 +54,18 @@ logger = logging.getLogger(__name__)
 #     console_handler.setFormatter(formatter)
 #     logger.addHandler(console_handler)
 
-proxy = None
 
+# The availability API returns at most a week of flights per query: DateOut plus 6 days
+MAX_FLEX_DAYS_OUT = 6
 
-class RyanairException(Exception):
-    def __init__(self, message):
-        super().__init__(f"Ryanair API: {message}")
 
+class _RyanairBase:
+    """
+    Endpoint definitions, query building and response parsing shared by the
+    synchronous `Ryanair` client and the asyncio `AsyncRyanair` client.
+    Subclasses provide the transport.
+    """
 
-class AvailabilityException(RyanairException):
-    def __init__(self):
-        super().__init__("Availability API declined to provide a result")
-
-
-# noinspection PyBroadException
-class Ryanair:
     BASE_SERVICES_API_URL = "https://services-api.ryanair.com/farfnd/v4/"
     BASE_AVAILABILITY_API_URL = "https://www.ryanair.com/api/booking/v4/"
     BASE_SITE_FOR_SESSION_URL = "https://www.ryanair.com/"
@@ -55,132 +75,182 @@ class Ryanair:
     RYANAIR_ACTIVE_AIRPORTS = "https://www.ryanair.com/api/views/locate/5/airports/en/active"
     RYANAIR_DESTINATION_AIRPORTS = "https://www.ryanair.com/api/views/locate/searchWidget/routes/en/airport/{fromCode}"
 
-    def __init__(self, currency: Optional[str] = None):
+    def __init__(
+        self,
+        currency: Optional[str] = None,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[dict] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[MetricsHook] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        raise_errors: bool = False,
+    ):
         self.currency = currency
+        self.cache = cache
+        self.cache_ttls = {**DEFAULT_TTLS, **(cache_ttls or {})}
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.proxy_pool = proxy_pool
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.raise_errors = raise_errors
 
         self._num_queries = 0
-        self.session = requests.Session()
-        self._update_session_cookie()
-
-    def get_active_airports(self) -> list:
-        """
-        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/views/locate/5/airports/en/active to get
-        the active airports for a given airport code.
-
-        :return: A list of active airports for the given airport code.
-        """
+        # Proxy the last request went through, to report switches
+        self._proxy = None
 
-        # Prepare the query URL
-        query_url = Ryanair.RYANAIR_ACTIVE_AIRPORTS
+    @contextmanager
+    def _measure_parse(self, url: str, stage: str = "parse"):
+        if self.metrics is None:
+            yield
+            return
 
+        started = perf_counter()
         try:
-            # Query the API
-            response = self._retryable_query(query_url, {})
-        except Exception as e:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        # If response exists, return it
-        if response:
-            return response
-
-        return []
-
+            yield
+        finally:
+            self.metrics.on_parse(endpoint_name(url), stage, perf_counter() - started)
+
+    def _report_request(self, url: str, started: float, status_code: Optional[int], response_bytes: int):
+        if self.metrics is not None:
+            self.metrics.on_request(
+                endpoint_name(url), perf_counter() - started, status_code, response_bytes
+            )
 
-    def get_destinations(self, from_code: str) -> list:
+    def _report_declined(self, url: str, result) -> bool:
         """
-        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/views/locate/searchWidget/routes/en/airport/{{fromCode}} to get
-        the destinations for a given airport code.
-
-        :param from_code: The airport code to get the destinations for.
-        :return: A list of destinations for the given airport code.
+        :return: Whether the response is an "Availability declined" one.
         """
+        declined = isinstance(result, dict) and self.check_if_availability_response_is_declined(result)
+        if declined and self.metrics is not None:
+            self.metrics.on_declined(endpoint_name(url))
+        return declined
 
-        # Prepare the query URL
-        query_url = Ryanair.RYANAIR_DESTINATION_AIRPORTS.format(fromCode=from_code)
-
-        try:
-            # Query the API
-            response = self._retryable_query(query_url, {})
-        except Exception as e:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        # If response exists, return it
-        if response:
-            return response
-
-        return []
-
-
-
-    def get_flight_schedules(self, from_code: str):
+    @staticmethod
+    def _in_flight_key(url: str, params: dict, decoder) -> tuple:
+        # Queries decoded differently give different results, so only identical ones are coalesced
+        return make_cache_key(url, params), decoder
+
+    def _report_coalesced(self, url: str, shared: bool):
+        if shared and self.metrics is not None:
+            self.metrics.on_coalesced(endpoint_name(url))
+
+    def _choose_proxy(self) -> Optional[dict]:
+        if self.proxy_pool is None:
+            return None
+
+        proxy = self.proxy_pool.get()
+        if proxy != self._proxy:
+            self._proxy = proxy
+            logger.info(f"Ryanair API using proxy: {proxy}")
+            if self.metrics is not None:
+                self.metrics.on_proxy_switch(proxy)
+        return proxy
+
+    def _report_proxy_outcome(self, proxy: Optional[dict], started: float, success: bool):
+        if self.proxy_pool is not None:
+            self.proxy_pool.report(proxy, success, perf_counter() - started)
+
+    def _refill_proxy_pool(self):
+        # Top the pool up in the background if nothing is left to fail over to
+        if self.proxy_pool is not None and not self.proxy_pool.healthy():
+            self.proxy_pool.refill()
+
+    def _on_query_retry(self, url: str, error: Exception, attempt: int, wait: float):
+        logger.info(f"Retrying query to {url} in {wait:.1f}s, attempt {attempt} failed: {error}")
+        if self.metrics is not None:
+            self.metrics.on_retry(endpoint_name(url), attempt, wait)
+
+        # The failed proxy has already been marked down, so the retry goes through another one if available
+        self._refill_proxy_pool()
+
+    def _on_query_giveup(self, url: str, error: Exception, tries: int):
+        logger.warning(f"Gave up querying {url} after {tries} attempt(s), last error was {error!r}")
+        if self.metrics is not None:
+            self.metrics.on_giveup(endpoint_name(url), tries)
+
+    def _raise_for_status(self, url: str, status_code: int, headers):
         """
-        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/timtbl/3/schedules/{{fromCode}}/periods to get
-        the flight schedules for a given airport code.
-
-        :param from_code: The airport code to get the flight schedules for.
-        :return: A list of flight schedules for the given airport code.
+        Raise the errors worth retrying: HTTP 429 and 5xx.
+        Other error statuses are left to `_decode_response`, as streamed responses are decoded by their reader.
         """
+        if status_code == 429:
+            self._record_rate_limit_outcome(url, throttled=True)
+            raise TooManyRequestsError(url, parse_retry_after(headers.get("Retry-After")))
+        if status_code >= 500:
+            raise TransientError(
+                f"HTTP {status_code} when querying {url}",
+                status_code,
+                parse_retry_after(headers.get("Retry-After")),
+            )
 
-        # Prepare the query URL
-        query_url = Ryanair.RYANAIR_SCHEDULES_ENDPOINT.format(fromCode=from_code)
+    def _decode_response(self, url: str, status_code: int, body: bytes, decoder=None):
+        if status_code >= 400:
+            # Declined availability requests are handled by the caller (with a new session cookie), whatever the status
+            try:
+                result = decoding.loads(body)
+            except Exception:
+                result = None
+            if not self._report_declined(url, result):
+                raise PermanentError(f"HTTP {status_code} when querying {url}", status_code)
+            self._record_rate_limit_outcome(url, throttled=True)
+            return result
 
         try:
-            # Query the API
-            response = self._retryable_query(query_url, {})
+            with self._measure_parse(url, "decode"):
+                result = (decoder or decoding.loads)(body)
         except Exception as e:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        # If response exists, return it
-        if response:
-            return response
+            raise PermanentError(f"Failed to decode response from {url}: {e}", status_code) from e
+        self._record_rate_limit_outcome(url, throttled=self._report_declined(url, result))
+        return result
+
+    def _record_rate_limit_outcome(self, url: str, throttled: bool):
+        if self.rate_limiter is None:
+            return
+        if throttled:
+            self.rate_limiter.on_throttled(url)
+        else:
+            self.rate_limiter.on_success(url)
 
-        return []
+    def _is_cached(self, endpoint: str) -> bool:
+        return self.cache is not None and bool(self.cache_ttls.get(endpoint))
 
-    def get_scheduled_dates_for_route(self, from_code: str, to_code: str):
+    def _typed_decoder(self, endpoint: str, decoder):
         """
-        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/farfnd/v4/oneWayFares/{{fromCode}}/{{toCode}}/availabilities to get
-        the available flights for a given airport code.
-
-        :param from_code: The airport code to get the available flights from.
-        :param to_code: The airport code to get the available flights to.
-        :return: A list of available flights for the given airport codes.
-
-        NB: This API Endpoint does not consider when flights are 'sold out' on that they are scheduled.
+        `decoder` (from `ryanair.decoding`) if msgspec is installed, else None for the generic JSON decoder.
+        Cached responses always use the generic decoder, as the cache stores plain JSON.
         """
-
-        #  Prepare the query URL
-        query_url = Ryanair.RYANAIR_SCHEDULED_DATES_FOR_ROUTE_ENDPOINT.format(fromCode=from_code, toCode=to_code)
-
-        try:
-            # Query the API
-            response = self._retryable_query(query_url, {})
-        except Exception as e:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        # If response exists, return it
-        if response:
-            return response
-
-        return []
-
-    def get_cheapest_flights(
+        if decoding.typed_decoding_available() and not self._is_cached(endpoint):
+            return decoder
+        return None
+
+    def _get_cached_response(self, endpoint: str, url: str, params: dict):
+        if not self._is_cached(endpoint):
+            return None
+
+        response = self.cache.get(make_cache_key(url, params))
+        if self.metrics is not None:
+            self.metrics.on_cache_lookup(endpoint, response is not None)
+        return response
+
+    def _set_cached_response(self, endpoint: str, url: str, params: dict, response):
+        # Failed queries come back as None, don't remember those
+        if not self._is_cached(endpoint) or not response:
+            return
+        self.cache.set(make_cache_key(url, params), response, self.cache_ttls[endpoint])
+
+    def _cheapest_flights_params(
         self,
-        airport: str,
-        date_from: Union[datetime, date, str],
-        date_to: Union[datetime, date, str],
-        destination_country: Optional[str] = None,
-        custom_params: Optional[dict] = None,
-        departure_time_from: Union[str, time] = "00:00",
-        departure_time_to: Union[str, time] = "23:59",
-        max_price: Optional[int] = None,
-        destination_airport: Optional[str] = None,
-    ):
-        query_url = "".join((Ryanair.BASE_SERVICES_API_URL, "oneWayFares"))
-
+        airport,
+        date_from,
+        date_to,
+        destination_country=None,
+        custom_params=None,
+        departure_time_from="00:00",
+        departure_time_to="23:59",
+        max_price=None,
+        destination_airport=None,
+    ) -> dict:
         params = {
             "departureAirportIataCode": airport,
             "outboundDepartureDateFrom": self._format_date_for_api(date_from),
@@ -199,37 +269,24 @@ class Ryanair:
         if custom_params:
             params.update(custom_params)
 
-        try:
-            response = self._retryable_query(query_url, params)["fares"]
-        except Exception:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        if response:
-            return [
-                self._parse_cheapest_flight(flight["outbound"]) for flight in response
-            ]
-
-        return []
+        return params
 
-    def get_cheapest_return_flights(
+    def _cheapest_return_flights_params(
         self,
-        source_airport: str,
-        date_from: Union[datetime, date, str],
-        date_to: Union[datetime, date, str],
-        return_date_from: Union[datetime, date, str],
-        return_date_to: Union[datetime, date, str],
-        destination_country: Optional[str] = None,
-        custom_params: Optional[dict] = None,
-        outbound_departure_time_from: Union[str, time] = "00:00",
-        outbound_departure_time_to: Union[str, time] = "23:59",
-        inbound_departure_time_from: Union[str, time] = "00:00",
-        inbound_departure_time_to: Union[str, time] = "23:59",
-        max_price: Optional[int] = None,
-        destination_airport: Optional[str] = None,
-    ):
-        query_url = "".join((Ryanair.BASE_SERVICES_API_URL, "roundTripFares"))
-
+        source_airport,
+        date_from,
+        date_to,
+        return_date_from,
+        return_date_to,
+        destination_country=None,
+        custom_params=None,
+        outbound_departure_time_from="00:00",
+        outbound_departure_time_to="23:59",
+        inbound_departure_time_from="00:00",
+        inbound_departure_time_to="23:59",
+        max_price=None,
+        destination_airport=None,
+    ) -> dict:
         params = {
             "departureAirportIataCode": source_airport,
             "outboundDepartureDateFrom": self._format_date_for_api(date_from),
@@ -260,44 +317,9 @@ class Ryanair:
         if custom_params:
             params.update(custom_params)
 
-        try:
-            response = self._retryable_query(query_url, params)["fares"]
-        except Exception as e:
-            logger.exception(f"Failed to parse response when querying {query_url}")
-            return []
-
-        if response:
-            return [
-                self._parse_cheapest_return_flights_as_trip(
-                    trip["outbound"], trip["inbound"]
-                )
-                for trip in response
-            ]
-        else:
-            return []
-
-    def get_all_flights(
-        self,
-        origin_airport: str,
-        date_out: Union[datetime, date, str],
-        destination: str,
-        # locale: str = "",
-        # origin_is_mac: bool = False,
-        # destination_is_mac: bool = False,
-        custom_params: Optional[dict] = None,
-    ):
-        """
-        This function can be used to get all flights between within a given week.
-
-        With the default parameters, it will return all flights between the origin and destination airports for a single week.  More than that is not supported by the API.
-
-        """
-
-
-        query_url = "".join(
-            (Ryanair.BASE_AVAILABILITY_API_URL, f"/availability")
-        )
+        return params
 
+    def _all_flights_params(self, origin_airport, date_out, destination, custom_params=None) -> dict:
         params = {
             # Assume single adult ticket only
             "ADT": 1,
@@ -325,110 +347,82 @@ class Ryanair:
         if custom_params:
             params.update(custom_params)
 
-        try:
-            # Try once to get a new session cookie, just in case the old one has expired.
-            # If that fails too, we should raise the exception.
-            response = self._retryable_query(query_url, params)
-
-            if self.check_if_availability_response_is_declined(response):
-                logger.warning(
-                    "Availability API declined to respond, attempting again with a new session cookie"
-                )
-                self._update_session_cookie()
-                response = self._retryable_query(query_url, params)
-                if self.check_if_availability_response_is_declined(response):
-                    raise AvailabilityException
+        return params
 
-            return self._parse_all_flights_availability_result_as_flight_v2(response)
+    @staticmethod
+    def _expand_search_queries(origins: Iterable[str], date_ranges: Iterable[tuple]) -> list:
+        """
+        Expand origins x date ranges into one `SearchQuery` each.
 
-        except RyanairException:
-            logger.exception(
-                f"Failed to parse response when querying {query_url} with parameters {params}"
-            )
-            return []
-        except Exception:
-            logger.exception(
-                f"Failed to parse response when querying {query_url} with parameters {params}"
-            )
-            return []
+        A date range is either `(date_from, date_to)` for one-way fares, or
+        `(date_from, date_to, return_date_from, return_date_to)` for return trips.
+        """
+        queries = []
+        for origin, date_range in product(origins, list(date_ranges)):
+            if len(date_range) not in (2, 4):
+                raise ValueError(
+                    f"Expected a date range of 2 (one-way) or 4 (return) dates, got {date_range}"
+                )
+            queries.append(SearchQuery(origin, *date_range))
+        return queries
 
     @staticmethod
     def check_if_availability_response_is_declined(response: dict) -> bool:
         return "message" in response and response["message"] == "Availability declined"
 
-    @staticmethod
-    def _on_query_error(e):
-        logger.exception(f"Gave up retrying query, last exception was {e}")
-
-    # CUSTOM BACKOFF HANDLER ======================
-    def on_backoff_handler(details):
-        try:
-            global proxy
-            logger.info(f"Requesting a proxy (using free-proxy library)")
-            proxy = get_first_operational_proxy()
-        except ValueError as e:
-            logger.exception(f"Failed to get proxy: {e}, Setting proxy to `None`")
-            proxy = None
-
-    # ============================================
-
-    @backoff.on_exception(
-        backoff.expo,
-        Exception,
-        on_backoff=on_backoff_handler,
-        max_tries=5,
-        logger=logger,
-        on_giveup=_on_query_error,
-        raise_on_giveup=False,
-    )
-    def _retryable_query(self, url, params):
-        self._num_queries += 1
-
-        # for testing purposes
-        # import random
-        # if random.randint() % 2 == 0:
-        #     raise Exception("random error")
-
-        if proxy:
-            logger.warning(f"Ryanair API using proxy: {proxy}")
-            # logger.debug(f"Sending request URL: {url} with params: {params}")
-            return self.session.get(url, params=params, proxies=proxy).json()
-        else:
-            # logger.debug("Not using proxy")
-            # logger.debug(f"Sending request URL: {url} with params: {params}")
-            return self.session.get(url, params=params).json()
-
-    def _update_session_cookie(self):
-        # Visit main website to get session cookies
-        self.session.get(Ryanair.BASE_SITE_FOR_SESSION_URL)
-
-    def _parse_cheapest_flight(self, flight):
-        currency = flight["price"]["currencyCode"]
+    def _check_currency(self, currency: str):
         if self.currency and self.currency != currency:
             logger.warning(
                 f"Requested cheapest flights in {self.currency} but API responded with fares in {currency}"
             )
+
+    def _parse_cheapest_flight(self, flight):
+        if not isinstance(flight, dict):
+            return self._parse_typed_cheapest_flight(flight)
+
+        currency = flight["price"]["currencyCode"]
+        self._check_currency(currency)
+        departure_airport = flight["departureAirport"]
+        arrival_airport = flight["arrivalAirport"]
+        origin, origin_full = fare_airport(
+            departure_airport["iataCode"], departure_airport["name"], departure_airport["countryName"]
+        )
+        destination, destination_full = fare_airport(
+            arrival_airport["iataCode"], arrival_airport["name"], arrival_airport["countryName"]
+        )
         return Flight(
-            origin=flight["departureAirport"]["iataCode"],
-            originFull=", ".join(
-                (
-                    flight["departureAirport"]["name"],
-                    flight["departureAirport"]["countryName"],
-                )
-            ),
-            destination=flight["arrivalAirport"]["iataCode"],
-            destinationFull=", ".join(
-                (
-                    flight["arrivalAirport"]["name"],
-                    flight["arrivalAirport"]["countryName"],
-                )
-            ),
+            origin=origin,
+            originFull=origin_full,
+            destination=destination,
+            destinationFull=destination_full,
             departureTime=datetime.fromisoformat(flight["departureDate"]),
-            flightNumber=f"{flight['flightNumber'][:2]} {flight['flightNumber'][2:]}",
+            flightNumber=flight_number_label(flight["flightNumber"]),
             price=flight["price"]["value"],
             currency=currency,
         )
 
+    def _parse_typed_cheapest_flight(self, flight: "decoding.FareLeg"):
+        currency = flight.price.currencyCode
+        self._check_currency(currency)
+        departure_airport = flight.departureAirport
+        arrival_airport = flight.arrivalAirport
+        origin, origin_full = fare_airport(
+            departure_airport.iataCode, departure_airport.name, departure_airport.countryName
+        )
+        destination, destination_full = fare_airport(
+            arrival_airport.iataCode, arrival_airport.name, arrival_airport.countryName
+        )
+        return Flight(
+            origin=origin,
+            originFull=origin_full,
+            destination=destination,
+            destinationFull=destination_full,
+            departureTime=flight.departureDate,
+            flightNumber=flight_number_label(flight.flightNumber),
+            price=flight.price.value,
+            currency=currency,
+        )
+
     def _parse_cheapest_return_flights_as_trip(self, outbound, inbound):
         outbound = self._parse_cheapest_flight(outbound)
         inbound = self._parse_cheapest_flight(inbound)
@@ -473,137 +467,1075 @@ class Ryanair:
 
         for this_date in response['trips'][0]['dates']:
             for this_flight in this_date['flights']:
-                flight_dict = {}
-
-                # currency
-                flight_dict['currency'] = currency
-
-                # faresLeft
-                if 'faresLeft' in this_flight:
-                    flight_dict['faresLeft'] = this_flight['faresLeft']  # NB: '-1' appears to suggest it doesnt know, ie lots! (not overbooked i dont think)
-                    if flight_dict['faresLeft'] == -1:
-                        flight_dict['faresLeft'] = None
-                else:
-                    flight_dict['faresLeft'] = None
-
-                # flightKey
-                if 'flightKey' in this_flight:
-                    # flight_dict['flightKey'] = this_flight['flightKey'] # can ignore for now as data is duplicated
-                    pass
-
-                # infantsLeft
-                if 'infantsLeft' in this_flight:
-                    flight_dict['infantsLeft'] = this_flight['infantsLeft']
-                    if flight_dict['infantsLeft'] == -1:
-                        flight_dict['infantsLeft'] = None
-                else:
-                    flight_dict['infantsLeft'] = None
-
-                # regularFare
-                if not 'regularFare' in this_flight:
-                    logger.debug(f"No regularFare in this_flight - Sold Out:{this_flight['faresLeft']==0}.  HINT: This will still return a flight, but with no price information")
-                    flight_dict.update({key: None for key in ['actualFare', 'publishedFare', 'hasDiscount', 'discountInPercent', 'hasPromoDiscount', 'hasBogof']})
-                else:
-                    try:
-                        assert len(this_flight['regularFare']['fares']) == 1
-                        for this_fare in this_flight['regularFare']['fares']:
-                            assert this_fare['type'] == 'ADT'
-                            flight_dict['actualFare'] = this_fare['amount']
-                            flight_dict['publishedFare'] = this_fare['publishedFare']
-                            # flight_dict['price'] = this_fare['count'] # ignore
-                            flight_dict['hasDiscount'] = this_fare['hasDiscount']
-                            flight_dict['discountInPercent'] = this_fare['discountInPercent']
-                            flight_dict['hasPromoDiscount'] = this_fare['hasPromoDiscount']
-                            flight_dict['hasBogof'] = this_fare['hasBogof']
-                    except AssertionError:
-                        logger.warning(f"Unexpected fare structure - ignoring entire API call")
-                        print(this_flight['regularFare'])
-                        continue
-
-                # operatedBy
-                if 'operatedBy' in this_flight:
-                    flight_dict['operatedBy'] = this_flight['operatedBy']
-
-                # segments
-                if 'segments' in this_flight:
-                    try:
-                        assert len(this_flight['segments']) == 1
-                        this_segment = this_flight['segments'][0]
-
-                        # flightNumber
-                        if 'flightNumber' in this_segment:
-                            flight_dict['flightNumber'] = this_segment['flightNumber']
-
-                        # time
-                        if 'time' in this_segment:
-                            assert len(this_segment['time']) == 2
-                            flight_dict['departureTime_local'] = this_segment['time'][0]
-                            flight_dict['arrivalTime_local'] = this_segment['time'][1]
-                            # convert to datetime without using pandas
-                            # flight_dict['departureTime_local'] = datetime.strptime(flight_dict['departureTime_local'], '%H:%M')
-                            # flight_dict['arrivalTime_local'] = datetime.strptime(flight_dict['arrivalTime_local'], '%H:%M')
-
-                        # timeUTC
-                        if 'timeUTC' in this_segment:
-                            assert len(this_segment['timeUTC']) == 2
-                            flight_dict['departureTime_utc'] = this_segment['timeUTC'][0]
-                            flight_dict['arrivalTime_utc'] = this_segment['timeUTC'][1]
-                            # convert to datetime
-                            # flight_dict['departureTime_utc'] = pd.to_datetime(flight_dict['departureTime_utc'])
-                            # flight_dict['arrivalTime_utc'] = pd.to_datetime(flight_dict['arrivalTime_utc'])
-
-                        # duration
-                        flight_dict['duration'] = this_segment['duration'] if 'duration' in this_flight else None
-
-                        # origin
-                        if 'origin' in this_segment:
-                            flight_dict['origin'] = this_segment['origin']
-                            flight_dict['originFull'] = get_airport_by_iata(this_segment['origin'])
-                        else:
-                            logger.warning(f"Unexpected origin structure - ignoring this flight")
-                            logger.critical(this_flight.keys())
-                            continue
-
-                        # destination
-                        if 'destination' in this_segment:
-                            flight_dict['destination'] = this_segment['destination']
-                            flight_dict['destinationFull'] = get_airport_by_iata(this_segment['destination'])
-                        else:
-                            logger.warning(f"Unexpected destination structure - ignoring this flight")
-                            continue
-
-                    except AssertionError:
-                        logger.warning(f"Unexpected segments structure - ignoring entire API call")
-                        continue
-                
-                    list_of_flights.append(FlightV2(**flight_dict))
+                flight = _RyanairBase._parse_availability_flight_as_flight_v2(this_flight, currency)
+                if flight is not None:
+                    list_of_flights.append(flight)
 
         logger.debug(f"Found {len(list_of_flights)} flights in the response")
         return list_of_flights
 
     @staticmethod
-    def _format_date_for_api(d: Union[datetime, date, str]):
-        if isinstance(d, str):
-            return d
+    def _parse_availability_flight_as_flight_v2(this_flight, currency) -> FlightV2 | None:
+        """
+        Parse a single flight from an availability response into a FlightV2, or None if it should be skipped
+        """
+        flight_dict = {}
 
-        if isinstance(d, datetime):
-            return d.date().isoformat()
+        # currency
+        flight_dict['currency'] = currency
 
-        if isinstance(d, date):
-            return d.isoformat()
+        # faresLeft
+        if 'faresLeft' in this_flight:
+            flight_dict['faresLeft'] = this_flight['faresLeft']  # NB: '-1' appears to suggest it doesnt know, ie lots! (not overbooked i dont think)
+            if flight_dict['faresLeft'] == -1:
+                flight_dict['faresLeft'] = None
+        else:
+            flight_dict['faresLeft'] = None
+
+        # flightKey
+        if 'flightKey' in this_flight:
+            # flight_dict['flightKey'] = this_flight['flightKey'] # can ignore for now as data is duplicated
+            pass
+
+        # infantsLeft
+        if 'infantsLeft' in this_flight:
+            flight_dict['infantsLeft'] = this_flight['infantsLeft']
+            if flight_dict['infantsLeft'] == -1:
+                flight_dict['infantsLeft'] = None
+        else:
+            flight_dict['infantsLeft'] = None
 
-    @staticmethod
-    def _format_time_for_api(t: Union[time, str]):
-        if isinstance(t, str):
-            return t
+        # regularFare
+        if not 'regularFare' in this_flight:
+            logger.debug(f"No regularFare in this_flight - Sold Out:{this_flight['faresLeft']==0}.  HINT: This will still return a flight, but with no price information")
+            flight_dict.update({key: None for key in ['actualFare', 'publishedFare', 'hasDiscount', 'discountInPercent', 'hasPromoDiscount', 'hasBogof']})
+        else:
+            try:
+                assert len(this_flight['regularFare']['fares']) == 1
+                for this_fare in this_flight['regularFare']['fares']:
+                    assert this_fare['type'] == 'ADT'
+                    flight_dict['actualFare'] = this_fare['amount']
+                    flight_dict['publishedFare'] = this_fare['publishedFare']
+                    # flight_dict['price'] = this_fare['count'] # ignore
+                    flight_dict['hasDiscount'] = this_fare['hasDiscount']
+                    flight_dict['discountInPercent'] = this_fare['discountInPercent']
+                    flight_dict['hasPromoDiscount'] = this_fare['hasPromoDiscount']
+                    flight_dict['hasBogof'] = this_fare['hasBogof']
+            except AssertionError:
+                logger.warning(f"Unexpected fare structure - ignoring entire API call")
+                print(this_flight['regularFare'])
+                return None
+
+        # operatedBy
+        if 'operatedBy' in this_flight:
+            flight_dict['operatedBy'] = this_flight['operatedBy']
+
+        # segments
+        if 'segments' in this_flight:
+            try:
+                assert len(this_flight['segments']) == 1
+                this_segment = this_flight['segments'][0]
+
+                # flightNumber
+                if 'flightNumber' in this_segment:
+                    flight_dict['flightNumber'] = sys.intern(this_segment['flightNumber'])
+
+                # time
+                if 'time' in this_segment:
+                    assert len(this_segment['time']) == 2
+                    flight_dict['departureTime_local'] = this_segment['time'][0]
+                    flight_dict['arrivalTime_local'] = this_segment['time'][1]
+                    # convert to datetime without using pandas
+                    # flight_dict['departureTime_local'] = datetime.strptime(flight_dict['departureTime_local'], '%H:%M')
+                    # flight_dict['arrivalTime_local'] = datetime.strptime(flight_dict['arrivalTime_local'], '%H:%M')
+
+                # timeUTC
+                if 'timeUTC' in this_segment:
+                    assert len(this_segment['timeUTC']) == 2
+                    flight_dict['departureTime_utc'] = this_segment['timeUTC'][0]
+                    flight_dict['arrivalTime_utc'] = this_segment['timeUTC'][1]
+                    # convert to datetime
+                    # flight_dict['departureTime_utc'] = pd.to_datetime(flight_dict['departureTime_utc'])
+                    # flight_dict['arrivalTime_utc'] = pd.to_datetime(flight_dict['arrivalTime_utc'])
+
+                # duration
+                flight_dict['duration'] = this_segment['duration'] if 'duration' in this_flight else None
+
+                # origin
+                if 'origin' in this_segment:
+                    flight_dict['origin'] = sys.intern(this_segment['origin'])
+                    flight_dict['originFull'] = get_airport_by_iata(this_segment['origin'])
+                else:
+                    logger.warning(f"Unexpected origin structure - ignoring this flight")
+                    logger.critical(this_flight.keys())
+                    return None
+
+                # destination
+                if 'destination' in this_segment:
+                    flight_dict['destination'] = sys.intern(this_segment['destination'])
+                    flight_dict['destinationFull'] = get_airport_by_iata(this_segment['destination'])
+                else:
+                    logger.warning(f"Unexpected destination structure - ignoring this flight")
+                    return None
 
-        if isinstance(t, time):
-            return t.strftime("%H:%M")
+            except AssertionError:
+                logger.warning(f"Unexpected segments structure - ignoring entire API call")
+                return None
+        
+            return FlightV2(**flight_dict)
 
-    @property
+        return None
+
+    @staticmethod
+    def _availability_windows(start: Union[datetime, date, str], end: Union[datetime, date, str]) -> list:
+        """
+        Split the days from `start` to `end` (inclusive) into `(date_out, flex_days_out)` windows of at most
+        a week, the most a single availability query can cover.
+        """
+        start, end = _RyanairBase._parse_date(start), _RyanairBase._parse_date(end)
+        windows = []
+        day = start
+        while day <= end:
+            flex_days_out = min(MAX_FLEX_DAYS_OUT, (end - day).days)
+            windows.append((day, flex_days_out))
+            day += timedelta(days=flex_days_out + 1)
+        return windows
+
+    @staticmethod
+    def _merge_flight_windows(flight_lists: Iterable[list], start, end) -> list:
+        """
+        Merge the results of several availability queries into one list sorted by departure time,
+        dropping flights seen more than once and any outside `start` to `end`.
+        """
+        first = _RyanairBase._parse_date(start).isoformat()
+        last = _RyanairBase._parse_date(end).isoformat()
+
+        flights = {}
+        for flight_list in flight_lists:
+            for flight in flight_list:
+                key = (flight.flightNumber, flight.departureTime_utc or flight.departureTime_local)
+                if key not in flights and first <= (flight.departureTime_local or first)[:10] <= last:
+                    flights[key] = flight
+
+        return sorted(flights.values(), key=lambda f: f.departureTime_utc or f.departureTime_local or "")
+
+    def _calendar_window_params(self, origin: str, window: tuple, destination_country, custom_params) -> dict:
+        start, end, destinations, _ = window
+        # With one destination left in a window, ask for that destination only
+        destination = next(iter(destinations)) if destinations is not None and len(destinations) == 1 else None
+        return self._cheapest_flights_params(
+            origin, start, end, destination_country, custom_params, "00:00", "23:59", None, destination
+        )
+
+    @staticmethod
+    def _split_calendar_window(window: tuple, fares: list, calendar: dict) -> tuple:
+        """
+        Record the fares a `oneWayFares` query for `window` returned in `calendar`, and return the windows left
+        to query within it, as `(split, by_day)`: the windows splitting it further, and the single days still
+        unknown, which are queried instead once splitting can't save queries any more.
+
+        A window is `(start, end, destinations, by_day)`: the set of destinations with days still unknown in it
+        (None for any destination), and whether it comes from splitting a range into single days. The query returns
+        each destination's cheapest fare in the window, which is also its cheapest fare on that day, and leaves out
+        destinations with no flights in the window at all.
+        """
+        start, end, destinations, by_day = window
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+        found = set()
+        for fare in fares:
+            day = fare.departureTime.date()
+            if (destinations is None or fare.destination in destinations) and start <= day <= end:
+                calendar.setdefault(fare.destination, {})[day] = fare
+                found.add(fare.destination)
+        for destination in (destinations or set()) - found:
+            for day in days:
+                calendar[destination].setdefault(day, None)
+
+        unknown = {}
+        for destination in found:
+            unknown_days = [day for day in days if day not in calendar[destination]]
+            if unknown_days:
+                unknown[destination] = unknown_days
+        if not unknown:
+            return [], []
+
+        single_days = [
+            (day, day, destinations_left, True)
+            for day in days
+            if (destinations_left := {d for d, unknown_days in unknown.items() if day in unknown_days})
+        ]
+
+        if len(unknown) == 1:
+            # Query the runs of days either side of those already known
+            [(destination, unknown_days)] = unknown.items()
+            windows = []
+            for day in unknown_days:
+                if windows and (day - windows[-1][1]).days == 1:
+                    windows[-1] = (windows[-1][0], day, {destination}, by_day)
+                else:
+                    windows.append((day, day, {destination}, by_day))
+            return windows, single_days
+
+        if by_day or found == destinations:
+            # Splitting the parent window ruled out no destination here, so flights are dense enough that querying
+            # the days one by one takes fewer queries than splitting further
+            return single_days, single_days
+
+        middle = start + (end - start) / 2
+        windows = []
+        for half_start, half_end in ((start, middle), (middle + timedelta(days=1), end)):
+            left = {}
+            for destination, unknown_days in unknown.items():
+                unknown_days = [day for day in unknown_days if half_start <= day <= half_end]
+                if unknown_days:
+                    left[destination] = unknown_days
+            if left:
+                windows.append(
+                    (min(d[0] for d in left.values()), max(d[-1] for d in left.values()), set(left), False)
+                )
+        return windows, single_days
+
+    @staticmethod
+    def _next_calendar_windows(windows: list, results: list, calendar: dict, queries_left: int) -> list:
+        """
+        Record the results of querying `windows` in `calendar`, and return the windows to query next.
+
+        :param queries_left: Queries left before the calendar has taken as many as querying each day would.
+            Windows are only split further if querying every day still unknown one by one afterwards would
+            still fit, and otherwise the days left are queried one by one straight away.
+        """
+        split, single_days = [], []
+        # The most the split windows could take: their own queries, then every day still unknown in them, one by one.
+        # A single day, or a window with one destination left, always has at least one day found by its query.
+        most_queries = 0
+        for window, fares in zip(windows, results):
+            if fares is None:
+                continue
+            window_split, window_single_days = _RyanairBase._split_calendar_window(window, fares, calendar)
+            split += window_split
+            single_days += window_single_days
+            for start, end, destinations, _ in window_split:
+                unknown_days = sum(1 for day in window_single_days if start <= day[0] <= end)
+                most_queries += unknown_days if len(destinations) == 1 or start == end else unknown_days + 1
+        return split if most_queries <= queries_left else single_days
+
+    @staticmethod
+    def _finish_calendar(calendar: dict) -> dict:
+        return {
+            destination: dict(sorted(days.items()))
+            for destination, days in sorted(calendar.items())
+        }
+
+    @staticmethod
+    def _parse_date(d: Union[datetime, date, str]) -> date:
+        if isinstance(d, str):
+            return date.fromisoformat(d[:10])
+        if isinstance(d, datetime):
+            return d.date()
+        return d
+
+    @staticmethod
+    def _format_date_for_api(d: Union[datetime, date, str]):
+        if isinstance(d, str):
+            return d
+
+        if isinstance(d, datetime):
+            return d.date().isoformat()
+
+        if isinstance(d, date):
+            return d.isoformat()
+
+    @staticmethod
+    def _format_time_for_api(t: Union[time, str]):
+        if isinstance(t, str):
+            return t
+
+        if isinstance(t, time):
+            return t.strftime("%H:%M")
+
+    @property
     def num_queries(self):
         return self._num_queries
 
+
+# noinspection PyBroadException
+class Ryanair(_RyanairBase):
+    # Session cookies last fetched by any instance, reused by instances that haven't fetched their own yet
+    _shared_session_cookies = None
+    _shared_session_cookies_lock = threading.Lock()
+
+    def __init__(
+        self,
+        currency: Optional[str] = None,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[dict] = None,
+        prefetch_session_cookie: bool = False,
+        share_session_cookie: bool = True,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[MetricsHook] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        raise_errors: bool = False,
+    ):
+        """
+        :param currency: Preferred currency for fares. Not every endpoint respects it.
+        :param cache: Optional response cache, e.g. `ryanair.cache.MemoryCache()` or `ryanair.cache.SQLiteCache(path)`.
+        :param cache_ttls: Overrides for `ryanair.cache.DEFAULT_TTLS`, in seconds per endpoint family.
+        :param prefetch_session_cookie: Start fetching the availability API session cookie in a background thread,
+            rather than on the first call to `get_all_flights`.
+        :param share_session_cookie: Reuse session cookies already fetched by other instances (or by
+            `Ryanair.prewarm_session_cookie`), and share the ones this instance fetches.
+        :param rate_limiter: Optional `ryanair.rate_limit.RateLimiter`, ideally shared by every client in the process.
+        :param metrics: Optional `ryanair.metrics.MetricsHook` to report requests, retries, parse times etc. to.
+        :param proxy_pool: Optional `ryanair.proxy.ProxyPool` to spread requests across. Defaults to a pool of this
+            instance's own, which connects directly until a query fails, then fetches a proxy using free-proxy.
+            Pass `ProxyPool()` to never use a proxy.
+        :param retry_policy: Optional `ryanair.retry.RetryPolicy`, to change which failed queries are retried and
+            when, or to share a retry budget with other clients. Defaults to a `RetryPolicy()` of this instance's own.
+        :param raise_errors: Raise failed queries' errors (see `ryanair.exceptions`) from the `get_*`, `iter_*`,
+            `search_many` and `fare_calendar` methods, rather than logging them and returning no results.
+        """
+        if proxy_pool is None:
+            proxy_pool = ProxyPool(source=get_first_operational_proxy, min_healthy=0)
+        super().__init__(currency, cache, cache_ttls, rate_limiter, metrics, proxy_pool, retry_policy, raise_errors)
+
+        self.session = requests.Session()
+        self.share_session_cookie = share_session_cookie
+        self._has_session_cookie = False
+        self._session_cookie_lock = threading.Lock()
+        # Queries in flight, shared with threads making the same query meanwhile
+        self._in_flight = SingleFlight()
+
+        if prefetch_session_cookie:
+            threading.Thread(
+                target=self._prefetch_session_cookie, name="ryanair-session-cookie", daemon=True
+            ).start()
+
+    @classmethod
+    def prewarm_session_cookie(cls):
+        """
+        Fetch a session cookie once, for every instance created afterwards to share,
+        e.g. before starting a pool of short-lived workers.
+        """
+        session = requests.Session()
+        session.get(cls.BASE_SITE_FOR_SESSION_URL)
+        with Ryanair._shared_session_cookies_lock:
+            Ryanair._shared_session_cookies = session.cookies.copy()
+
+    def get_active_airports(self) -> list:
+        """
+        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/views/locate/5/airports/en/active to get
+        the active airports for a given airport code.
+
+        :return: A list of active airports for the given airport code.
+        """
+
+        # Prepare the query URL
+        query_url = self.RYANAIR_ACTIVE_AIRPORTS
+
+        try:
+            # Query the API
+            response = self._cached_query("airports", query_url, {})
+        except Exception as e:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        # If response exists, return it
+        if response:
+            return response
+
+        return []
+
+
+    def get_destinations(self, from_code: str) -> list:
+        """
+        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/views/locate/searchWidget/routes/en/airport/{{fromCode}} to get
+        the destinations for a given airport code.
+
+        :param from_code: The airport code to get the destinations for.
+        :return: A list of destinations for the given airport code.
+        """
+
+        # Prepare the query URL
+        query_url = self.RYANAIR_DESTINATION_AIRPORTS.format(fromCode=from_code)
+
+        try:
+            # Query the API
+            response = self._cached_query("destinations", query_url, {})
+        except Exception as e:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        # If response exists, return it
+        if response:
+            return response
+
+        return []
+
+
+
+    def get_flight_schedules(self, from_code: str):
+        """
+        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/timtbl/3/schedules/{{fromCode}}/periods to get
+        the flight schedules for a given airport code.
+
+        :param from_code: The airport code to get the flight schedules for.
+        :return: A list of flight schedules for the given airport code.
+        """
+
+        # Prepare the query URL
+        query_url = self.RYANAIR_SCHEDULES_ENDPOINT.format(fromCode=from_code)
+
+        try:
+            # Query the API
+            response = self._cached_query("schedules", query_url, {})
+        except Exception as e:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        # If response exists, return it
+        if response:
+            return response
+
+        return []
+
+    def get_scheduled_dates_for_route(self, from_code: str, to_code: str):
+        """
+        Uses the Ryanair API Endpoint: https://www.ryanair.com/api/farfnd/v4/oneWayFares/{{fromCode}}/{{toCode}}/availabilities to get
+        the available flights for a given airport code.
+
+        :param from_code: The airport code to get the available flights from.
+        :param to_code: The airport code to get the available flights to.
+        :return: A list of available flights for the given airport codes.
+
+        NB: This API Endpoint does not consider when flights are 'sold out' on that they are scheduled.
+        """
+
+        #  Prepare the query URL
+        query_url = self.RYANAIR_SCHEDULED_DATES_FOR_ROUTE_ENDPOINT.format(fromCode=from_code, toCode=to_code)
+
+        try:
+            # Query the API
+            response = self._cached_query("scheduled_dates", query_url, {})
+        except Exception as e:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        # If response exists, return it
+        if response:
+            return response
+
+        return []
+
+    def get_cheapest_flights(
+        self,
+        airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        departure_time_from: Union[str, time] = "00:00",
+        departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ):
+        query_url = "".join((self.BASE_SERVICES_API_URL, "oneWayFares"))
+
+        params = self._cheapest_flights_params(
+            airport,
+            date_from,
+            date_to,
+            destination_country,
+            custom_params,
+            departure_time_from,
+            departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            return self._fetch_cheapest_flights(params)
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+    def _fetch_cheapest_flights(self, params: dict) -> list:
+        query_url = "".join((self.BASE_SERVICES_API_URL, "oneWayFares"))
+        response = self._cached_query(
+            "fares", query_url, params, self._typed_decoder("fares", decoding.decode_one_way_fares)
+        )["fares"]
+
+        if response:
+            with self._measure_parse(query_url):
+                return [
+                    self._parse_cheapest_flight(flight["outbound"]) for flight in response
+                ]
+
+        return []
+
+    def get_cheapest_return_flights(
+        self,
+        source_airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        return_date_from: Union[datetime, date, str],
+        return_date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        outbound_departure_time_from: Union[str, time] = "00:00",
+        outbound_departure_time_to: Union[str, time] = "23:59",
+        inbound_departure_time_from: Union[str, time] = "00:00",
+        inbound_departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ):
+        query_url = "".join((self.BASE_SERVICES_API_URL, "roundTripFares"))
+
+        params = self._cheapest_return_flights_params(
+            source_airport,
+            date_from,
+            date_to,
+            return_date_from,
+            return_date_to,
+            destination_country,
+            custom_params,
+            outbound_departure_time_from,
+            outbound_departure_time_to,
+            inbound_departure_time_from,
+            inbound_departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            response = self._cached_query(
+                "fares", query_url, params, self._typed_decoder("fares", decoding.decode_round_trip_fares)
+            )["fares"]
+        except Exception as e:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+            return []
+
+        if response:
+            with self._measure_parse(query_url):
+                return [
+                    self._parse_cheapest_return_flights_as_trip(
+                        trip["outbound"], trip["inbound"]
+                    )
+                    for trip in response
+                ]
+        else:
+            return []
+
+    def get_all_flights(
+        self,
+        origin_airport: str,
+        date_out: Union[datetime, date, str],
+        destination: str,
+        # locale: str = "",
+        # origin_is_mac: bool = False,
+        # destination_is_mac: bool = False,
+        custom_params: Optional[dict] = None,
+    ):
+        """
+        This function can be used to get all flights between within a given week.
+
+        With the default parameters, it will return all flights between the origin and destination airports for a single week.  More than that is not supported by the API.
+
+        """
+        return self._get_all_flights(
+            origin_airport,
+            date_out,
+            destination,
+            custom_params,
+            self._parse_all_flights_availability_result_as_flight_v2,
+            list,
+        )
+
+    def get_all_flights_range(
+        self,
+        origin_airport: str,
+        destination: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        custom_params: Optional[dict] = None,
+        max_workers: int = 4,
+    ) -> list:
+        """
+        All flights between two airports departing from `start` to `end` (inclusive), over any number of days.
+
+        The range is split into week-long windows, the most the availability API returns at once, which are fetched
+        concurrently (subject to the rate limiter, if there is one). Windows that fail are logged and skipped, as in
+        `get_all_flights`, unless the client was created with `raise_errors=True`.
+
+        :param max_workers: Maximum number of windows fetched at once.
+        :return: A list of `FlightV2`, without duplicates, sorted by departure time.
+        """
+        windows = self._availability_windows(start, end)
+        if not windows:
+            return []
+
+        def get_window(window):
+            date_out, flex_days_out = window
+            return self.get_all_flights(
+                origin_airport, date_out, destination, {**(custom_params or {}), "FlexDaysOut": flex_days_out}
+            )
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            flight_lists = list(executor.map(get_window, windows))
+
+        return self._merge_flight_windows(flight_lists, start, end)
+
+    def fare_calendar(
+        self,
+        origin: str,
+        start: Union[datetime, date, str],
+        end: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        max_workers: int = 4,
+    ) -> dict:
+        """
+        The cheapest fare on each day from `start` to `end` (inclusive) to every destination from `origin`.
+
+        `get_cheapest_flights` only returns each destination's cheapest fare over its whole date range, so rather than
+        querying each day, ranges are split recursively, and only re-queried for the destinations and days still
+        unknown. A destination missing from a range's results has no flights in it, so is never queried again in
+        that range. Once a range is down to one destination, it's queried for that destination only. Ranges are only
+        split as long as querying the days left one by one afterwards would still take no more queries than querying
+        each day would have, and otherwise the days left are queried one by one straight away.
+
+        This takes at most one query more than querying each day: the first, for the whole range, whose results may
+        not rule out anything. For a single destination, e.g. in a country with one airport, it takes fewer, and far
+        fewer for routes flying a few days a week.
+
+        :param max_workers: Maximum number of ranges fetched at once.
+        :return: `{destination: {date: Flight, or None if there are no flights that day}}`, for every destination
+            with flights in the range. Days in ranges that failed to fetch are logged and left out,
+            unless the client was created with `raise_errors=True`.
+        """
+        start, end = self._parse_date(start), self._parse_date(end)
+        query = partial(self._query_calendar_window, origin, destination_country, custom_params)
+        calendar = {}
+        windows = [(start, end, None, False)] if start <= end else []
+        days = (end - start).days + 1
+        queries = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while windows:
+                queries += len(windows)
+                results = list(executor.map(query, windows))
+                windows = self._next_calendar_windows(windows, results, calendar, days - queries)
+
+        logger.info(f"Fare calendar for {origin} from {start} to {end} took {queries} queries")
+        return self._finish_calendar(calendar)
+
+    def _query_calendar_window(self, origin: str, destination_country, custom_params, window: tuple):
+        try:
+            return self._fetch_cheapest_flights(
+                self._calendar_window_params(origin, window, destination_country, custom_params)
+            )
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to fetch fares from {origin} between {window[0]} and {window[1]}")
+            return None
+
+    def get_all_flights_batch(
+        self,
+        origin_airport: str,
+        date_out: Union[datetime, date, str],
+        destination: str,
+        custom_params: Optional[dict] = None,
+    ) -> FlightBatch:
+        """
+        Same as `get_all_flights`, but returns the flights as a compact, column-oriented `FlightBatch`.
+        Prefer this when collecting a large number of flights.
+        """
+        return self._get_all_flights(
+            origin_airport,
+            date_out,
+            destination,
+            custom_params,
+            FlightBatch.from_availability_response,
+            FlightBatch,
+        )
+
+    def _get_all_flights(self, origin_airport, date_out, destination, custom_params, parse, empty):
+        query_url = "".join(
+            (self.BASE_AVAILABILITY_API_URL, f"/availability")
+        )
+
+        params = self._all_flights_params(
+            origin_airport, date_out, destination, custom_params
+        )
+
+        try:
+            self._ensure_session_cookie()
+
+            # Try once to get a new session cookie, just in case the old one has expired.
+            # If that fails too, we should raise the exception.
+            response = self._shared_query(query_url, params)
+
+            if self.check_if_availability_response_is_declined(response):
+                logger.warning(
+                    "Availability API declined to respond, attempting again with a new session cookie"
+                )
+                self._update_session_cookie()
+                response = self._shared_query(query_url, params)
+                if self.check_if_availability_response_is_declined(response):
+                    raise AvailabilityException
+
+            with self._measure_parse(query_url):
+                return parse(response)
+
+        except RyanairException:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to parse response when querying {query_url} with parameters {params}"
+            )
+            return empty()
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to parse response when querying {query_url} with parameters {params}"
+            )
+            return empty()
+
+    def iter_cheapest_flights(
+        self,
+        airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        departure_time_from: Union[str, time] = "00:00",
+        departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ) -> Iterator[Flight]:
+        """
+        Generator version of `get_cheapest_flights`, yielding each `Flight` as soon as it has been parsed.
+        With `ijson` installed, fares are parsed incrementally as the response is downloaded.
+        """
+        query_url = "".join((self.BASE_SERVICES_API_URL, "oneWayFares"))
+
+        params = self._cheapest_flights_params(
+            airport,
+            date_from,
+            date_to,
+            destination_country,
+            custom_params,
+            departure_time_from,
+            departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            for fare in self._iter_query("fares", query_url, params, "fares.item"):
+                yield self._parse_cheapest_flight(fare["outbound"])
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+
+    def iter_cheapest_return_flights(
+        self,
+        source_airport: str,
+        date_from: Union[datetime, date, str],
+        date_to: Union[datetime, date, str],
+        return_date_from: Union[datetime, date, str],
+        return_date_to: Union[datetime, date, str],
+        destination_country: Optional[str] = None,
+        custom_params: Optional[dict] = None,
+        outbound_departure_time_from: Union[str, time] = "00:00",
+        outbound_departure_time_to: Union[str, time] = "23:59",
+        inbound_departure_time_from: Union[str, time] = "00:00",
+        inbound_departure_time_to: Union[str, time] = "23:59",
+        max_price: Optional[int] = None,
+        destination_airport: Optional[str] = None,
+    ) -> Iterator[Trip]:
+        """
+        Generator version of `get_cheapest_return_flights`, yielding each `Trip` as soon as it has been parsed.
+        """
+        query_url = "".join((self.BASE_SERVICES_API_URL, "roundTripFares"))
+
+        params = self._cheapest_return_flights_params(
+            source_airport,
+            date_from,
+            date_to,
+            return_date_from,
+            return_date_to,
+            destination_country,
+            custom_params,
+            outbound_departure_time_from,
+            outbound_departure_time_to,
+            inbound_departure_time_from,
+            inbound_departure_time_to,
+            max_price,
+            destination_airport,
+        )
+
+        try:
+            for trip in self._iter_query("fares", query_url, params, "fares.item"):
+                yield self._parse_cheapest_return_flights_as_trip(trip["outbound"], trip["inbound"])
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(f"Failed to parse response when querying {query_url}")
+
+    def iter_all_flights(
+        self,
+        origin_airport: str,
+        date_out: Union[datetime, date, str],
+        destination: str,
+        custom_params: Optional[dict] = None,
+    ) -> Iterator[FlightV2]:
+        """
+        Generator version of `get_all_flights`, yielding each `FlightV2` as soon as it has been parsed,
+        rather than after the whole week of flights has been.
+        """
+        query_url = "".join(
+            (self.BASE_AVAILABILITY_API_URL, f"/availability")
+        )
+
+        params = self._all_flights_params(
+            origin_airport, date_out, destination, custom_params
+        )
+
+        try:
+            self._ensure_session_cookie()
+
+            # As in get_all_flights, try once more with a new session cookie if the API declines to respond.
+            # A declined response has no flights, so nothing will have been yielded by then.
+            for attempt in range(2):
+                # "currency" precedes "trips" in the response, so is known by the time flights are parsed
+                fields = {"currency": None, "message": None}
+                for this_flight in self._iter_query(
+                    "availability", query_url, params, "trips.item.dates.item.flights.item", fields
+                ):
+                    flight = self._parse_availability_flight_as_flight_v2(this_flight, fields["currency"])
+                    if flight is not None:
+                        yield flight
+
+                if fields["message"] != "Availability declined":
+                    return
+
+                if attempt == 0:
+                    logger.warning(
+                        "Availability API declined to respond, attempting again with a new session cookie"
+                    )
+                    self._update_session_cookie()
+
+            raise AvailabilityException
+
+        except Exception:
+            if self.raise_errors:
+                raise
+            logger.exception(
+                f"Failed to parse response when querying {query_url} with parameters {params}"
+            )
+
+    def search_many(
+        self,
+        origins: Iterable[str],
+        date_ranges: Iterable[tuple],
+        max_workers: int = 8,
+        **kwargs,
+    ) -> Iterator[SearchResult]:
+        """
+        Run `get_cheapest_flights` (or `get_cheapest_return_flights`) for every combination of origin and date range,
+        on a pool of worker threads sharing this instance's session.
+
+        Results are yielded as soon as each query completes, so they do not come back in submission order.
+
+        :param origins: Departure airport IATA codes.
+        :param date_ranges: `(date_from, date_to)` tuples for one-way fares,
+            or `(date_from, date_to, return_date_from, return_date_to)` tuples for return trips.
+        :param max_workers: Maximum number of queries in flight at once.
+        :param kwargs: Further keyword arguments passed to every query, e.g. `destination_country` or `max_price`.
+        :return: An iterator of `SearchResult(query, results)` tuples.
+        """
+        queries = self._expand_search_queries(origins, date_ranges)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {
+                executor.submit(self._run_search_query, query, kwargs): query
+                for query in queries
+            }
+            for future in as_completed(futures):
+                yield SearchResult(futures[future], future.result())
+        finally:
+            # If the consumer stops early, don't keep querying on its behalf
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_search_query(self, query: SearchQuery, kwargs: dict) -> list:
+        if query.return_date_from is None:
+            return self.get_cheapest_flights(
+                query.origin, query.date_from, query.date_to, **kwargs
+            )
+        return self.get_cheapest_return_flights(
+            query.origin,
+            query.date_from,
+            query.date_to,
+            query.return_date_from,
+            query.return_date_to,
+            **kwargs,
+        )
+
+    def _cached_query(self, endpoint: str, url: str, params: dict, decoder=None):
+        response = self._get_cached_response(endpoint, url, params)
+        if response is None:
+            response = self._shared_query(url, params, decoder, cache_as=endpoint)
+        return response
+
+    def _shared_query(self, url, params, decoder=None, cache_as: Optional[str] = None):
+        """
+        `_retryable_query`, unless another thread is already making the same query, in which case its result is shared.
+
+        :param cache_as: Endpoint family to cache the response under, once, by the thread that made the query.
+        """
+
+        def query():
+            response = self._retryable_query(url, params, decoder)
+            if cache_as is not None:
+                self._set_cached_response(cache_as, url, params, response)
+            return response
+
+        response, shared = self._in_flight.do(self._in_flight_key(url, params, decoder), query)
+        self._report_coalesced(url, shared)
+        return response
+
+    def _retryable_query(self, url, params, decoder=None):
+        return self.retry_policy.call(
+            partial(self._query, url, params, decoder),
+            partial(self._on_query_retry, url),
+            partial(self._on_query_giveup, url),
+        )
+
+    def _query(self, url, params, decoder=None):
+        response = self._send_request(url, params)
+        return self._decode_response(url, response.status_code, response.content, decoder)
+
+    def _retryable_stream(self, url, params):
+        # Only opening the response is retried, the body is read by the caller
+        return self.retry_policy.call(
+            partial(self._send_request, url, params, stream=True),
+            partial(self._on_query_retry, url),
+            partial(self._on_query_giveup, url),
+        )
+
+    def _send_request(self, url, params, **kwargs):
+        self._num_queries += 1
+
+        # for testing purposes
+        # import random
+        # if random.randint() % 2 == 0:
+        #     raise Exception("random error")
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+
+        proxy = self._choose_proxy()
+        started = perf_counter()
+        try:
+            if proxy:
+                # logger.debug(f"Sending request URL: {url} with params: {params}")
+                response = self.session.get(url, params=params, proxies=proxy, **kwargs)
+            else:
+                # logger.debug("Not using proxy")
+                # logger.debug(f"Sending request URL: {url} with params: {params}")
+                response = self.session.get(url, params=params, **kwargs)
+        except Exception as e:
+            self._report_request(url, started, None, 0)
+            self._report_proxy_outcome(proxy, started, success=False)
+            if isinstance(e, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+                raise TransientError(f"{type(e).__name__} when querying {url}: {e}") from e
+            raise
+        # A 429 is likely aimed at the proxy's IP address, so let the pool favour others for a while
+        self._report_proxy_outcome(proxy, started, success=response.status_code != 429)
+
+        # A streamed body hasn't been downloaded yet, so rely on the declared length
+        if kwargs.get("stream"):
+            response_bytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            response_bytes = len(response.content)
+        self._report_request(url, started, response.status_code, response_bytes)
+
+        try:
+            self._raise_for_status(url, response.status_code, response.headers)
+        except RyanairException:
+            response.close()
+            raise
+
+        return response
+
+    def _iter_query(self, endpoint: str, url: str, params: dict, prefix: str, fields: Optional[dict] = None):
+        # Cacheable responses have to be read in full, as do all responses when ijson isn't installed
+        if streaming.ijson is None or self._is_cached(endpoint):
+            yield from iter_items(self._cached_query(endpoint, url, params), prefix, fields)
+            return
+
+        response = self._retryable_stream(url, params)
+        with response:
+            if response.status_code >= 400:
+                # Error bodies are small, decode them in full to fail (or be declined) just as get_* queries are
+                result = self._decode_response(url, response.status_code, response.content)
+                yield from iter_items(result, prefix, fields)
+                return
+            response.raw.decode_content = True
+            yield from iter_items(response.raw, prefix, fields)
+
+        self._record_rate_limit_outcome(url, throttled=self._report_declined(url, fields))
+
+    def _update_session_cookie(self):
+        # Visit main website to get session cookies
+        self.session.get(self.BASE_SITE_FOR_SESSION_URL)
+        self._has_session_cookie = True
+
+        if self.share_session_cookie:
+            with Ryanair._shared_session_cookies_lock:
+                Ryanair._shared_session_cookies = self.session.cookies.copy()
+
+    def _ensure_session_cookie(self):
+        # Only the availability API needs the cookie, so it's fetched on first use rather than on construction
+        if self._has_session_cookie:
+            return
+
+        with self._session_cookie_lock:
+            if self._has_session_cookie:
+                return
+
+            shared_cookies = Ryanair._shared_session_cookies if self.share_session_cookie else None
+            if shared_cookies is not None:
+                self.session.cookies.update(shared_cookies)
+                self._has_session_cookie = True
+            else:
+                self._update_session_cookie()
+
+    def _prefetch_session_cookie(self):
+        try:
+            self._ensure_session_cookie()
+        except Exception:
+            # Not fatal, it will be fetched again when it's first needed
+            logger.warning("Failed to prefetch session cookie", exc_info=True)
+
     @deprecated(
         version="2.0.0",
         reason="deprecated in favour of get_cheapest_flights",
@@ -0,0 +1,91 @@
+"""
+Coalescing of identical concurrent queries.
+
+When several threads (or tasks) ask a client for the same thing at once, only the first actually sends it; the others
+wait for that call and share its result. Clients key calls on the URL and normalized query parameters, so this
+applies whichever public method made the query, and does nothing for calls that don't overlap in time.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time across threads, sharing its outcome with every thread that asked
+    for the same key meanwhile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Call `fn`, unless a call for `key` is already in flight, in which case wait for that one instead.
+
+        :return: `(result, shared)`, where `shared` is True if the result came from another thread's call.
+            Exceptions raised by `fn` are raised in every waiting thread.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result, False
+
+    def _finish(self, key: Hashable):
+        # Callers arriving from now on start a call of their own, rather than reusing a result that may be stale
+        with self._lock:
+            del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of `SingleFlight`, for tasks running on a single event loop.
+
+    The shared call runs in a task of its own, so cancelling the caller that started it doesn't cancel it for the
+    others waiting on it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Await `fn()`, unless a call for `key` is already in flight, in which case await that one instead.
+
+        :return: `(result, shared)`, as for `SingleFlight.do`.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = self._calls[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda _: self._finish(key, task))
+        return await asyncio.shield(task), False
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
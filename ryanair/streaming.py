@@ -0,0 +1,75 @@
+"""
+Incremental extraction of items from JSON responses, used by the `iter_*` query methods.
+
+With the optional `ijson` dependency (`pip install ryanair-py[streaming]`), items are parsed straight off the
+response body as it arrives, so the first results are available before the whole response has been downloaded,
+and memory use doesn't grow with the response size. Without it, the response is decoded in full and then walked.
+"""
+import logging
+from typing import Any, Iterator, Optional
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+_CONTAINER_START = ("start_map", "start_array")
+_CONTAINER_END = ("end_map", "end_array")
+
+
+def iter_items(source, prefix: str, fields: Optional[dict] = None) -> Iterator[Any]:
+    """
+    Yield every value found at `prefix` in a JSON document, as soon as it has been parsed.
+
+    :param source: A file-like object to stream from, or an already decoded document.
+    :param prefix: Path to the items, in ijson's syntax, e.g. "fares.item" for each element of the "fares" list.
+    :param fields: Optional dict of top-level keys to capture. Its values are filled in with the document's
+        scalar values for those keys, as they are encountered, so keys that precede the items in the document
+        are available while the items are being consumed.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_stream_items(source, prefix, fields)
+    else:
+        if fields is not None and isinstance(source, dict):
+            for key in fields:
+                fields[key] = source.get(key)
+        yield from _iter_document_items(source, prefix.split(".") if prefix else [])
+
+
+def _iter_stream_items(stream, prefix: str, fields: Optional[dict]) -> Iterator[Any]:
+    builder = None
+    for path, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            # The end of the item itself is the only container end reported at exactly `prefix`
+            if path == prefix and event in _CONTAINER_END:
+                yield builder.value
+                builder = None
+        elif path == prefix:
+            if event in _CONTAINER_START:
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif event not in ("map_key",) + _CONTAINER_END:
+                yield value
+        elif (
+            fields is not None
+            and path in fields
+            and event not in _CONTAINER_START + _CONTAINER_END
+        ):
+            fields[path] = value
+
+
+def _iter_document_items(document, parts: list) -> Iterator[Any]:
+    if not parts:
+        yield document
+        return
+
+    part, rest = parts[0], parts[1:]
+    if part == "item":
+        if isinstance(document, list):
+            for element in document:
+                yield from _iter_document_items(element, rest)
+    elif isinstance(document, dict) and part in document:
+        yield from _iter_document_items(document[part], rest)
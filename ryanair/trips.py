@@ -0,0 +1,120 @@
+"""
+Round trips put together from one-way fares, without querying `roundTripFares`.
+
+A `get_cheapest_return_flights` query covers one outbound and one inbound date range, so comparing trips of different
+lengths takes a query per combination. `cheapest_trips` pairs up one-way `Flight`s already fetched in each direction
+instead, e.g. from `get_cheapest_flights` or `fare_calendar`, and returns the cheapest `k` trips for any range of
+stay lengths:
+
+    outbound = api.get_cheapest_flights("DUB", "2023-05-01", "2023-05-31")
+    inbound = [...]  # one-way fares back to DUB, e.g. from each destination's fare_calendar
+    cheapest_trips(outbound, inbound, k=5, min_nights=3, max_nights=7)
+
+Pairs are taken in order of total price from a heap holding one entry per outbound flight, with each flight's
+possible return flights merged lazily from per-day lists sorted by price. Finding `k` trips looks at one pair per
+outbound flight and `k` more, rather than every combination.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from itertools import count
+from typing import Iterable, Optional
+
+from ryanair.types import Flight, Trip
+
+
+def _price(flight: Flight) -> float:
+    return flight.price
+
+
+def _cheapest_by_flight(flights: Iterable[Flight]) -> list:
+    # The same flight may have been fetched more than once, keep its cheapest fare
+    cheapest = {}
+    for flight in flights:
+        key = (
+            flight.origin,
+            flight.destination,
+            flight.flightNumber,
+            flight.departureTime,
+        )
+        if key not in cheapest or flight.price < cheapest[key].price:
+            cheapest[key] = flight
+    return list(cheapest.values())
+
+
+def cheapest_trips(
+    outbound: Iterable[Flight],
+    inbound: Iterable[Flight],
+    k: int = 10,
+    min_nights: int = 0,
+    max_nights: Optional[int] = None,
+) -> list:
+    """
+    The `k` cheapest round trips pairing an outbound flight with an inbound flight back from the same airport.
+
+    Only flights in the same currency are paired. A trip's length is counted in nights between the departure dates
+    of its two flights, and same-day trips (`min_nights=0`) need the inbound flight to leave after the outbound one.
+
+    :param outbound: One-way `Flight`s out, e.g. from `get_cheapest_flights`.
+    :param inbound: One-way `Flight`s back.
+    :param min_nights: Shortest stay.
+    :param max_nights: Longest stay, or None for any.
+    :return: A list of `Trip`, cheapest first.
+    """
+    if k <= 0 or (max_nights is not None and max_nights < min_nights):
+        return []
+
+    # (airport, home airport, currency) -> departure date -> flights back, cheapest first
+    inbound_by_day = defaultdict(lambda: defaultdict(list))
+    for flight in _cheapest_by_flight(inbound):
+        inbound_by_day[flight.origin, flight.destination, flight.currency][
+            flight.departureTime.date()
+        ].append(flight)
+    for days in inbound_by_day.values():
+        for flights in days.values():
+            flights.sort(key=_price)
+
+    def return_flights(flight: Flight):
+        days = inbound_by_day.get((flight.destination, flight.origin, flight.currency))
+        if not days:
+            return iter(())
+        first = flight.departureTime.date() + timedelta(days=min_nights)
+        if max_nights is None:
+            window = [day for day in days if day >= first]
+        else:
+            window = [
+                day
+                for day in (
+                    first + timedelta(days=i)
+                    for i in range(max_nights - min_nights + 1)
+                )
+                if day in days
+            ]
+        candidates = heapq.merge(*(days[day] for day in window), key=_price)
+        if min_nights == 0:
+            return (f for f in candidates if f.departureTime > flight.departureTime)
+        return candidates
+
+    # Each outbound flight has one entry in the heap, for its cheapest return flight not yet taken
+    heap = []
+    tiebreak = count()
+    for flight in _cheapest_by_flight(outbound):
+        candidates = return_flights(flight)
+        back = next(candidates, None)
+        if back is not None:
+            heap.append(
+                (flight.price + back.price, next(tiebreak), flight, back, candidates)
+            )
+    heapq.heapify(heap)
+
+    trips = []
+    while heap and len(trips) < k:
+        total_price, _, flight, back, candidates = heapq.heappop(heap)
+        trips.append(Trip(totalPrice=total_price, outbound=flight, inbound=back))
+        back = next(candidates, None)
+        if back is not None:
+            heapq.heappush(
+                heap,
+                (flight.price + back.price, next(tiebreak), flight, back, candidates),
+            )
+    return trips
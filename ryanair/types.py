@@ -42,3 +42,32 @@ FlightV2 = namedtuple(
 )
 
 Trip = namedtuple("Trip", ("totalPrice", "outbound", "inbound"))
+
+Itinerary = namedtuple("Itinerary", ("totalPrice", "flights"))
+
+FareChange = namedtuple(
+    "FareChange",
+    (
+        "observedAt",
+        "change",
+        "origin",
+        "destination",
+        "flightNumber",
+        "departureTime",
+        "price",
+        "previousPrice",
+        "faresLeft",
+        "previousFaresLeft",
+        "currency",
+    ),
+)
+
+SearchQuery = namedtuple(
+    "SearchQuery",
+    ("origin", "date_from", "date_to", "return_date_from", "return_date_to"),
+    defaults=(None, None),
+)
+
+SearchResult = namedtuple("SearchResult", ("query", "results"))
+
+CrawlUnit = namedtuple("CrawlUnit", ("origin", "date_from", "date_to", "destination"), defaults=(None,))
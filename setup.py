@@ -1,7 +1,32 @@
 #!/usr/bin/env python
-from setuptools import setup
+import importlib.util
 from os import path
 
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPyWithAirportIndex(build_py):
+    """
+    Also precompile airports.csv into the pickled index that airport_utils loads in preference to the CSV.
+    """
+
+    def run(self):
+        super().run()
+        # Load the index builder on its own, as importing the package would need its dependencies installed
+        spec = importlib.util.spec_from_file_location(
+            "_airport_index", path.join(this_directory, "ryanair", "_airport_index.py")
+        )
+        airport_index = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(airport_index)
+
+        package_dir = path.join(self.build_lib, "ryanair")
+        airport_index.build_airport_index(
+            csv_path=path.join(package_dir, "airports.csv"),
+            index_path=path.join(package_dir, "airports.pickle"),
+        )
+
+
 this_directory = path.abspath(path.dirname(__file__))
 with open(path.join(this_directory, "README.md"), encoding="utf-8") as f:
     long_description = f.read()
@@ -21,6 +46,14 @@ setup(
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
     ],
-    install_requires=["requests", "Deprecated", "backoff"],
+    install_requires=["requests", "Deprecated"],
+    extras_require={
+        "arrow": ["pyarrow"],
+        "async": ["aiohttp"],
+        "fast": ["orjson", "msgspec"],
+        "geo": ["numpy", "scipy"],
+        "streaming": ["ijson"],
+    },
     package_data={"ryanair": ["airports.csv"]},
+    cmdclass={"build_py": BuildPyWithAirportIndex},
 )